@@ -4,13 +4,35 @@ Project management tools for Asana workspace
 """
 
 import os
+import asyncio
 import logging
-from typing import Any, Dict, List
+from contextlib import aclosing
+from typing import Any, Dict, List, Optional
 import httpx
 
+from backends.asana_cache import cache_from_env, write_tags
+from backends.asana_scheduler import scheduler_from_env
+from backends.asana_sync import ASANA_SYNC_ENABLED, AsanaSyncWorker, project_fields
+from gateway.progress import report_progress
+from gateway.shared import get_shared_store
+
 logger = logging.getLogger(__name__)
 
 ASANA_BASE = "https://app.asana.com/api/1.0"
+ASANA_TIMEOUT = float(os.getenv("ASANA_TIMEOUT", "30"))
+ASANA_CONNECT_TIMEOUT = float(os.getenv("ASANA_CONNECT_TIMEOUT", "10"))
+ASANA_MAX_CONNECTIONS = int(os.getenv("ASANA_MAX_CONNECTIONS", "20"))
+ASANA_MAX_KEEPALIVE = int(os.getenv("ASANA_MAX_KEEPALIVE", "10"))
+ASANA_HTTP2 = os.getenv("ASANA_HTTP2", "true").lower() == "true"
+ASANA_PAGE_LIMIT = 100
+ASANA_MAX_ITEMS = int(os.getenv("ASANA_MAX_ITEMS", "5000"))
+ASANA_BATCH_SIZE = 10
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
 class AsanaBackend:
@@ -24,6 +46,38 @@ class AsanaBackend:
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
+        self.client: Optional[httpx.AsyncClient] = None
+        self.scheduler = scheduler_from_env(self.token)
+        self.cache = cache_from_env()
+        self.sync: Optional[AsanaSyncWorker] = AsanaSyncWorker(self) if ASANA_SYNC_ENABLED else None
+        self.shared = get_shared_store()
+        if self.shared is not None:
+            # Writes made through other workers invalidate this worker's cache too
+            self.shared.subscribe("asana.invalidate", self._apply_invalidation)
+    
+    async def start(self):
+        """Create the shared HTTP client (called from the app lifespan)"""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=ASANA_BASE,
+                headers=self.headers,
+                http2=ASANA_HTTP2 and HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(ASANA_TIMEOUT, connect=ASANA_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=ASANA_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASANA_MAX_KEEPALIVE
+                )
+            )
+            if self.sync is not None:
+                self.sync.start()
+    
+    async def aclose(self):
+        """Stop background sync and close pooled connections (called from the app lifespan)"""
+        if self.sync is not None:
+            await self.sync.stop()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
     
     def get_tools(self) -> List[Dict]:
         return [
@@ -45,7 +99,9 @@ class AsanaBackend:
                     "type": "object",
                     "properties": {
                         "limit": {"type": "integer", "default": 50},
-                        "completed": {"type": "boolean", "default": False}
+                        "max_items": {"type": "integer", "description": "Follow pagination until this many items are collected"},
+                        "completed": {"type": "boolean", "default": False},
+                        "max_staleness_seconds": {"type": "number", "description": "Accept answers from the synced task index up to this old; 0 forces a live call"}
                     },
                     "required": []
                 }
@@ -57,6 +113,7 @@ class AsanaBackend:
                     "type": "object",
                     "properties": {
                         "limit": {"type": "integer", "default": 50},
+                        "max_items": {"type": "integer", "description": "Follow pagination until this many items are collected"},
                         "archived": {"type": "boolean", "default": False}
                     },
                     "required": []
@@ -98,7 +155,9 @@ class AsanaBackend:
                         "assignee": {"type": "string"},
                         "section": {"type": "string"},
                         "completed": {"type": "boolean"},
-                        "limit": {"type": "integer", "default": 50}
+                        "limit": {"type": "integer", "default": 50},
+                        "max_items": {"type": "integer", "description": "Follow pagination until this many items are collected"},
+                        "max_staleness_seconds": {"type": "number", "description": "Accept answers from the synced task index up to this old; 0 forces a live call"}
                     },
                     "required": []
                 }
@@ -268,7 +327,8 @@ class AsanaBackend:
                         "due_before": {"type": "string"},
                         "due_after": {"type": "string"},
                         "is_subtask": {"type": "boolean"},
-                        "limit": {"type": "integer", "default": 25}
+                        "limit": {"type": "integer", "default": 25},
+                        "max_staleness_seconds": {"type": "number", "description": "Accept answers from the synced task index up to this old; 0 forces a live call"}
                     },
                     "required": []
                 }
@@ -290,7 +350,8 @@ class AsanaBackend:
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "limit": {"type": "integer", "default": 100}
+                        "limit": {"type": "integer", "default": 100},
+                        "max_items": {"type": "integer", "description": "Follow pagination until this many items are collected"}
                     },
                     "required": []
                 }
@@ -301,10 +362,89 @@ class AsanaBackend:
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "limit": {"type": "integer", "default": 100}
+                        "limit": {"type": "integer", "default": 100},
+                        "max_items": {"type": "integer", "description": "Follow pagination until this many items are collected"}
                     },
                     "required": []
                 }
+            },
+            {
+                "name": "batch_create_tasks",
+                "description": "[ASANA] Create many tasks in one call via the Asana batch API",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "tasks": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "name": {"type": "string"},
+                                    "notes": {"type": "string"},
+                                    "project_id": {"type": "string"},
+                                    "section_id": {"type": "string"},
+                                    "assignee": {"type": "string"},
+                                    "due_date": {"type": "string"},
+                                    "due_at": {"type": "string"},
+                                    "parent": {"type": "string"}
+                                },
+                                "required": ["name"]
+                            }
+                        }
+                    },
+                    "required": ["tasks"]
+                }
+            },
+            {
+                "name": "batch_update_tasks",
+                "description": "[ASANA] Update (or complete) many tasks in one call via the Asana batch API",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "updates": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "task_id": {"type": "string"},
+                                    "name": {"type": "string"},
+                                    "notes": {"type": "string"},
+                                    "assignee": {"type": "string"},
+                                    "due_date": {"type": "string"},
+                                    "due_at": {"type": "string"},
+                                    "completed": {"type": "boolean"}
+                                },
+                                "required": ["task_id"]
+                            }
+                        }
+                    },
+                    "required": ["updates"]
+                }
+            },
+            {
+                "name": "batch_move_tasks_to_section",
+                "description": "[ASANA] Move many tasks to a section in one call",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "section_id": {"type": "string"},
+                        "task_ids": {"type": "array", "items": {"type": "string"}}
+                    },
+                    "required": ["section_id", "task_ids"]
+                }
+            },
+            {
+                "name": "batch_add_tasks_to_project",
+                "description": "[ASANA] Add many existing tasks to a project in one call",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "project_id": {"type": "string"},
+                        "section_id": {"type": "string"},
+                        "task_ids": {"type": "array", "items": {"type": "string"}}
+                    },
+                    "required": ["project_id", "task_ids"]
+                }
             }
         ]
     
@@ -332,7 +472,11 @@ class AsanaBackend:
             "search_tasks": self._search_tasks,
             "list_teams": self._list_teams,
             "list_workspace_users": self._list_workspace_users,
-            "list_tags": self._list_tags
+            "list_tags": self._list_tags,
+            "batch_create_tasks": self._batch_create_tasks,
+            "batch_update_tasks": self._batch_update_tasks,
+            "batch_move_tasks_to_section": self._batch_move_tasks_to_section,
+            "batch_add_tasks_to_project": self._batch_add_tasks_to_project
         }
         
         handler = handlers.get(tool_name)
@@ -341,57 +485,141 @@ class AsanaBackend:
         
         return await handler(arguments)
     
+    async def _request(self, method: str, endpoint: str, cost: int = 1, **kwargs) -> httpx.Response:
+        """Send a request over the shared keep-alive client, under the rate-limit scheduler"""
+        if self.client is None:
+            await self.start()
+        try:
+            resp = await self.scheduler.send(
+                method, lambda: self.client.request(method, endpoint, **kwargs), cost
+            )
+        finally:
+            # Invalidate even if the write failed; it may have been applied before the error
+            if method != "GET":
+                self._invalidate_for_write(endpoint, (kwargs.get("json") or {}).get("data"))
+        resp.raise_for_status()
+        return resp
+    
+    def _invalidate_for_write(self, endpoint: str, data: Optional[Dict]):
+        if endpoint == "/batch":
+            tags = set()
+            for action in (data or {}).get("actions", []):
+                tags |= write_tags(action.get("relative_path", ""), action.get("data"))
+        else:
+            tags = write_tags(endpoint, data)
+        self._apply_invalidation(list(tags))
+        if self.shared is not None:
+            self.shared.publish_nowait("asana.invalidate", list(tags))
+    
+    def _apply_invalidation(self, tags: List[str]):
+        self.cache.invalidate(tags)
+        if self.sync is not None:
+            self.sync.mark_dirty()
+    
+    async def _api_get_cached(self, endpoint: str, params: Dict = None) -> Dict:
+        """GET through the entity cache"""
+        key = self.cache.make_key(endpoint, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        generation = self.cache.generation
+        resp = await self._request("GET", endpoint, params=params)
+        result = resp.json()
+        self.cache.put(key, result, len(resp.content), generation)
+        return result
+    
     async def _api_get(self, endpoint: str, params: Dict = None) -> Dict:
         """Make GET request to Asana API"""
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{ASANA_BASE}{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = await self._request("GET", endpoint, params=params)
+        return resp.json()
     
     async def _api_post(self, endpoint: str, data: Dict) -> Dict:
         """Make POST request to Asana API"""
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{ASANA_BASE}{endpoint}",
-                headers=self.headers,
-                json={"data": data},
-                timeout=30
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = await self._request("POST", endpoint, json={"data": data})
+        return resp.json()
     
     async def _api_put(self, endpoint: str, data: Dict) -> Dict:
         """Make PUT request to Asana API"""
-        async with httpx.AsyncClient() as client:
-            resp = await client.put(
-                f"{ASANA_BASE}{endpoint}",
-                headers=self.headers,
-                json={"data": data},
-                timeout=30
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = await self._request("PUT", endpoint, json={"data": data})
+        return resp.json()
     
     async def _api_delete(self, endpoint: str) -> Dict:
         """Make DELETE request to Asana API"""
-        async with httpx.AsyncClient() as client:
-            resp = await client.delete(
-                f"{ASANA_BASE}{endpoint}",
-                headers=self.headers,
-                timeout=30
-            )
-            resp.raise_for_status()
-            return {"success": True}
+        await self._request("DELETE", endpoint)
+        return {"success": True}
+    
+    async def _iter_pages(self, endpoint: str, params: Dict, max_items: int = None):
+        """
+        Yield successive pages of an Asana list endpoint, following next_page.offset.
+        The next page is requested as soon as the current one arrives, so the network
+        round trip overlaps with whatever the caller does with the current page.
+        """
+        params = dict(params)
+        params["limit"] = min(params.get("limit") or ASANA_PAGE_LIMIT, ASANA_PAGE_LIMIT)
+        fetched = 0
+        pending = asyncio.ensure_future(self._api_get(endpoint, params))
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+                data = page.get("data", [])
+                fetched += len(data)
+                offset = (page.get("next_page") or {}).get("offset")
+                if offset and data and (max_items is None or fetched < max_items):
+                    pending = asyncio.ensure_future(self._api_get(endpoint, {**params, "offset": offset}))
+                yield data
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
+    async def _api_list(self, endpoint: str, params: Dict, args: Dict) -> List[Dict]:
+        """Single page by default; all pages up to max_items when the caller asks for it"""
+        max_items = args.get("max_items")
+        if not max_items:
+            result = await self._api_get(endpoint, params)
+            return result.get("data", [])
+        
+        max_items = min(max_items, ASANA_MAX_ITEMS)
+        params = {**params, "limit": min(max_items, ASANA_PAGE_LIMIT)}
+        items = []
+        # aclosing: breaking out early must run _iter_pages' cleanup (cancelling its prefetch) now
+        async with aclosing(self._iter_pages(endpoint, params, max_items)) as pages:
+            async for page in pages:
+                items.extend(page)
+                report_progress(min(len(items), max_items), max_items, f"Fetched {len(items)} items")
+                if len(items) >= max_items:
+                    break
+        return items[:max_items]
+    
+    async def health_check(self):
+        """Cheapest authenticated call; raises on transport errors and non-2xx"""
+        await self._request("GET", "/users/me", params={"opt_fields": "gid"})
+    
+    def get_metrics(self) -> Dict:
+        metrics = {"scheduler": self.scheduler.stats(), "cache": self.cache.stats()}
+        if self.sync is not None:
+            metrics["sync"] = self.sync.stats()
+        return metrics
+    
+    def _fresh_index(self, args: Dict) -> Optional[AsanaSyncWorker]:
+        """The sync worker, if it may answer this call within the caller's staleness bound"""
+        if self.sync is None or not self.sync.fresh(args.get("max_staleness_seconds")):
+            return None
+        return self.sync
+    
+    def _index_result(self, key: str, tasks: List[Dict], opt_fields: str, limit: int) -> Dict:
+        tasks = [project_fields(task, opt_fields) for task in tasks[:limit]]
+        return {
+            "success": True,
+            key: tasks,
+            "source": "index",
+            "index_age_seconds": self.sync.age()
+        }
     
     # Tool implementations
     async def _get_user(self, args: Dict) -> Dict:
         user_id = args.get("user_id", "me")
-        result = await self._api_get(f"/users/{user_id}")
+        result = await self._api_get_cached(f"/users/{user_id}")
         return {"success": True, "user": result.get("data")}
     
     async def _get_my_tasks(self, args: Dict) -> Dict:
@@ -403,8 +631,14 @@ class AsanaBackend:
         }
         if not args.get("completed", False):
             params["completed_since"] = "now"
-        result = await self._api_get("/tasks", params)
-        return {"success": True, "tasks": result.get("data", [])}
+            # The index tracks incomplete my-tasks only
+            sync = self._fresh_index(args)
+            if sync is not None:
+                mine = [sync.index.tasks[g] for g in sync.index.my_tasks if g in sync.index.tasks]
+                limit = args.get("max_items") or params["limit"]
+                return self._index_result("tasks", mine, params["opt_fields"], limit)
+        tasks = await self._api_list("/tasks", params, args)
+        return {"success": True, "tasks": tasks}
     
     async def _list_projects(self, args: Dict) -> Dict:
         params = {
@@ -413,12 +647,12 @@ class AsanaBackend:
             "archived": args.get("archived", False),
             "opt_fields": "name,notes,due_date,owner,public"
         }
-        result = await self._api_get("/projects", params)
-        return {"success": True, "projects": result.get("data", [])}
+        projects = await self._api_list("/projects", params, args)
+        return {"success": True, "projects": projects}
     
     async def _get_project(self, args: Dict) -> Dict:
         project_id = args["project_id"]
-        result = await self._api_get(f"/projects/{project_id}")
+        result = await self._api_get_cached(f"/projects/{project_id}")
         return {"success": True, "project": result.get("data")}
     
     async def _create_project(self, args: Dict) -> Dict:
@@ -449,14 +683,32 @@ class AsanaBackend:
             if not args["completed"]:
                 params["completed_since"] = "now"
         
-        result = await self._api_get("/tasks", params)
-        return {"success": True, "count": len(result.get("data", [])), "tasks": result.get("data", [])}
+        # Only listings scoped to a synced project (directly or through a section) are fully covered
+        sync = self._fresh_index(args)
+        project_id = args.get("project_id")
+        scope = project_id or (sync.index.section_project(args["section"]) if sync and args.get("section") else None)
+        if sync is not None and scope in sync.sync_tokens:
+            assignee = args.get("assignee")
+            if assignee == "me":
+                assignee = sync.index.me
+            tasks = sync.index.query_tasks(
+                project=project_id,
+                section=args.get("section"),
+                assignees={assignee} if assignee else None,
+                completed=False if "completed" in args and not args["completed"] else None
+            )
+            result = self._index_result("tasks", tasks, params["opt_fields"], args.get("max_items") or params["limit"])
+            result["count"] = len(result["tasks"])
+            return result
+        
+        tasks = await self._api_list("/tasks", params, args)
+        return {"success": True, "count": len(tasks), "tasks": tasks}
     
     async def _get_task(self, args: Dict) -> Dict:
-        result = await self._api_get(f"/tasks/{args['task_id']}")
+        result = await self._api_get_cached(f"/tasks/{args['task_id']}")
         return {"success": True, "task": result.get("data")}
     
-    async def _create_task(self, args: Dict) -> Dict:
+    def _create_task_data(self, args: Dict) -> Dict:
         data = {"name": args["name"]}
         
         if args.get("notes"):
@@ -474,12 +726,9 @@ class AsanaBackend:
             data["projects"] = [args["project_id"]]
         if args.get("section_id"):
             data["memberships"] = [{"project": args.get("project_id"), "section": args["section_id"]}]
-        
-        result = await self._api_post("/tasks", data)
-        return {"success": True, "task": result.get("data")}
+        return data
     
-    async def _update_task(self, args: Dict) -> Dict:
-        task_id = args.pop("task_id")
+    def _update_task_data(self, args: Dict) -> Dict:
         data = {}
         
         if args.get("name"):
@@ -494,8 +743,15 @@ class AsanaBackend:
             data["due_at"] = args["due_at"]
         if "completed" in args:
             data["completed"] = args["completed"]
-        
-        result = await self._api_put(f"/tasks/{task_id}", data)
+        return data
+    
+    async def _create_task(self, args: Dict) -> Dict:
+        result = await self._api_post("/tasks", self._create_task_data(args))
+        return {"success": True, "task": result.get("data")}
+    
+    async def _update_task(self, args: Dict) -> Dict:
+        task_id = args["task_id"]
+        result = await self._api_put(f"/tasks/{task_id}", self._update_task_data(args))
         return {"success": True, "task": result.get("data")}
     
     async def _complete_task(self, args: Dict) -> Dict:
@@ -514,7 +770,7 @@ class AsanaBackend:
         return {"success": True}
     
     async def _list_sections(self, args: Dict) -> Dict:
-        result = await self._api_get(f"/projects/{args['project_id']}/sections")
+        result = await self._api_get_cached(f"/projects/{args['project_id']}/sections")
         return {"success": True, "sections": result.get("data", [])}
     
     async def _create_section(self, args: Dict) -> Dict:
@@ -527,6 +783,94 @@ class AsanaBackend:
         await self._api_post(f"/sections/{args['section_id']}/addTask", data)
         return {"success": True}
     
+    async def _run_batch(self, actions: List[Dict]) -> Dict:
+        """
+        Send actions through /batch in chunks of ASANA_BATCH_SIZE, chunks in parallel under
+        the scheduler. Returns per-item results in input order.
+        """
+        starts = range(0, len(actions), ASANA_BATCH_SIZE)
+        sent = 0
+        
+        def failure(message: str) -> Dict:
+            return {"status_code": None, "body": {"errors": [{"message": message}]}}
+        
+        async def send_chunk(start: int) -> List[tuple]:
+            """(action index, response item) for every action in the chunk starting at start"""
+            nonlocal sent
+            chunk = actions[start:start + ASANA_BATCH_SIZE]
+            indices = range(start, start + len(chunk))
+            try:
+                # Each action counts against Asana's rate limit, not the batch request
+                resp = await self._request("POST", "/batch", json={"data": {"actions": chunk}}, cost=len(chunk))
+                items = resp.json().get("data", [])
+            except Exception as e:
+                return [(index, failure(str(e))) for index in indices]
+            finally:
+                sent += len(chunk)
+                report_progress(sent, len(actions), f"Sent {sent} of {len(actions)} actions")
+            if not isinstance(items, list) or len(items) != len(chunk):
+                # Results can't be matched to actions; some of them may still have been applied
+                count = len(items) if isinstance(items, list) else 0
+                logger.error(f"Asana /batch returned {count} results for {len(chunk)} actions "
+                             f"(actions {start}-{start + len(chunk) - 1})")
+                message = f"Batch response had {count} results for {len(chunk)} actions; outcome unknown"
+                return [(index, failure(message)) for index in indices]
+            return list(zip(indices, items))
+        
+        chunk_results = await asyncio.gather(*[send_chunk(start) for start in starts])
+        
+        results = []
+        for index, item in (pair for chunk in chunk_results for pair in chunk):
+            status_code = item.get("status_code") if isinstance(item, dict) else None
+            body = (item.get("body") if isinstance(item, dict) else None) or {}
+            ok = status_code is not None and 200 <= status_code < 300
+            entry = {"index": index, "success": ok, "status_code": status_code}
+            if ok:
+                entry["data"] = body.get("data")
+            else:
+                entry["error"] = "; ".join(e.get("message", "") for e in body.get("errors", [])) or "Unknown error"
+            results.append(entry)
+        
+        failed = sum(1 for r in results if not r["success"])
+        return {
+            "success": failed == 0,
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
+    
+    async def _batch_create_tasks(self, args: Dict) -> Dict:
+        actions = [
+            {"method": "post", "relative_path": "/tasks", "data": self._create_task_data(task)}
+            for task in args["tasks"]
+        ]
+        return await self._run_batch(actions)
+    
+    async def _batch_update_tasks(self, args: Dict) -> Dict:
+        actions = [
+            {"method": "put", "relative_path": f"/tasks/{update['task_id']}", "data": self._update_task_data(update)}
+            for update in args["updates"]
+        ]
+        return await self._run_batch(actions)
+    
+    async def _batch_move_tasks_to_section(self, args: Dict) -> Dict:
+        actions = [
+            {"method": "post", "relative_path": f"/sections/{args['section_id']}/addTask", "data": {"task": task_id}}
+            for task_id in args["task_ids"]
+        ]
+        return await self._run_batch(actions)
+    
+    async def _batch_add_tasks_to_project(self, args: Dict) -> Dict:
+        data = {"project": args["project_id"]}
+        if args.get("section_id"):
+            data["section"] = args["section_id"]
+        actions = [
+            {"method": "post", "relative_path": f"/tasks/{task_id}/addProject", "data": data}
+            for task_id in args["task_ids"]
+        ]
+        return await self._run_batch(actions)
+    
     async def _get_subtasks(self, args: Dict) -> Dict:
         result = await self._api_get(f"/tasks/{args['task_id']}/subtasks")
         return {"success": True, "subtasks": result.get("data", [])}
@@ -561,20 +905,53 @@ class AsanaBackend:
         if "is_subtask" in args:
             params["is_subtask"] = args["is_subtask"]
         
+        sync = self._fresh_index(args)
+        if sync is not None:
+            def split(value):
+                return {v.strip() for v in value.split(",") if v.strip()} if value else None
+            assignees = split(args.get("assignee"))
+            if assignees and "me" in assignees:
+                assignees = (assignees - {"me"}) | {sync.index.me}
+            projects = split(args.get("projects"))
+            if self._index_covers_search(sync, projects, assignees, args):
+                tasks = sync.index.query_tasks(
+                    assignees=assignees,
+                    projects=projects,
+                    completed=args.get("completed"),
+                    text=args.get("text"),
+                    due_on=args.get("due_on"),
+                    due_before=args.get("due_before"),
+                    due_after=args.get("due_after"),
+                    is_subtask=args.get("is_subtask")
+                )
+                return self._index_result("tasks", tasks, params["opt_fields"], args.get("limit", 25))
+        
         result = await self._api_get(f"/workspaces/{self.workspace_gid}/tasks/search", params)
         return {"success": True, "tasks": result.get("data", [])}
     
+    @staticmethod
+    def _index_covers_search(sync: AsanaSyncWorker, projects, assignees, args: Dict) -> bool:
+        """
+        The index holds synced projects' top-level tasks plus my incomplete tasks; anything
+        wider (unsynced projects, workspace-wide filters, subtasks) needs the search API
+        """
+        if args.get("is_subtask"):
+            return False
+        if projects:
+            return projects <= set(sync.sync_tokens)
+        return assignees == {sync.index.me} and args.get("completed") is False
+    
     async def _list_teams(self, args: Dict) -> Dict:
         params = {"limit": args.get("limit", 100)}
-        result = await self._api_get(f"/workspaces/{self.workspace_gid}/teams", params)
+        result = await self._api_get_cached(f"/workspaces/{self.workspace_gid}/teams", params)
         return {"success": True, "teams": result.get("data", [])}
     
     async def _list_workspace_users(self, args: Dict) -> Dict:
         params = {"limit": args.get("limit", 100)}
-        result = await self._api_get(f"/workspaces/{self.workspace_gid}/users", params)
-        return {"success": True, "users": result.get("data", [])}
+        users = await self._api_list(f"/workspaces/{self.workspace_gid}/users", params, args)
+        return {"success": True, "users": users}
     
     async def _list_tags(self, args: Dict) -> Dict:
         params = {"limit": args.get("limit", 100)}
-        result = await self._api_get(f"/workspaces/{self.workspace_gid}/tags", params)
-        return {"success": True, "tags": result.get("data", [])}
+        tags = await self._api_list(f"/workspaces/{self.workspace_gid}/tags", params, args)
+        return {"success": True, "tags": tags}
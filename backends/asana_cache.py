@@ -0,0 +1,145 @@
+"""
+Asana Entity Cache
+Read-through cache for Asana GETs with per-resource TTLs, a byte-bounded LRU and
+invalidation driven by writes made through the gateway
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+# Seconds an entry stays fresh, by resource type (last collection in the path)
+RESOURCE_TTLS = {
+    "tasks": 30,
+    "stories": 30,
+    "subtasks": 30,
+    "projects": 300,
+    "sections": 300,
+    "users": 3600,
+    "teams": 3600
+}
+DEFAULT_TTL = 60
+
+
+def _segments(path: str):
+    return [s for s in path.split("?", 1)[0].split("/") if s]
+
+
+def resource_type(path: str) -> str:
+    """/tasks/1 -> tasks, /projects/1/sections -> sections"""
+    segments = _segments(path)
+    if not segments:
+        return ""
+    return segments[-2] if len(segments) % 2 == 0 else segments[-1]
+
+
+def resource_tag(path: str) -> Optional[str]:
+    """The entity a path hangs off: /tasks/1/stories -> tasks/1"""
+    segments = _segments(path)
+    if len(segments) < 2:
+        return None
+    return f"{segments[0]}/{segments[1]}"
+
+
+def write_tags(path: str, data: Optional[Dict]) -> Set[str]:
+    """Entities a write may have changed: the path's entity plus any referenced in the body"""
+    tags = set()
+    tag = resource_tag(path)
+    if tag:
+        tags.add(tag)
+    data = data or {}
+    for field, kind in (("task", "tasks"), ("parent", "tasks"), ("project", "projects"),
+                        ("section", "sections")):
+        if isinstance(data.get(field), str):
+            tags.add(f"{kind}/{data[field]}")
+    for project in data.get("projects") or []:
+        if isinstance(project, str):
+            tags.add(f"projects/{project}")
+    for membership in data.get("memberships") or []:
+        if isinstance(membership, dict):
+            if membership.get("project"):
+                tags.add(f"projects/{membership['project']}")
+            if membership.get("section"):
+                tags.add(f"sections/{membership['section']}")
+    return tags
+
+
+class AsanaEntityCache:
+    """LRU of decoded GET responses keyed by (path, params), bounded by response bytes"""
+
+    def __init__(self, max_bytes: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        # key -> (expires_at, size, tag, payload)
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, Optional[str], Any]]" = OrderedDict()
+        self._bytes = 0
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(path: str, params: Optional[Dict]) -> Tuple:
+        return (path, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[3]
+
+    def put(self, key: Tuple, payload: Any, size: int, generation: int):
+        if not self.enabled or generation != self.generation or size > self.max_bytes:
+            return
+        path = key[0]
+        ttl = RESOURCE_TTLS.get(resource_type(path), DEFAULT_TTL)
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + ttl, size, resource_tag(path), payload)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]):
+        tags = set(tags)
+        self.generation += 1
+        stale = [key for key, entry in self._entries.items() if entry[2] in tags]
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+
+    def _drop(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+def cache_from_env() -> AsanaEntityCache:
+    return AsanaEntityCache(
+        max_bytes=int(os.getenv("ASANA_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+        enabled=os.getenv("ASANA_CACHE_ENABLED", "true").lower() == "true"
+    )
@@ -0,0 +1,219 @@
+"""
+Asana Request Scheduler
+Per-token rate limiting: token bucket, in-flight caps, Retry-After handling and retries
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from gateway.metrics import UPSTREAM_LATENCY
+from gateway.shared import get_shared_store
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class TokenBucket:
+    """FIFO token bucket; waiters are served in arrival order"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.blocked_until = 0.0
+
+    def pause_until(self, deadline: float):
+        self.blocked_until = max(self.blocked_until, deadline)
+
+    async def pause(self, seconds: float):
+        self.pause_until(time.monotonic() + seconds)
+
+    async def acquire(self, cost: float = 1):
+        async with self._lock:
+            # A cost above capacity could never be satisfied; let it drain the bucket instead
+            cost = min(cost, self.capacity)
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                wait = await self._take(cost, now)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+    async def _take(self, cost: float, now: float) -> float:
+        """Take cost tokens, or return how long until they'll be there"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= cost:
+            self._tokens -= cost
+            return 0.0
+        return (cost - self._tokens) / self.rate
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    The bucket lives in the shared store, so every worker draws on the one per-token budget
+    Asana enforces. Falls back to this worker's own bucket while the store is unreachable.
+    """
+
+    def __init__(self, rate: float, capacity: float, store, name: str):
+        super().__init__(rate, capacity)
+        self.store = store
+        self.name = name
+
+    async def pause(self, seconds: float):
+        await super().pause(seconds)
+        await self.store.pause(self.name, seconds)
+
+    async def _take(self, cost: float, now: float) -> float:
+        wait = await self.store.take_tokens(self.name, self.rate, self.capacity, cost)
+        if wait is None:
+            return await super()._take(cost, now)
+        return wait
+
+
+class AsanaRequestScheduler:
+    """Admits requests under Asana's rate and concurrency limits and retries throttled calls"""
+
+    def __init__(self, rate_per_minute: float, burst: float, max_reads: int, max_writes: int,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 bucket: Optional[TokenBucket] = None):
+        self.bucket = bucket or TokenBucket(rate_per_minute / 60.0, burst)
+        self._reads = asyncio.Semaphore(max_reads)
+        self._writes = asyncio.Semaphore(max_writes)
+        self.max_reads = max_reads
+        self.max_writes = max_writes
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.queued_reads = 0
+        self.queued_writes = 0
+        self.in_flight = 0
+        self.throttled = 0
+        self.retries = 0
+
+    @asynccontextmanager
+    async def _slot(self, idempotent: bool, cost: int = 1):
+        """Hold an in-flight slot and a rate token for the duration of one HTTP attempt"""
+        if idempotent:
+            self.queued_reads += 1
+        else:
+            self.queued_writes += 1
+        semaphore = self._reads if idempotent else self._writes
+        try:
+            await semaphore.acquire()
+            try:
+                await self.bucket.acquire(cost)
+            except BaseException:
+                semaphore.release()
+                raise
+        finally:
+            if idempotent:
+                self.queued_reads -= 1
+            else:
+                self.queued_writes -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(resp: httpx.Response) -> float:
+        try:
+            return max(0.0, float(resp.headers.get("Retry-After", "")))
+        except ValueError:
+            return 0.0
+
+    async def send(self, method: str, send: Callable[[], Awaitable[httpx.Response]],
+                   cost: int = 1) -> httpx.Response:
+        """
+        Run send() under the limits. 429s are retried for every method (Asana rejected the
+        request unprocessed); 5xx and transport errors are retried only for idempotent methods.
+        cost is the number of rate-limit tokens the request consumes (e.g. batch actions).
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                async with self._slot(idempotent, cost):
+                    started = time.monotonic()
+                    status = "error"
+                    try:
+                        resp = await send()
+                        status = str(resp.status_code)
+                    finally:
+                        UPSTREAM_LATENCY.labels("asana", method.upper(), status).observe(time.monotonic() - started)
+            except httpx.TransportError as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Asana {method} transport error ({e}); retrying in {delay:.2f}s")
+            else:
+                if resp.status_code == 429:
+                    self.throttled += 1
+                    delay = self._retry_after(resp) or self._backoff(attempt)
+                    # Asana's limit is per token: hold back every queued request, not just this one
+                    await self.bucket.pause(delay)
+                    if attempt >= self.max_retries:
+                        return resp
+                    logger.warning(f"Asana rate limited; retrying in {delay:.2f}s")
+                elif resp.status_code >= 500 and idempotent and attempt < self.max_retries:
+                    delay = self._backoff(attempt)
+                    logger.warning(f"Asana {method} returned {resp.status_code}; retrying in {delay:.2f}s")
+                else:
+                    return resp
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict:
+        return {
+            "queued_reads": self.queued_reads,
+            "queued_writes": self.queued_writes,
+            "in_flight": self.in_flight,
+            "max_reads": self.max_reads,
+            "max_writes": self.max_writes,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "paused_for_s": round(max(0.0, self.bucket.blocked_until - time.monotonic()), 3),
+            "shared_bucket": isinstance(self.bucket, SharedTokenBucket)
+        }
+
+
+def scheduler_from_env(token: Optional[str] = None) -> AsanaRequestScheduler:
+    rate_per_minute = float(os.getenv("ASANA_RATE_PER_MINUTE", "1500"))
+    burst = float(os.getenv("ASANA_RATE_BURST", "50"))
+    bucket = None
+    store = get_shared_store()
+    if store is not None:
+        # Keyed by a digest of the token: the limit is per token, and the key shouldn't leak it
+        digest = hashlib.sha256((token or "").encode()).hexdigest()[:16]
+        bucket = SharedTokenBucket(rate_per_minute / 60.0, burst, store, f"asana:bucket:{digest}")
+    return AsanaRequestScheduler(
+        rate_per_minute=rate_per_minute,
+        burst=burst,
+        max_reads=int(os.getenv("ASANA_MAX_CONCURRENT_READS", "50")),
+        max_writes=int(os.getenv("ASANA_MAX_CONCURRENT_WRITES", "15")),
+        max_retries=int(os.getenv("ASANA_MAX_RETRIES", "4")),
+        bucket=bucket
+    )
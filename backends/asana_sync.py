@@ -0,0 +1,372 @@
+"""
+Asana Sync Worker
+Optional background sync of workspace projects, sections, users and tasks into an
+in-memory index, kept fresh incrementally with Events API sync tokens
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+ASANA_SYNC_ENABLED = os.getenv("ASANA_SYNC_ENABLED", "false").lower() == "true"
+ASANA_SYNC_INTERVAL = float(os.getenv("ASANA_SYNC_INTERVAL", "30"))
+ASANA_SYNC_MAX_STALENESS = float(os.getenv("ASANA_SYNC_MAX_STALENESS", "120"))
+ASANA_SYNC_PROJECT_REFRESH = float(os.getenv("ASANA_SYNC_PROJECT_REFRESH", "900"))
+ASANA_SYNC_CONCURRENCY = int(os.getenv("ASANA_SYNC_CONCURRENCY", "5"))
+# Incremental my-tasks passes re-read this much before the previous pass, to absorb clock skew
+MY_TASKS_OVERLAP = timedelta(seconds=60)
+
+TASK_FIELDS = ("name,notes,completed,due_on,due_at,assignee,projects,tags,parent,"
+               "memberships.project,memberships.section,modified_at")
+
+
+class AsanaTaskIndex:
+    """In-memory copy of the workspace's tasks, projects, sections and users"""
+
+    def __init__(self):
+        self.tasks: Dict[str, Dict] = {}
+        self.projects: Dict[str, Dict] = {}
+        self.sections: Dict[str, List[Dict]] = {}
+        self.users: Dict[str, Dict] = {}
+        self.project_tasks: Dict[str, Set[str]] = {}
+        self.my_tasks: Set[str] = set()
+        self.me: Optional[str] = None
+
+    def upsert_task(self, task: Dict):
+        gid = task["gid"]
+        self.remove_task(gid, keep_mine=True)
+        self.tasks[gid] = task
+        for project in task.get("projects") or []:
+            self.project_tasks.setdefault(project["gid"], set()).add(gid)
+        if self.me is not None and "assignee" in task:
+            # Project events refetch tasks too: keep my_tasks in step with what they show
+            if (task["assignee"] or {}).get("gid") == self.me and not task.get("completed"):
+                self.my_tasks.add(gid)
+            else:
+                self.my_tasks.discard(gid)
+
+    def remove_task(self, gid: str, keep_mine: bool = False):
+        task = self.tasks.pop(gid, None)
+        if task is not None:
+            for project in task.get("projects") or []:
+                self.project_tasks.get(project["gid"], set()).discard(gid)
+        if not keep_mine:
+            self.my_tasks.discard(gid)
+
+    def replace_project_tasks(self, project_gid: str, tasks: List[Dict]):
+        for gid in list(self.project_tasks.get(project_gid, ())):
+            self.remove_task(gid, keep_mine=True)
+        self.project_tasks[project_gid] = set()
+        for task in tasks:
+            self.upsert_task(task)
+
+    def section_project(self, section_gid: str) -> Optional[str]:
+        """The project a section belongs to, if that project's sections are indexed"""
+        for project_gid, sections in self.sections.items():
+            if any(section.get("gid") == section_gid for section in sections):
+                return project_gid
+        return None
+
+    def query_tasks(self, project: str = None, section: str = None, assignees: Set[str] = None,
+                    projects: Set[str] = None, completed: Optional[bool] = None,
+                    text: str = None, due_on: str = None, due_before: str = None,
+                    due_after: str = None, is_subtask: Optional[bool] = None) -> List[Dict]:
+        if project is not None:
+            candidates = (self.tasks[g] for g in self.project_tasks.get(project, ()) if g in self.tasks)
+        else:
+            candidates = self.tasks.values()
+        text = text.lower() if text else None
+
+        matches = []
+        for task in candidates:
+            if completed is not None and bool(task.get("completed")) != completed:
+                continue
+            if section and not any((m.get("section") or {}).get("gid") == section
+                                   for m in task.get("memberships") or []):
+                continue
+            if assignees is not None and (task.get("assignee") or {}).get("gid") not in assignees:
+                continue
+            if projects and not any(p["gid"] in projects for p in task.get("projects") or []):
+                continue
+            if is_subtask is not None and bool(task.get("parent")) != is_subtask:
+                continue
+            due = task.get("due_on")
+            if due_on and due != due_on:
+                continue
+            if due_before and not (due and due < due_before):
+                continue
+            if due_after and not (due and due > due_after):
+                continue
+            if text and text not in (task.get("name") or "").lower() \
+                    and text not in (task.get("notes") or "").lower():
+                continue
+            matches.append(task)
+        return matches
+
+    def stats(self) -> Dict:
+        return {
+            "tasks": len(self.tasks),
+            "projects": len(self.projects),
+            "users": len(self.users),
+            "my_tasks": len(self.my_tasks)
+        }
+
+
+def project_fields(task: Dict, opt_fields: str) -> Dict:
+    """Trim an indexed task down to what the equivalent live call would have returned"""
+    result = {"gid": task["gid"], "resource_type": "task"}
+    for field in opt_fields.split(","):
+        if field in task:
+            result[field] = task[field]
+    return result
+
+
+class AsanaSyncWorker:
+    """Seeds the index, then polls the Events API per project to keep it current"""
+
+    def __init__(self, backend, interval: float = ASANA_SYNC_INTERVAL,
+                 max_staleness: float = ASANA_SYNC_MAX_STALENESS):
+        self.backend = backend
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.index = AsanaTaskIndex()
+        self.sync_tokens: Dict[str, str] = {}
+        self.synced_at: Optional[float] = None
+        self.dirty_at = 0.0
+        self.projects_refreshed_at = 0.0
+        # Start of the last my-tasks pass (UTC), for the next pass's modified_since
+        self.my_tasks_since: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+        self.cycles = 0
+        self.events_applied = 0
+        self.reseeds = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="asana-sync")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def mark_dirty(self):
+        """A write went through the gateway: don't answer from the index until re-synced"""
+        self.dirty_at = time.monotonic()
+        self._wake.set()
+
+    def fresh(self, max_staleness: Optional[float] = None) -> bool:
+        if self.synced_at is None or self.synced_at <= self.dirty_at:
+            return False
+        limit = self.max_staleness if max_staleness is None else max_staleness
+        return time.monotonic() - self.synced_at <= limit
+
+    def age(self) -> Optional[float]:
+        return None if self.synced_at is None else round(time.monotonic() - self.synced_at, 3)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Asana sync cycle failed: {e}")
+            self._wake.clear()
+            # asyncio.wait rather than wait_for: the latter can swallow a cancel that races the wake-up
+            waiter = asyncio.ensure_future(self._wake.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=self.interval)
+            finally:
+                waiter.cancel()
+
+    async def sync_once(self):
+        """One full cycle; synced_at is the cycle start so writes during it keep the index dirty"""
+        started = time.monotonic()
+        refresh = not self.index.projects or started - self.projects_refreshed_at > ASANA_SYNC_PROJECT_REFRESH
+        if refresh:
+            await self._refresh_workspace()
+            self.projects_refreshed_at = started
+
+        semaphore = asyncio.Semaphore(ASANA_SYNC_CONCURRENCY)
+
+        async def sync(project_gid):
+            async with semaphore:
+                await self._sync_project(project_gid)
+
+        await asyncio.gather(*[sync(gid) for gid in list(self.index.projects)])
+        await self._refresh_my_tasks(full=refresh or self.my_tasks_since is None)
+        self.synced_at = started
+        self.cycles += 1
+
+    async def _refresh_workspace(self):
+        backend = self.backend
+        workspace = backend.workspace_gid
+        me = await backend._api_get("/users/me", {"opt_fields": "gid,name,email"})
+        self.index.me = (me.get("data") or {}).get("gid")
+
+        users = {}
+        async with aclosing(backend._iter_pages(f"/workspaces/{workspace}/users", {"opt_fields": "name,email"})) as pages:
+            async for page in pages:
+                for user in page:
+                    users[user["gid"]] = user
+        self.index.users = users
+
+        projects = {}
+        params = {"workspace": workspace, "archived": False, "opt_fields": "name,notes,due_date,owner,public"}
+        async with aclosing(backend._iter_pages("/projects", params)) as pages:
+            async for page in pages:
+                for project in page:
+                    projects[project["gid"]] = project
+        for gone in set(self.index.projects) - set(projects):
+            self.index.replace_project_tasks(gone, [])
+            self.index.sections.pop(gone, None)
+            self.sync_tokens.pop(gone, None)
+        self.index.projects = projects
+
+    async def _seed_project(self, project_gid: str):
+        """Take a sync token first so nothing that happens during the listing is missed"""
+        self.sync_tokens[project_gid] = await self._initial_sync_token(project_gid)
+        tasks = []
+        params = {"project": project_gid, "opt_fields": TASK_FIELDS}
+        async with aclosing(self.backend._iter_pages("/tasks", params)) as pages:
+            async for page in pages:
+                tasks.extend(page)
+        self.index.replace_project_tasks(project_gid, tasks)
+        await self._refresh_sections(project_gid)
+
+    async def _initial_sync_token(self, project_gid: str) -> str:
+        try:
+            result = await self.backend._api_get("/events", {"resource": project_gid})
+            return result.get("sync")
+        except httpx.HTTPStatusError as e:
+            # Asana answers a token-less request with 412 and a fresh sync token
+            if e.response.status_code == 412:
+                return e.response.json().get("sync")
+            raise
+
+    async def _refresh_sections(self, project_gid: str):
+        result = await self.backend._api_get(f"/projects/{project_gid}/sections")
+        self.index.sections[project_gid] = result.get("data", [])
+
+    async def _sync_project(self, project_gid: str):
+        token = self.sync_tokens.get(project_gid)
+        if token is None:
+            await self._seed_project(project_gid)
+            return
+
+        changed: Set[str] = set()
+        deleted: Set[str] = set()
+        sections_changed = False
+        while True:
+            try:
+                result = await self.backend._api_get("/events", {"resource": project_gid, "sync": token})
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 412:
+                    # Token expired (or project recreated): fall back to a full reseed
+                    self.reseeds += 1
+                    await self._seed_project(project_gid)
+                    return
+                if e.response.status_code in (403, 404):
+                    self.index.replace_project_tasks(project_gid, [])
+                    self.index.projects.pop(project_gid, None)
+                    self.sync_tokens.pop(project_gid, None)
+                    return
+                raise
+            for event in result.get("data", []):
+                resource = event.get("resource") or {}
+                kind = resource.get("resource_type")
+                if kind == "task":
+                    if event.get("action") == "deleted":
+                        deleted.add(resource["gid"])
+                    else:
+                        changed.add(resource["gid"])
+                elif kind == "section":
+                    sections_changed = True
+                self.events_applied += 1
+            token = result.get("sync", token)
+            if not result.get("has_more"):
+                break
+
+        for gid in deleted:
+            self.index.remove_task(gid)
+        await asyncio.gather(*[self._refetch_task(gid) for gid in changed - deleted])
+        if sections_changed:
+            await self._refresh_sections(project_gid)
+        self.sync_tokens[project_gid] = token
+
+    async def _refetch_task(self, gid: str):
+        try:
+            result = await self.backend._api_get(f"/tasks/{gid}", {"opt_fields": TASK_FIELDS})
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                self.index.remove_task(gid)
+                return
+            raise
+        self.index.upsert_task(result["data"])
+
+    async def _refresh_my_tasks(self, full: bool):
+        """
+        My-tasks can include tasks outside any project, which project events never cover. A
+        full listing runs with each workspace refresh; in between, only tasks modified since
+        the last pass are listed, which includes ones just completed. A task reassigned away
+        from me outside synced projects is only noticed by the next full listing.
+        """
+        since = datetime.now(timezone.utc)
+        params = {
+            "workspace": self.backend.workspace_gid,
+            "assignee": "me",
+            "opt_fields": TASK_FIELDS
+        }
+        if full:
+            params["completed_since"] = "now"
+        else:
+            params["modified_since"] = (self.my_tasks_since - MY_TASKS_OVERLAP).isoformat()
+        listed = set()
+        async with aclosing(self.backend._iter_pages("/tasks", params)) as pages:
+            async for page in pages:
+                for task in page:
+                    self.index.upsert_task(task)
+                    listed.add(task["gid"])
+        if full:
+            dropped = self.index.my_tasks - listed
+        else:
+            dropped = {gid for gid in listed if gid not in self.index.my_tasks}
+        for gid in dropped:
+            self.index.my_tasks.discard(gid)
+            if not self._in_synced_project(gid):
+                # Nothing else keeps it current: don't let searches serve it
+                self.index.remove_task(gid)
+        self.my_tasks_since = since
+
+    def _in_synced_project(self, gid: str) -> bool:
+        task = self.index.tasks.get(gid) or {}
+        return any(project["gid"] in self.sync_tokens for project in task.get("projects") or [])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "fresh": self.fresh(),
+            "age_seconds": self.age(),
+            "cycles": self.cycles,
+            "events_applied": self.events_applied,
+            "reseeds": self.reseeds,
+            "last_error": self.last_error,
+            **self.index.stats()
+        }
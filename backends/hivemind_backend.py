@@ -10,8 +10,17 @@ import logging
 from datetime import datetime
 from typing import Any, Dict, List
 
+from backends.hivemind_buffer import (ACK_MODES, HIVEMIND_BUFFER_ENABLED, HIVEMIND_WRITE_ACK,
+                                     HiveMindWriteBuffer, insert_sql)
+from backends.hivemind_search import (FILTER_FIELDS, HIVEMIND_SEARCH_ENABLED, SEARCH_MODES,
+                                     HiveMindSearchIndex, fts5_available)
+from backends.hivemind_tail import HIVEMIND_TAIL_ENABLED, SELECT_COLUMNS, HiveMindTail
+from gateway.shared import get_shared_store
+
 logger = logging.getLogger(__name__)
 
+HIVE_MIND_TABLE = "SOVEREIGN_MIND.RAW.HIVE_MIND"
+
 
 class HiveMindBackend:
     """HiveMind shared memory backend"""
@@ -20,13 +29,59 @@ class HiveMindBackend:
         self.name = "hivemind"
         # Uses Snowflake connection from snowflake_backend
         self.snowflake = None
+        self.buffer = HiveMindWriteBuffer(self._execute, HIVE_MIND_TABLE) if HIVEMIND_BUFFER_ENABLED else None
+        self.tail = HiveMindTail(self._execute, HIVE_MIND_TABLE) if HIVEMIND_TAIL_ENABLED else None
+        self.search = None
+        if HIVEMIND_SEARCH_ENABLED:
+            if fts5_available():
+                self.search = HiveMindSearchIndex(self._execute, HIVE_MIND_TABLE)
+            else:
+                logger.warning("SQLite here lacks FTS5; hivemind_search disabled")
+        self.shared = get_shared_store()
+        if self.shared is not None and (self.tail is not None or self.search is not None):
+            # Each worker keeps its own tail and index; share writes so reads see them on any worker
+            self.shared.subscribe("hivemind.pending", self._add_pending)
+    
+    async def start(self):
+        if self.buffer is not None:
+            self.buffer.start()
+        if self.tail is not None:
+            self.tail.start()
+        if self.search is not None:
+            self.search.start()
+    
+    async def aclose(self):
+        if self.search is not None:
+            await self.search.stop()
+        if self.tail is not None:
+            await self.tail.stop()
+        if self.buffer is not None:
+            await self.buffer.stop()
+    
+    async def _execute(self, sql: str, params: List) -> Dict:
+        if self.snowflake is None:
+            raise RuntimeError("Snowflake backend unavailable")
+        return await self.snowflake.execute(sql, params)
+    
+    async def health_check(self):
+        """HiveMind is only as healthy as the Snowflake backend it runs through"""
+        if self.snowflake is None:
+            raise RuntimeError("Snowflake backend unavailable")
+        await self.snowflake.health_check()
+    
+    def get_metrics(self) -> Dict:
+        return {
+            "write_buffer": self.buffer.stats() if self.buffer is not None else None,
+            "tail": self.tail.stats() if self.tail is not None else None,
+            "search": self.search.stats() if self.search is not None else None
+        }
     
     def set_snowflake(self, snowflake_backend):
         """Set reference to snowflake backend"""
         self.snowflake = snowflake_backend
     
     def get_tools(self) -> List[Dict]:
-        return [
+        tools = [
             {
                 "name": "read",
                 "description": "[GATEWAY] Read recent entries from the Sovereign Mind Hive Mind",
@@ -36,7 +91,8 @@ class HiveMindBackend:
                         "limit": {"type": "integer", "default": 10, "maximum": 50},
                         "workstream": {"type": "string"},
                         "category": {"type": "string"},
-                        "source": {"type": "string"}
+                        "source": {"type": "string"},
+                        "max_staleness_seconds": {"type": "number", "description": "Oldest in-memory tail to answer from; 0 always queries Snowflake"}
                     },
                     "required": []
                 }
@@ -53,68 +109,148 @@ class HiveMindBackend:
                         "summary": {"type": "string", "description": "Clear summary", "maxLength": 2000},
                         "details": {"type": "object", "description": "JSON details object"},
                         "priority": {"type": "string", "enum": ["HIGH", "MEDIUM", "LOW"], "default": "MEDIUM"},
-                        "tags": {"type": "array", "items": {"type": "string"}}
+                        "tags": {"type": "array", "items": {"type": "string"}},
+                        "ack": {"type": "string", "enum": list(ACK_MODES), "default": HIVEMIND_WRITE_ACK,
+                                "description": "flushed: return once committed; buffered: return once queued"}
                     },
                     "required": ["source", "category", "summary"]
                 }
             }
         ]
+        if self.search is not None:
+            tools.append(self._search_tool())
+        return tools
+    
+    def _search_tool(self) -> Dict:
+        return {
+            "name": "search",
+            "description": "[GATEWAY] Keyword search over Hive Mind summaries, details and tags, best matches first",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Keywords; a trailing * matches a prefix"},
+                    "mode": {"type": "string", "enum": list(SEARCH_MODES), "default": "all",
+                             "description": "all: every term must match; any: at least one; raw: FTS5 query syntax"},
+                    "workstream": {"type": "string"},
+                    "category": {"type": "string"},
+                    "source": {"type": "string"},
+                    "priority": {"type": "string", "enum": ["HIGH", "MEDIUM", "LOW"]},
+                    "since": {"type": "string", "description": "Only entries created at or after this ISO timestamp"},
+                    "until": {"type": "string", "description": "Only entries created before this ISO timestamp"},
+                    "limit": {"type": "integer", "default": 10, "maximum": 50},
+                    "offset": {"type": "integer", "default": 0, "description": "Pass next_offset from the previous page"}
+                },
+                "required": ["query"]
+            }
+        }
     
     async def call_tool(self, tool_name: str, arguments: Dict) -> Any:
         if tool_name == "read":
             return await self._read(arguments)
         elif tool_name == "write":
             return await self._write(arguments)
+        elif tool_name == "search" and self.search is not None:
+            return await self._search(arguments)
         return {"error": f"Unknown tool: {tool_name}"}
     
     async def _read(self, args: Dict) -> Dict:
         """Read from Hive Mind"""
-        limit = min(args.get("limit", 10), 50)
+        if self.snowflake is None:
+            return {"success": False, "error": "Snowflake backend unavailable"}
+        limit = max(1, min(int(args.get("limit", 10)), 50))
+        
+        if self.tail is not None and self.tail.fresh(args.get("max_staleness_seconds")):
+            filters = {field.upper(): args.get(field) for field in ("workstream", "category", "source")}
+            entries = self.tail.query(limit, filters)
+            if entries is not None:
+                return {"success": True, "entries": entries, "count": len(entries), "cached": True}
         
         conditions = ["1=1"]
-        if args.get("workstream"):
-            conditions.append(f"WORKSTREAM = '{args['workstream']}'")
-        if args.get("category"):
-            conditions.append(f"CATEGORY = '{args['category']}'")
-        if args.get("source"):
-            conditions.append(f"SOURCE = '{args['source']}'")
+        params = []
+        for field in ("workstream", "category", "source"):
+            if args.get(field):
+                conditions.append(f"{field.upper()} = ?")
+                params.append(args[field])
         
         where_clause = " AND ".join(conditions)
         
+        # limit is a validated int; only user-supplied values go through binds
         sql = f"""
-        SELECT ID, CREATED_AT, SOURCE, CATEGORY, WORKSTREAM, SUMMARY, PRIORITY, STATUS
-        FROM SOVEREIGN_MIND.RAW.HIVE_MIND
+        SELECT {SELECT_COLUMNS}
+        FROM {HIVE_MIND_TABLE}
         WHERE {where_clause}
         ORDER BY CREATED_AT DESC
         LIMIT {limit}
         """
         
-        # This would use the snowflake backend
-        return {"sql": sql, "note": "Execute via snowflake backend"}
+        try:
+            result = await self.snowflake.execute(sql, params)
+        except Exception as e:
+            logger.error(f"HiveMind read error: {e}")
+            return {"success": False, "error": str(e)}
+        return {"success": True, "entries": result["rows"], "count": result["row_count"]}
     
     async def _write(self, args: Dict) -> Dict:
         """Write to Hive Mind"""
-        source = args.get("source", "UNKNOWN")
-        category = args.get("category", "GENERAL")
-        workstream = args.get("workstream", "GENERAL")
-        summary = args.get("summary", "").replace("'", "''")
-        details = json.dumps(args.get("details", {})).replace("'", "''")
-        priority = args.get("priority", "MEDIUM")
-        tags = args.get("tags", [])
-        tags_sql = f"ARRAY_CONSTRUCT({','.join([repr(t) for t in tags])})" if tags else "NULL"
+        if self.snowflake is None:
+            return {"success": False, "error": "Snowflake backend unavailable"}
+        tags = args.get("tags") or []
+        params = [
+            args.get("source", "UNKNOWN"),
+            args.get("category", "GENERAL"),
+            args.get("workstream", "GENERAL"),
+            args.get("summary", ""),
+            json.dumps(args.get("details", {})),
+            args.get("priority", "MEDIUM"),
+            json.dumps(tags) if tags else None
+        ]
         
-        sql = f"""
-        INSERT INTO SOVEREIGN_MIND.RAW.HIVE_MIND 
-        (SOURCE, CATEGORY, WORKSTREAM, SUMMARY, DETAILS, PRIORITY, TAGS)
-        VALUES (
-            '{source}',
-            '{category}',
-            '{workstream}',
-            '{summary}',
-            PARSE_JSON('{details}'),
-            '{priority}',
-            {tags_sql}
-        )
-        """
+        try:
+            if self.buffer is not None:
+                response = await self.buffer.submit(params, args.get("ack", HIVEMIND_WRITE_ACK))
+            else:
+                result = await self._execute(insert_sql(HIVE_MIND_TABLE, 1), params)
+                response = {"success": True, "rows_inserted": result.get("rows_affected", 1)}
+        except Exception as e:
+            logger.error(f"HiveMind write error: {e}")
+            return {"success": False, "error": str(e)}
         
-        return {"sql": sql, "note": "Execute via snowflake backend"}
+        created_at = datetime.utcnow().isoformat()
+        await self._add_pending([created_at] + params)
+        if self.shared is not None:
+            self.shared.publish_nowait("hivemind.pending", [created_at] + params)
+        return response
+    
+    async def _add_pending(self, values: List):
+        """Make a write visible to reads and search here before the tail refresh picks it up"""
+        created_at, source, category, workstream, summary, details, priority, tags = values
+        if self.tail is not None:
+            self.tail.add_pending({
+                "ID": None,
+                "CREATED_AT": created_at,
+                "SOURCE": source,
+                "CATEGORY": category,
+                "WORKSTREAM": workstream,
+                "SUMMARY": summary,
+                "PRIORITY": priority,
+                "STATUS": None
+            })
+        if self.search is not None:
+            await self.search.add_pending({
+                "CREATED_AT": created_at,
+                "SOURCE": source,
+                "CATEGORY": category,
+                "WORKSTREAM": workstream,
+                "SUMMARY": summary,
+                "DETAILS": details,
+                "PRIORITY": priority,
+                "TAGS": tags
+            })
+    
+    async def _search(self, args: Dict) -> Dict:
+        """Ranked keyword search over the local index"""
+        limit = max(1, min(int(args.get("limit", 10)), 50))
+        offset = max(0, int(args.get("offset", 0)))
+        filters = {field: args.get(field) for field in FILTER_FIELDS}
+        return await self.search.search(args.get("query", ""), args.get("mode", "all"), filters,
+                                        args.get("since"), args.get("until"), limit, offset)
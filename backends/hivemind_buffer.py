@@ -0,0 +1,357 @@
+"""
+HiveMind Write Buffer
+Write-behind batching for hivemind_write: entries are queued in memory (and mirrored to a
+bounded spill file) and flushed to Snowflake as one multi-row INSERT
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from gateway.slots import FileSlot, claim_slot, orphaned_slots
+
+logger = logging.getLogger(__name__)
+
+HIVEMIND_BUFFER_ENABLED = os.getenv("HIVEMIND_BUFFER_ENABLED", "true").lower() == "true"
+HIVEMIND_FLUSH_ROWS = int(os.getenv("HIVEMIND_FLUSH_ROWS", "100"))
+HIVEMIND_FLUSH_BYTES = int(os.getenv("HIVEMIND_FLUSH_BYTES", str(256 * 1024)))
+# How long an entry may linger for more to join its batch. At 0 the buffer flushes as soon
+# as the flusher is idle: entries arriving while a flush is in flight form the next batch.
+HIVEMIND_FLUSH_MS = float(os.getenv("HIVEMIND_FLUSH_MS", "0"))
+# "flushed" waits for the INSERT to commit; "buffered" returns once the entry is queued
+HIVEMIND_WRITE_ACK = os.getenv("HIVEMIND_WRITE_ACK", "flushed")
+# Base path: each worker spills to its own numbered slot next to it (hivemind-write-buffer.0.jsonl, ...)
+HIVEMIND_SPILL_PATH = os.getenv("HIVEMIND_SPILL_PATH",
+                                os.path.join(tempfile.gettempdir(), "hivemind-write-buffer.jsonl"))
+HIVEMIND_SPILL_MAX_BYTES = int(os.getenv("HIVEMIND_SPILL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+ACK_MODES = ("flushed", "buffered")
+COLUMNS = ("SOURCE", "CATEGORY", "WORKSTREAM", "SUMMARY", "DETAILS", "PRIORITY", "TAGS")
+# Snowflake doesn't allow PARSE_JSON inside VALUES, so each row is a bound SELECT
+ROW_SELECT = "SELECT ?, ?, ?, ?, PARSE_JSON(?), ?, PARSE_JSON(?)::ARRAY"
+RETRY_DELAY_MIN = 0.5
+RETRY_DELAY_MAX = 30.0
+
+
+def insert_sql(table: str, rows: int) -> str:
+    """One INSERT covering `rows` entries: a single round trip regardless of batch size"""
+    selects = "\nUNION ALL ".join([ROW_SELECT] * rows)
+    return f"INSERT INTO {table} ({', '.join(COLUMNS)})\n{selects}"
+
+
+class _Entry:
+    __slots__ = ("params", "size", "future")
+
+    def __init__(self, params: List, future: Optional[asyncio.Future] = None):
+        self.params = params
+        self.size = len(json.dumps(params))
+        self.future = future
+
+
+class HiveMindWriteBuffer:
+    """Queues entries and flushes them when the row, byte or age threshold is reached"""
+
+    def __init__(self, execute: Callable[..., Awaitable[Dict]], table: str,
+                 max_rows: int = HIVEMIND_FLUSH_ROWS, max_bytes: int = HIVEMIND_FLUSH_BYTES,
+                 max_delay_ms: float = HIVEMIND_FLUSH_MS, spill_path: Optional[str] = HIVEMIND_SPILL_PATH,
+                 spill_max_bytes: int = HIVEMIND_SPILL_MAX_BYTES):
+        self.execute = execute
+        self.table = table
+        self.max_rows = max(1, max_rows)
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay_ms / 1000.0
+        self.spill_base = spill_path or None
+        # This worker's own spill file, claimed in start()
+        self.spill_path: Optional[str] = None
+        self._slot: Optional[FileSlot] = None
+        self.spill_max_bytes = spill_max_bytes
+        self._pending: Deque[_Entry] = deque()
+        self._pending_bytes = 0
+        self._spill_bytes = 0
+        self._oldest: Optional[float] = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        # Serializes appends with rewrites so no append lands in a file about to be replaced
+        self._spill_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
+
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.flush_errors = 0
+        self.spill_overflows = 0
+        self.recovered = 0
+        self.last_flush_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._claim_spill()
+            self._recover()
+            self._task = asyncio.create_task(self._run(), name="hivemind-write-buffer")
+
+    async def stop(self):
+        """Flush whatever is queued; anything that can't be written stays in the spill file"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"HiveMind buffer: {len(self._pending)} entries left unflushed at shutdown: {e}")
+                break
+        if self._slot is not None:
+            # Whatever is still spilled goes to the next worker to claim the slot
+            self._slot.release()
+            self._slot = None
+
+    async def submit(self, params: List, ack: str = HIVEMIND_WRITE_ACK) -> Dict:
+        """Queue one entry. With ack="flushed" this returns after the batch holding it commits."""
+        wait = ack != "buffered"
+        entry = _Entry(params)
+        if not wait and not await self._spill([entry]):
+            # No room to persist it: don't promise durability we can't give
+            self.spill_overflows += 1
+            wait = True
+        if wait:
+            entry.future = asyncio.get_running_loop().create_future()
+        self._enqueue(entry)
+        if not wait:
+            return {"success": True, "queued": True, "pending": len(self._pending)}
+        await entry.future
+        return {"success": True, "queued": False}
+
+    def _enqueue(self, entry: _Entry):
+        # The first entry starts the age timer, so the flusher needs to re-arm its wait
+        wake = not self._pending
+        if wake:
+            self._oldest = time.monotonic()
+        self._pending.append(entry)
+        self._pending_bytes += entry.size
+        if wake or self._due():
+            self._wake.set()
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        return (len(self._pending) >= self.max_rows
+                or self._pending_bytes >= self.max_bytes
+                or time.monotonic() - self._oldest >= self.max_delay)
+
+    async def _run(self):
+        while True:
+            if self._pending:
+                timeout = max(0.0, self._oldest + self.max_delay - time.monotonic())
+                if self._failures:
+                    backoff = max(self.max_delay, RETRY_DELAY_MIN) * (2 ** self._failures)
+                    timeout = max(timeout, min(RETRY_DELAY_MAX, backoff))
+            else:
+                timeout = None
+            if not self._due() or self._failures:
+                self._wake.clear()
+                waiter = asyncio.ensure_future(self._wake.wait())
+                try:
+                    await asyncio.wait({waiter}, timeout=timeout)
+                finally:
+                    waiter.cancel()
+                if not self._due():
+                    continue
+            try:
+                # Shielded so stop() cancelling the loop never abandons a half-sent batch
+                await asyncio.shield(self.flush())
+                self._failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._failures += 1
+
+    async def flush(self):
+        """Write up to max_rows queued entries (bounded by max_bytes) in one statement"""
+        async with self._flush_lock:
+            batch: List[_Entry] = []
+            size = 0
+            while self._pending and len(batch) < self.max_rows:
+                if batch and size + self._pending[0].size > self.max_bytes:
+                    break
+                entry = self._pending.popleft()
+                batch.append(entry)
+                size += entry.size
+            if not batch:
+                return
+            self._pending_bytes -= size
+
+            params: List[Any] = []
+            for entry in batch:
+                params.extend(entry.params)
+            started = time.perf_counter()
+            try:
+                await self.execute(insert_sql(self.table, len(batch)), params)
+            except BaseException as e:
+                self.flush_errors += 1
+                self.last_error = str(e)
+                # Waiting callers get the error and can retry themselves; fire-and-forget
+                # entries go back to the front of the queue (they're still in the spill file)
+                retained = [entry for entry in batch if entry.future is None]
+                for entry in batch:
+                    if entry.future is not None and not entry.future.done():
+                        entry.future.set_exception(e if isinstance(e, Exception) else RuntimeError(str(e)))
+                self._pending.extendleft(reversed(retained))
+                self._pending_bytes += sum(entry.size for entry in retained)
+                if self._pending:
+                    self._oldest = time.monotonic()
+                if not isinstance(e, asyncio.CancelledError):
+                    logger.error(f"HiveMind buffer flush of {len(batch)} rows failed: {e}")
+                raise
+
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.flushes += 1
+            self.rows_flushed += len(batch)
+            if self._pending:
+                self._oldest = time.monotonic()
+            for entry in batch:
+                if entry.future is not None and not entry.future.done():
+                    entry.future.set_result(None)
+            if any(entry.future is None for entry in batch):
+                await self._rewrite_spill()
+
+    async def _spill(self, entries: List[_Entry]) -> bool:
+        """Append entries to the spill file; False when disabled or over its size bound"""
+        if not self.spill_path:
+            return False
+        lines = "".join(json.dumps(entry.params) + "\n" for entry in entries)
+        data = lines.encode("utf-8")
+        async with self._spill_lock:
+            if self._spill_bytes + len(data) > self.spill_max_bytes:
+                return False
+            try:
+                # fsync can take milliseconds; keep it off the event loop
+                await asyncio.to_thread(_append_file, self.spill_path, data)
+            except OSError as e:
+                logger.error(f"HiveMind spill write failed: {e}")
+                return False
+            self._spill_bytes += len(data)
+            return True
+
+    async def _rewrite_spill(self):
+        """Replace the spill file with the fire-and-forget entries still queued"""
+        if not self.spill_path:
+            return
+        async with self._spill_lock:
+            remaining = [entry for entry in self._pending if entry.future is None]
+            data = "".join(json.dumps(entry.params) + "\n" for entry in remaining).encode("utf-8")
+            try:
+                await asyncio.to_thread(_replace_file, self.spill_path, data)
+            except OSError as e:
+                logger.error(f"HiveMind spill rewrite failed: {e}")
+                return
+            self._spill_bytes = len(data)
+
+    def _claim_spill(self):
+        """Take a spill file no other live worker is using"""
+        if self.spill_base is None or self._slot is not None:
+            return
+        try:
+            self._slot = claim_slot(self.spill_base)
+        except OSError as e:
+            logger.error(f"HiveMind spill disabled, no free slot for {self.spill_base}: {e}")
+            self.spill_path = None
+            return
+        self.spill_path = self._slot.path
+
+    def _recover(self):
+        """
+        Re-queue entries spilled by processes that exited before flushing them: this slot's
+        previous owner, and any slot no live worker holds. Adopted entries are appended to
+        this worker's spill file before the orphan is removed, so a crash in between can
+        replay them twice but never lose them.
+        """
+        if not self.spill_path:
+            return
+        raw = _read_spill(self.spill_path)
+        self._spill_bytes = len(raw)
+        self._requeue(raw)
+        for orphan in orphaned_slots(self.spill_base):
+            try:
+                adopted = _read_spill(orphan.path)
+                if adopted:
+                    # Start on a fresh line in case our own file ends in a torn append
+                    _append_file(self.spill_path, b"\n" + adopted)
+                os.remove(orphan.path)
+            except OSError as e:
+                logger.error(f"HiveMind spill adoption of {orphan.path} failed: {e}")
+                continue
+            finally:
+                orphan.release()
+            if adopted:
+                self._spill_bytes += len(adopted) + 1
+                self._requeue(adopted)
+        if self.recovered:
+            logger.info(f"HiveMind buffer recovered {self.recovered} unflushed entries")
+            self._wake.set()
+
+    def _requeue(self, raw: bytes):
+        for line in raw.decode("utf-8", errors="replace").splitlines():
+            try:
+                params = json.loads(line)
+            except ValueError:
+                # Torn final line from a crash mid-append
+                continue
+            if isinstance(params, list) and len(params) == len(COLUMNS):
+                self._enqueue(_Entry(params))
+                self.recovered += 1
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "pending": len(self._pending),
+            "pending_bytes": self._pending_bytes,
+            "spill_path": self.spill_path,
+            "spill_bytes": self._spill_bytes,
+            "max_rows": self.max_rows,
+            "max_bytes": self.max_bytes,
+            "max_delay_ms": round(self.max_delay * 1000),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "flush_errors": self.flush_errors,
+            "spill_overflows": self.spill_overflows,
+            "recovered": self.recovered,
+            "last_flush_ms": self.last_flush_ms,
+            "last_error": self.last_error
+        }
+
+
+def _read_spill(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return b""
+    except OSError as e:
+        logger.error(f"HiveMind spill read failed: {e}")
+        return b""
+
+
+def _append_file(path: str, data: bytes):
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _replace_file(path: str, data: bytes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,348 @@
+"""
+HiveMind Search Index
+Local SQLite FTS5 index over HiveMind SUMMARY, DETAILS and TAGS, kept current from gateway
+writes and a periodic CREATED_AT delta pull from Snowflake
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from gateway.slots import FileSlot, claim_slot
+
+logger = logging.getLogger(__name__)
+
+HIVEMIND_SEARCH_ENABLED = os.getenv("HIVEMIND_SEARCH_ENABLED", "true").lower() == "true"
+# Base path: each worker indexes into its own numbered slot next to it (hivemind-search.0.db, ...)
+HIVEMIND_SEARCH_PATH = os.getenv("HIVEMIND_SEARCH_PATH",
+                                 os.path.join(tempfile.gettempdir(), "hivemind-search.db"))
+HIVEMIND_SEARCH_REFRESH = float(os.getenv("HIVEMIND_SEARCH_REFRESH", "30"))
+HIVEMIND_SEARCH_PAGE = int(os.getenv("HIVEMIND_SEARCH_PAGE", "5000"))
+# Same role as the tail's overlap: catch rows committed behind the watermark
+HIVEMIND_SEARCH_OVERLAP = int(os.getenv("HIVEMIND_SEARCH_OVERLAP", "60"))
+HIVEMIND_SEARCH_PENDING_TTL = float(os.getenv("HIVEMIND_SEARCH_PENDING_TTL", "600"))
+
+SEARCH_MODES = ("all", "any", "raw")
+SELECT_COLUMNS = "ID, CREATED_AT, SOURCE, CATEGORY, WORKSTREAM, PRIORITY, SUMMARY, DETAILS, TAGS"
+FILTER_FIELDS = ("workstream", "category", "source", "priority")
+# bm25 column weights: summary, details, tags
+RANK = "bm25(hive_fts, 10.0, 1.0, 4.0)"
+TERM_PATTERN = re.compile(r"\w+\*?", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hive (
+    id TEXT UNIQUE,
+    created_at TEXT,
+    source TEXT,
+    category TEXT,
+    workstream TEXT,
+    priority TEXT,
+    summary TEXT,
+    details TEXT,
+    tags TEXT,
+    pending INTEGER NOT NULL DEFAULT 0,
+    added_at REAL
+);
+CREATE INDEX IF NOT EXISTS hive_created ON hive(pending, created_at);
+CREATE INDEX IF NOT EXISTS hive_workstream ON hive(workstream);
+CREATE VIRTUAL TABLE IF NOT EXISTS hive_fts USING fts5(
+    summary, details, tags, content='hive', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS hive_ai AFTER INSERT ON hive BEGIN
+    INSERT INTO hive_fts(rowid, summary, details, tags) VALUES (new.rowid, new.summary, new.details, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS hive_ad AFTER DELETE ON hive BEGIN
+    INSERT INTO hive_fts(hive_fts, rowid, summary, details, tags)
+    VALUES ('delete', old.rowid, old.summary, old.details, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS hive_au AFTER UPDATE ON hive BEGIN
+    INSERT INTO hive_fts(hive_fts, rowid, summary, details, tags)
+    VALUES ('delete', old.rowid, old.summary, old.details, old.tags);
+    INSERT INTO hive_fts(rowid, summary, details, tags) VALUES (new.rowid, new.summary, new.details, new.tags);
+END;
+"""
+
+
+def fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(x)")
+        conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def match_expression(query: str, mode: str) -> str:
+    """Turn free text into an FTS5 query: every term quoted, trailing * kept as a prefix match"""
+    if mode == "raw":
+        return query
+    terms = []
+    for term in TERM_PATTERN.findall(query):
+        prefix = term.endswith("*")
+        word = term.rstrip("*")
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return (" OR " if mode == "any" else " ").join(terms)
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+class HiveMindSearchIndex:
+    """SQLite FTS5 mirror of HIVE_MIND; all SQLite work runs on one dedicated thread"""
+
+    def __init__(self, execute: Callable[..., Awaitable[Dict]], table: str,
+                 path: str = HIVEMIND_SEARCH_PATH, interval: float = HIVEMIND_SEARCH_REFRESH,
+                 page_size: int = HIVEMIND_SEARCH_PAGE):
+        self.execute = execute
+        self.table = table
+        self.path = path
+        self.db_path: Optional[str] = None
+        self._slot: Optional[FileSlot] = None
+        self.interval = interval
+        self.page_size = max(1, page_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hivemind-search")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self.synced_at: Optional[float] = None
+
+        self.searches = 0
+        self.syncs = 0
+        self.rows_pulled = 0
+        self.last_sync_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def _run_db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _claim_path(self) -> str:
+        """This worker's own index file, so no worker sees or clears another's rows"""
+        if self.path == ":memory:":
+            return self.path
+        try:
+            self._slot = claim_slot(self.path)
+        except OSError as e:
+            logger.warning(f"No HiveMind search index slot for {self.path} ({e}); using memory")
+            return ":memory:"
+        return self._slot.path
+
+    def _open(self):
+        if self._conn is None:
+            self.db_path = self._claim_path()
+            try:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.executescript(SCHEMA)
+            except sqlite3.DatabaseError as e:
+                # Unreadable file (e.g. torn by a crash): the index is derived data, so rebuild
+                logger.warning(f"HiveMind search index at {self.db_path} unusable ({e}); using memory")
+                self.db_path = ":memory:"
+                self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+                self._conn.executescript(SCHEMA)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                # Stand-ins left by this slot's previous owner, which has exited: their real
+                # rows arrive with the next pull
+                self._conn.execute("DELETE FROM hive WHERE pending = 1")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="hivemind-search")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await self._run_db(self._conn.close)
+            self._conn = None
+        if self._slot is not None:
+            self._slot.release()
+            self._slot = None
+        self._executor.shutdown(wait=False)
+
+    async def _run(self):
+        await self._run_db(self._open)
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"HiveMind search sync failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def sync_once(self):
+        """Pull rows newer than the watermark in CREATED_AT, ID keyset pages"""
+        started = time.monotonic()
+        watermark = await self._run_db(self._watermark)
+        if watermark is None:
+            sql = f"SELECT {SELECT_COLUMNS} FROM {self.table} ORDER BY CREATED_AT, ID LIMIT {self.page_size}"
+            params: List[Any] = []
+        else:
+            sql = (f"SELECT {SELECT_COLUMNS} FROM {self.table} WHERE CREATED_AT >= DATEADD(second, -?, ?) "
+                   f"ORDER BY CREATED_AT, ID LIMIT {self.page_size}")
+            params = [HIVEMIND_SEARCH_OVERLAP, watermark[0]]
+        while True:
+            result = await self.execute(sql, params)
+            rows = result.get("rows", [])
+            if rows:
+                await self._run_db(self._upsert, rows)
+                self.rows_pulled += len(rows)
+            if len(rows) < self.page_size:
+                break
+            last = rows[-1]
+            sql = (f"SELECT {SELECT_COLUMNS} FROM {self.table} "
+                   f"WHERE CREATED_AT > ? OR (CREATED_AT = ? AND ID > ?) "
+                   f"ORDER BY CREATED_AT, ID LIMIT {self.page_size}")
+            params = [last["CREATED_AT"], last["CREATED_AT"], last["ID"]]
+        await self._run_db(self._expire_pending)
+        self.synced_at = started
+        self.syncs += 1
+        self.last_sync_ms = round((time.monotonic() - started) * 1000, 2)
+
+    def _watermark(self):
+        return self._conn.execute(
+            "SELECT created_at, id FROM hive WHERE pending = 0 ORDER BY created_at DESC, id DESC LIMIT 1"
+        ).fetchone()
+
+    def _upsert(self, rows: List[Dict]):
+        with self._conn:
+            for row in rows:
+                values = (str(row["ID"]), row.get("CREATED_AT"), row.get("SOURCE"), row.get("CATEGORY"),
+                          row.get("WORKSTREAM"), row.get("PRIORITY"), row.get("SUMMARY"),
+                          _text(row.get("DETAILS")), _text(row.get("TAGS")))
+                # The gateway's own write, now seen with its real ID: drop the stand-in
+                self._conn.execute(
+                    "DELETE FROM hive WHERE rowid = (SELECT rowid FROM hive WHERE pending = 1 AND source IS ? "
+                    "AND category IS ? AND workstream IS ? AND summary IS ? LIMIT 1) "
+                    "AND NOT EXISTS (SELECT 1 FROM hive WHERE id = ?)",
+                    (values[2], values[3], values[4], values[6], values[0])
+                )
+                self._conn.execute(
+                    "INSERT INTO hive (id, created_at, source, category, workstream, priority, summary, details, tags) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                    "created_at = excluded.created_at, source = excluded.source, category = excluded.category, "
+                    "workstream = excluded.workstream, priority = excluded.priority, summary = excluded.summary, "
+                    "details = excluded.details, tags = excluded.tags",
+                    values
+                )
+
+    async def add_pending(self, row: Dict):
+        """Index a gateway write right away; the next delta pull swaps in the real row"""
+        if self._conn is None:
+            return
+        await self._run_db(self._insert_pending, row)
+
+    def _insert_pending(self, row: Dict):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO hive (id, created_at, source, category, workstream, priority, summary, details, tags, "
+                "pending, added_at) VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)",
+                (row.get("CREATED_AT"), row.get("SOURCE"), row.get("CATEGORY"), row.get("WORKSTREAM"),
+                 row.get("PRIORITY"), row.get("SUMMARY"), _text(row.get("DETAILS")), _text(row.get("TAGS")),
+                 time.time())
+            )
+
+    def _expire_pending(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM hive WHERE pending = 1 AND added_at < ?",
+                               (time.time() - HIVEMIND_SEARCH_PENDING_TTL,))
+
+    async def search(self, query: str, mode: str = "all", filters: Optional[Dict] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     limit: int = 10, offset: int = 0) -> Dict:
+        if self._conn is None:
+            return {"success": False, "error": "Search index not ready yet"}
+        expression = match_expression(query, mode)
+        if not expression:
+            return {"success": False, "error": "Query has no searchable terms"}
+        self.searches += 1
+        try:
+            return await self._run_db(self._search, expression, filters or {}, since, until, limit, offset)
+        except sqlite3.OperationalError as e:
+            # Only reachable with mode=raw: the caller's FTS5 syntax didn't parse
+            return {"success": False, "error": f"Invalid search query: {e}"}
+
+    def _search(self, expression: str, filters: Dict, since: Optional[str], until: Optional[str],
+                limit: int, offset: int) -> Dict:
+        conditions = ["hive_fts MATCH ?"]
+        params: List[Any] = [expression]
+        for field in FILTER_FIELDS:
+            if filters.get(field):
+                conditions.append(f"h.{field} = ?")
+                params.append(filters[field])
+        if since:
+            conditions.append("h.created_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("h.created_at < ?")
+            params.append(until)
+        sql = (
+            f"SELECT h.id, h.created_at, h.source, h.category, h.workstream, h.priority, h.summary, h.tags, "
+            f"snippet(hive_fts, -1, '[', ']', '...', 16), {RANK} AS score "
+            f"FROM hive_fts JOIN hive h ON h.rowid = hive_fts.rowid "
+            f"WHERE {' AND '.join(conditions)} ORDER BY score LIMIT ? OFFSET ?"
+        )
+        # One extra row tells us whether there's another page
+        rows = self._conn.execute(sql, params + [limit + 1, offset]).fetchall()
+        has_more = len(rows) > limit
+        entries = []
+        for row in rows[:limit]:
+            tags = row[7]
+            try:
+                tags = json.loads(tags) if tags else []
+            except ValueError:
+                pass
+            entries.append({
+                "ID": row[0],
+                "CREATED_AT": row[1],
+                "SOURCE": row[2],
+                "CATEGORY": row[3],
+                "WORKSTREAM": row[4],
+                "PRIORITY": row[5],
+                "SUMMARY": row[6],
+                "TAGS": tags,
+                "SNIPPET": row[8],
+                "SCORE": round(-row[9], 4)
+            })
+        return {
+            "success": True,
+            "entries": entries,
+            "count": len(entries),
+            "offset": offset,
+            "has_more": has_more,
+            "next_offset": offset + limit if has_more else None,
+            "index_age_seconds": self.age()
+        }
+
+    def age(self) -> Optional[float]:
+        return None if self.synced_at is None else round(time.monotonic() - self.synced_at, 3)
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "path": self.db_path,
+            "age_seconds": self.age(),
+            "searches": self.searches,
+            "syncs": self.syncs,
+            "rows_pulled": self.rows_pulled,
+            "last_sync_ms": self.last_sync_ms,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,236 @@
+"""
+HiveMind Tail
+In-memory ring of the most recent HiveMind entries, indexed by workstream, category and
+source, so hivemind_read can be answered without a warehouse round trip
+"""
+
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from heapq import merge
+from itertools import islice
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HIVEMIND_TAIL_ENABLED = os.getenv("HIVEMIND_TAIL_ENABLED", "true").lower() == "true"
+HIVEMIND_TAIL_SIZE = int(os.getenv("HIVEMIND_TAIL_SIZE", "5000"))
+HIVEMIND_TAIL_REFRESH = float(os.getenv("HIVEMIND_TAIL_REFRESH", "15"))
+HIVEMIND_TAIL_MAX_STALENESS = float(os.getenv("HIVEMIND_TAIL_MAX_STALENESS", "60"))
+# Re-read this far behind the watermark so rows committed out of CREATED_AT order aren't missed
+HIVEMIND_TAIL_OVERLAP = int(os.getenv("HIVEMIND_TAIL_OVERLAP", "60"))
+# Gateway writes shown before the refresh picks up their real row; dropped if never matched
+HIVEMIND_TAIL_PENDING_TTL = float(os.getenv("HIVEMIND_TAIL_PENDING_TTL", "600"))
+
+SELECT_COLUMNS = "ID, CREATED_AT, SOURCE, CATEGORY, WORKSTREAM, SUMMARY, PRIORITY, STATUS"
+INDEXED_FIELDS = ("WORKSTREAM", "CATEGORY", "SOURCE")
+
+Key = Tuple[str, str]
+
+
+def _timestamp(value: Any) -> str:
+    """
+    CREATED_AT as naive UTC with microseconds, so values read back from Snowflake (which may
+    carry an offset or fewer fractional digits) and gateway writes (utcnow) order correctly
+    """
+    if not value:
+        return ""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return str(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+def _key(row: Dict) -> Key:
+    return (_timestamp(row.get("CREATED_AT")), str(row.get("ID")))
+
+
+def _identity(row: Dict) -> Tuple:
+    return tuple(row.get(field) for field in ("SOURCE", "CATEGORY", "WORKSTREAM", "SUMMARY"))
+
+
+class HiveMindTail:
+    """Ring of the newest `capacity` rows ordered by CREATED_AT, plus not-yet-seen gateway writes"""
+
+    def __init__(self, execute: Callable[..., Awaitable[Dict]], table: str,
+                 capacity: int = HIVEMIND_TAIL_SIZE, interval: float = HIVEMIND_TAIL_REFRESH,
+                 max_staleness: float = HIVEMIND_TAIL_MAX_STALENESS):
+        self.execute = execute
+        self.table = table
+        self.capacity = max(1, capacity)
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._keys: List[Key] = []
+        self._rows: Dict[Key, Dict] = {}
+        self._by_id: Dict[str, Key] = {}
+        # field -> value -> sorted keys
+        self._index: Dict[str, Dict[Any, List[Key]]] = {field: {} for field in INDEXED_FIELDS}
+        # (added_at, row), oldest first
+        self._pending: List[Tuple[float, Dict]] = []
+        # True once anything older than the ring exists in the table
+        self.truncated = False
+        self.refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.rows_pulled = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="hivemind-tail")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def fresh(self, max_staleness: Optional[float] = None) -> bool:
+        if self.refreshed_at is None:
+            return False
+        limit = self.max_staleness if max_staleness is None else max_staleness
+        return time.monotonic() - self.refreshed_at <= limit
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"HiveMind tail refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Load the newest rows, or everything since the watermark once loaded"""
+        started = time.monotonic()
+        if self.refreshed_at is None or not self._keys:
+            sql = f"SELECT {SELECT_COLUMNS} FROM {self.table} ORDER BY CREATED_AT DESC LIMIT {self.capacity}"
+            params = []
+        else:
+            sql = (f"SELECT {SELECT_COLUMNS} FROM {self.table} "
+                   f"WHERE CREATED_AT >= DATEADD(second, -?, ?) "
+                   f"ORDER BY CREATED_AT DESC LIMIT {self.capacity}")
+            # The newest row's own CREATED_AT, in the form Snowflake returned it
+            params = [HIVEMIND_TAIL_OVERLAP, self._rows[self._keys[-1]].get("CREATED_AT")]
+        result = await self.execute(sql, params)
+        rows = result.get("rows", [])
+        if len(rows) >= self.capacity:
+            # The window alone fills the ring: start over rather than leave a gap behind it
+            self._reset()
+            self.truncated = True
+        for row in reversed(rows):
+            self.add(row)
+        self._expire_pending()
+        self.rows_pulled += len(rows)
+        self.refreshes += 1
+        self.refreshed_at = started
+
+    def _reset(self):
+        self._keys.clear()
+        self._rows.clear()
+        self._by_id.clear()
+        for values in self._index.values():
+            values.clear()
+
+    def add(self, row: Dict):
+        """Insert or replace a row read from the table"""
+        row_id = str(row.get("ID"))
+        existing = self._by_id.get(row_id)
+        if existing is not None:
+            self._remove(existing)
+        else:
+            identity = _identity(row)
+            for i, (_, pending) in enumerate(self._pending):
+                if _identity(pending) == identity:
+                    del self._pending[i]
+                    break
+        key = _key(row)
+        insort(self._keys, key)
+        self._rows[key] = row
+        self._by_id[row_id] = key
+        for field in INDEXED_FIELDS:
+            insort(self._index[field].setdefault(row.get(field), []), key)
+        while len(self._keys) > self.capacity:
+            self._remove(self._keys[0])
+            self.truncated = True
+
+    def add_pending(self, row: Dict):
+        """A write through the gateway: visible immediately, replaced once the refresh sees it"""
+        self._pending.append((time.monotonic(), row))
+
+    def _remove(self, key: Key):
+        row = self._rows.pop(key)
+        del self._keys[bisect_left(self._keys, key)]
+        self._by_id.pop(str(row.get("ID")), None)
+        for field in INDEXED_FIELDS:
+            keys = self._index[field].get(row.get(field))
+            if keys is not None:
+                del keys[bisect_left(keys, key)]
+                if not keys:
+                    del self._index[field][row.get(field)]
+
+    def _expire_pending(self):
+        cutoff = time.monotonic() - HIVEMIND_TAIL_PENDING_TTL
+        self._pending = [(added, row) for added, row in self._pending if added >= cutoff]
+
+    def query(self, limit: int, filters: Dict[str, Any]) -> Optional[List[Dict]]:
+        """Newest `limit` matches, or None when rows older than the ring could be among them"""
+        filters = {field: value for field, value in filters.items() if value}
+
+        def matching(row: Dict) -> bool:
+            return all(row.get(field) == value for field, value in filters.items())
+
+        pending = sorted(((_key(row), row) for _, row in self._pending if matching(row)),
+                         key=lambda item: item[0], reverse=True)
+        if filters:
+            candidates = min((self._index[field].get(value, []) for field, value in filters.items()), key=len)
+        else:
+            candidates = self._keys
+
+        def ring() -> Iterator[Tuple[Key, Dict]]:
+            for key in reversed(candidates):
+                if matching(self._rows[key]):
+                    yield key, self._rows[key]
+
+        # Pending writes interleave with ring rows by time: a row read back from the table
+        # can be newer than a write the refresh hasn't matched yet
+        newest = merge(pending, ring(), key=lambda item: item[0], reverse=True)
+        matches = [row for _, row in islice(newest, limit)]
+
+        if len(matches) < limit and self.truncated:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return matches
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "fresh": self.fresh(),
+            "age_seconds": None if self.refreshed_at is None else round(time.monotonic() - self.refreshed_at, 3),
+            "rows": len(self._keys),
+            "pending": len(self._pending),
+            "capacity": self.capacity,
+            "truncated": self.truncated,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "rows_pulled": self.rows_pulled,
+            "last_error": self.last_error
+        }
@@ -5,97 +5,417 @@ Provides database query access to Sovereign Mind, Hurricane, and DealCloud datab
 
 import os
 import json
+import base64
 import logging
-from typing import Any, Dict, List
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
 
-import snowflake.connector
+from backends.snowflake_cache import cache_from_env
+from backends.snowflake_engine import QueryTimeoutError, get_shared_engine
+from backends.snowflake_pool import PoolTimeoutError, get_shared_pool
+from gateway.health import ProbeSkipped
+from gateway.shared import get_shared_store
+from snowflake.connector.errors import ProgrammingError
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = int(os.getenv("SNOWFLAKE_PAGE_SIZE", "1000"))
+MAX_PAGE_SIZE = int(os.getenv("SNOWFLAKE_MAX_PAGE_SIZE", "10000"))
+MAX_RESULT_BYTES = int(os.getenv("SNOWFLAKE_MAX_RESULT_BYTES", str(32 * 1024 * 1024)))
+FETCH_BATCH_SIZE = 500
+RESULT_FORMATS = ("rows", "columnar", "column_major")
+SESSION_STATEMENT_ERROR = (
+    "Session-scoped statements (USE, ALTER SESSION, SET, BEGIN/COMMIT/ROLLBACK, temporary objects) "
+    "are not supported: each call may run on a different pooled session. Use fully qualified names "
+    "and single statements instead."
+)
+
 
 class SnowflakeBackend:
     """Snowflake database backend"""
     
     def __init__(self):
         self.name = "snowflake"
-        self.conn = None
-        self._init_connection()
-        
-    def _init_connection(self):
-        """Initialize Snowflake connection"""
-        try:
-            self.conn = snowflake.connector.connect(
-                user=os.getenv("SNOWFLAKE_USER", "JOHN_CLAUDE"),
-                password=os.getenv("SNOWFLAKE_PASSWORD"),
-                account=os.getenv("SNOWFLAKE_ACCOUNT", "uib44717"),
-                warehouse=os.getenv("SNOWFLAKE_WAREHOUSE", "COMPUTE_WH"),
-                database=os.getenv("SNOWFLAKE_DATABASE", "SOVEREIGN_MIND"),
-                schema=os.getenv("SNOWFLAKE_SCHEMA", "RAW"),
-                role=os.getenv("SNOWFLAKE_ROLE", "ACCOUNTADMIN")
-            )
-            logger.info("Snowflake connection established")
-        except Exception as e:
-            logger.error(f"Failed to connect to Snowflake: {e}")
-            self.conn = None
+        self.pool = get_shared_pool()
+        self.engine = get_shared_engine()
+        self.cache = cache_from_env()
+        self.shared = get_shared_store()
+        if self.shared is not None:
+            # Writes run by other workers invalidate this worker's result cache too
+            self.shared.subscribe("snowflake.invalidate", self._apply_invalidation)
+    
+    async def start(self):
+        """Log in off the event loop; construction itself never touches the network"""
+        await self.pool.prefill()
     
     def get_tools(self) -> List[Dict]:
         return [{
             "name": "query_snowflake",
-            "description": "[SM] Execute SQL query on Snowflake as JOHN_CLAUDE",
+            "description": "[SM] Execute SQL query on Snowflake as JOHN_CLAUDE. Each call may run on a "
+                           "different pooled session: use fully qualified names; USE, ALTER SESSION, SET, "
+                           "transactions and temporary objects are rejected.",
             "inputSchema": {
                 "type": "object",
                 "properties": {
                     "sql": {
                         "type": "string",
                         "description": "SQL query to execute"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "description": "Cancel the query if it runs longer than this"
+                    },
+                    "page_size": {
+                        "type": "integer",
+                        "description": f"Rows per page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})"
+                    },
+                    "max_rows": {
+                        "type": "integer",
+                        "description": "Stop paging after this many rows in total"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from a previous response; fetches the following page (sql is ignored)"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(RESULT_FORMATS),
+                        "default": "rows",
+                        "description": "rows: list of objects; columnar: columns + rows as arrays; column_major: one array per column"
+                    },
+                    "use_cache": {
+                        "type": "boolean",
+                        "default": True,
+                        "description": "Serve read-only queries from the gateway result cache when fresh"
                     }
                 },
-                "required": ["sql"]
+                "required": []
             }
         }]
     
     async def call_tool(self, tool_name: str, arguments: Dict) -> Any:
         if tool_name == "query_snowflake":
-            return await self._query(arguments.get("sql", ""))
+            return await self._query(
+                arguments.get("sql", ""),
+                timeout=arguments.get("timeout_seconds"),
+                page_size=arguments.get("page_size"),
+                max_rows=arguments.get("max_rows"),
+                cursor_token=arguments.get("cursor"),
+                fmt=arguments.get("format", "rows"),
+                use_cache=arguments.get("use_cache", True)
+            )
         return {"error": f"Unknown tool: {tool_name}"}
     
-    async def _query(self, sql: str) -> Dict:
-        """Execute SQL query"""
-        if not self.conn:
-            self._init_connection()
-            if not self.conn:
-                return {"success": False, "error": "No database connection"}
+    async def _query(self, sql: str, timeout: float = None, page_size: int = None,
+                     max_rows: int = None, cursor_token: str = None, fmt: str = "rows",
+                     use_cache: bool = True) -> Dict:
+        """Execute SQL query (or continue a paged one) off the event loop on a pooled connection"""
+        if fmt not in RESULT_FORMATS:
+            return {"success": False, "error": f"Unknown format: {fmt}"}
+        caller_timeout = bool(timeout)
+        timeout = timeout or self.engine.default_timeout
+        page_size = max(1, min(page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        
+        kind = None
+        if cursor_token:
+            try:
+                position = _decode_cursor(cursor_token)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            run = lambda conn: self.engine.run(
+                conn, lambda cursor: self._fetch_next_page(cursor, position, page_size, fmt), timeout)
+        elif sql:
+            kind, key, tables = self.cache.classify(sql)
+            if kind == "session":
+                return {"success": False, "error": SESSION_STATEMENT_ERROR}
+            variant = (page_size, max_rows, fmt)
+            if kind == "read" and use_cache:
+                cached = self.cache.get(key, variant)
+                if cached is not None:
+                    return cached
+            generation = self.cache.generation
+            run = lambda conn: self.engine.execute(
+                conn, sql, read=lambda cursor: self._read_first_page(cursor, page_size, max_rows, fmt),
+                timeout=timeout)
+        else:
+            return {"success": False, "error": "Either sql or cursor is required"}
         
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(sql)
-            
-            # Get column names
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            
-            # Fetch results
-            rows = cursor.fetchall()
-            
-            # Convert to list of dicts
-            data = []
-            for row in rows:
-                row_dict = {}
-                for i, col in enumerate(columns):
-                    value = row[i]
-                    # Handle special types
-                    if hasattr(value, 'isoformat'):
-                        value = value.isoformat()
-                    row_dict[col] = value
-                data.append(row_dict)
-            
-            cursor.close()
-            
-            return {
-                "success": True,
-                "data": data,
-                "row_count": len(data)
-            }
-            
-        except Exception as e:
+            async with self.pool.connection() as conn:
+                result = await run(conn)
+            if kind == "read" and result.get("success"):
+                self.cache.put(key, variant, tables, result, generation)
+            return result
+        except PoolTimeoutError as e:
+            logger.error(f"Snowflake pool exhausted: {e}")
+            return {"success": False, "error": str(e), "unavailable": True}
+        except QueryTimeoutError as e:
+            logger.error(f"Query timeout: {e}")
+            # caller_timeout: the limit was the caller's timeout_seconds, not the gateway's
+            return {"success": False, "error": str(e), "timed_out": True, "caller_timeout": caller_timeout}
+        except ProgrammingError as e:
+            # The statement's fault (syntax, permissions, missing object), not Snowflake's
             logger.error(f"Query error: {e}")
             return {"success": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Query error: {e}")
+            return {"success": False, "error": str(e), "unavailable": True}
+        finally:
+            if kind is not None:
+                self._invalidate_after(kind, tables)
+    
+    async def health_check(self):
+        """
+        Round trip through the pool and engine; raises if Snowflake can't answer. Never waits
+        for a session: when every one is busy the probe is skipped, since queueing behind
+        traffic would measure load rather than health and real calls are reporting anyway.
+        """
+        try:
+            async with self.pool.connection(timeout=0) as conn:
+                await self.engine.execute(conn, "SELECT 1", timeout=5)
+        except PoolTimeoutError as e:
+            raise ProbeSkipped(str(e))
+    
+    def _invalidate_after(self, kind: str, tables):
+        """Invalidate even on failure: a write may have partially applied"""
+        if kind not in ("write", "other"):
+            return
+        # None clears everything: a statement with unknown side effects
+        stale = sorted(tables) if kind == "write" else None
+        self._apply_invalidation(stale)
+        if self.shared is not None:
+            self.shared.publish_nowait("snowflake.invalidate", stale)
+    
+    def _apply_invalidation(self, tables: Optional[List[str]]):
+        if tables is None:
+            self.cache.clear()
+        else:
+            self.cache.invalidate_tables(set(tables))
+    
+    async def execute(self, sql: str, params=None, timeout: float = None, many: bool = False) -> Dict:
+        """
+        Run a statement with server-side bind parameters (qmark style) on behalf of other
+        backends. Rows come back as dicts; errors propagate to the caller.
+        With many=True, params is a sequence of parameter rows for executemany.
+        """
+        timeout = timeout or self.engine.default_timeout
+        kind, _, tables = self.cache.classify(sql)
+        if kind == "session":
+            raise ValueError(SESSION_STATEMENT_ERROR)
+        try:
+            async with self.pool.connection() as conn:
+                if many:
+                    return await self.engine.run(conn, lambda cursor: self._run_many(cursor, sql, params), timeout)
+                return await self.engine.execute(conn, sql, params, read=self._read_statement, timeout=timeout)
+        finally:
+            self._invalidate_after(kind, tables)
+    
+    def _run_many(self, cursor, sql: str, params) -> Dict:
+        cursor.executemany(sql, params)
+        return self._read_statement(cursor)
+    
+    def _read_statement(self, cursor) -> Dict:
+        if not cursor.description:
+            return {"success": True, "rows_affected": cursor.rowcount}
+        columns = [desc[0] for desc in cursor.description]
+        converted = [_convert_column(list(column)) for column in zip(*cursor.fetchall())]
+        rows = [dict(zip(columns, row)) for row in zip(*converted)]
+        return {"success": True, "rows": rows, "row_count": len(rows)}
+    
+    def _read_first_page(self, cursor, page_size: int, max_rows: Optional[int], fmt: str) -> Dict:
+        """Blocking part of _query once the statement has finished; runs on an engine worker thread"""
+        position = {"qid": cursor.sfqid, "offset": 0, "max_rows": max_rows}
+        return self._read_page(cursor, position, page_size, fmt)
+    
+    def _fetch_next_page(self, cursor, position: Dict, page_size: int, fmt: str) -> Dict:
+        """Re-open a finished query's result set by query id and continue at the cursor offset"""
+        cursor.get_results_from_sfqid(position["qid"])
+        batches = self._seek_batches(cursor, position["offset"], fmt != "rows")
+        return self._read_page(cursor, position, page_size, fmt, batches)
+    
+    def _seek_batches(self, cursor, skip: int, use_arrow: bool):
+        """
+        Column batches from row `skip` onwards. Result batches wholly before it are passed
+        over by their row counts, so they are never downloaded or converted; only the batch
+        holding the offset is sliced.
+        """
+        result_batches = cursor.get_result_batches() if hasattr(cursor, "get_result_batches") else None
+        if result_batches is None:
+            # Older connectors: read through the rows before the offset
+            for batch in self._column_batches(cursor, False):
+                size = len(batch[0])
+                if skip >= size:
+                    skip -= size
+                    continue
+                yield [column[skip:] for column in batch] if skip else batch
+                skip = 0
+            return
+        for result_batch in result_batches:
+            if skip >= result_batch.rowcount:
+                skip -= result_batch.rowcount
+                continue
+            batch = self._result_batch_columns(result_batch, use_arrow)
+            if skip:
+                batch = [column[skip:] for column in batch]
+                skip = 0
+            if batch and batch[0]:
+                yield batch
+    
+    def _result_batch_columns(self, result_batch, use_arrow: bool) -> List[List]:
+        """Download one result batch as one Python list per column"""
+        if use_arrow and hasattr(result_batch, "to_arrow"):
+            try:
+                table = result_batch.to_arrow()
+            except Exception as e:
+                # pyarrow not installed or JSON result format
+                logger.debug(f"Arrow batch unavailable: {e}")
+            else:
+                return [column.to_pylist() for column in table.columns]
+        return [list(column) for column in zip(*result_batch)]
+    
+    def _column_batches(self, cursor, use_arrow: bool):
+        """Yield result batches column-major: one Python list per column"""
+        if use_arrow and hasattr(cursor, "fetch_arrow_batches"):
+            try:
+                tables = iter(cursor.fetch_arrow_batches())
+                table = next(tables, None)
+            except Exception as e:
+                # pyarrow not installed or JSON result format; fall back to fetchmany
+                logger.debug(f"Arrow fetch unavailable: {e}")
+            else:
+                while table is not None:
+                    yield [column.to_pylist() for column in table.columns]
+                    table = next(tables, None)
+                return
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                return
+            yield [list(column) for column in zip(*batch)]
+    
+    def _read_page(self, cursor, position: Dict, page_size: int, fmt: str, batches=None) -> Dict:
+        """
+        Read one page, bounded by page_size, max_rows and MAX_RESULT_BYTES, from the column
+        batches given (positioned at the cursor offset) or from the start of the result set
+        """
+        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        offset = position["offset"]
+        max_rows = position.get("max_rows")
+        limit = page_size
+        if max_rows is not None:
+            limit = max(0, min(limit, max_rows - offset))
+        
+        out = [[] for _ in columns]
+        count = 0
+        approx_bytes = 0
+        truncated_reason = None
+        has_more = False
+        if not columns:
+            batches = iter(())
+        elif batches is None:
+            batches = self._column_batches(cursor, fmt != "rows")
+        
+        for batch in batches:
+            size = len(batch[0])
+            if count >= limit:
+                has_more = True
+                break
+            
+            take = min(size, limit - count)
+            batch = [column[:take] for column in batch]
+            batch_bytes = _estimate_bytes(batch)
+            if approx_bytes + batch_bytes > MAX_RESULT_BYTES:
+                # Keep the share of this batch that fits (at least one row on an empty page)
+                budget = MAX_RESULT_BYTES - approx_bytes
+                fit = int(take * budget / batch_bytes) if batch_bytes else take
+                fit = max(fit, 0 if count else 1)
+                batch = [column[:fit] for column in batch]
+                truncated_reason = "memory_cap"
+                has_more = True
+                take = fit
+            
+            for i, column in enumerate(batch):
+                out[i].extend(_convert_column(column))
+            count += take
+            approx_bytes += batch_bytes
+            if truncated_reason:
+                break
+            if take < size:
+                has_more = True
+                break
+        
+        next_offset = offset + count
+        if has_more and max_rows is not None and next_offset >= max_rows:
+            truncated_reason = truncated_reason or "max_rows"
+            has_more = False
+        
+        result = {"success": True, "format": fmt}
+        if fmt == "rows":
+            result["data"] = [dict(zip(columns, row)) for row in zip(*out)]
+        elif fmt == "columnar":
+            result["columns"] = columns
+            result["rows"] = [list(row) for row in zip(*out)]
+        else:
+            result["columns"] = columns
+            result["data"] = out
+        result.update({
+            "row_count": count,
+            "offset": offset,
+            "has_more": has_more
+        })
+        if has_more:
+            result["next_cursor"] = _encode_cursor({**position, "offset": next_offset})
+        if truncated_reason:
+            result["truncated"] = True
+            result["truncated_reason"] = truncated_reason
+        return result
+    
+    def get_metrics(self) -> Dict:
+        return {
+            "pool": self.pool.stats(),
+            "engine": self.engine.stats(),
+            "cache": self.cache.stats()
+        }
+    
+    def close(self):
+        """Release pooled connections and query threads"""
+        self.engine.shutdown()
+        self.pool.close()
+
+
+def _convert_column(values: List) -> List:
+    """Convert a whole column at once, choosing the converter from its first non-null value"""
+    sample = next((v for v in values if v is not None), None)
+    if hasattr(sample, "isoformat"):
+        return [v if v is None else v.isoformat() for v in values]
+    if isinstance(sample, Decimal):
+        return [v if v is None else str(v) for v in values]
+    return values
+
+
+def _estimate_bytes(columns: List[List]) -> int:
+    """Rough payload size of a column-major batch"""
+    total = 0
+    for column in columns:
+        sample = next((v for v in column if v is not None), None)
+        if isinstance(sample, (str, bytes)):
+            total += sum(len(v) for v in column if v is not None)
+        else:
+            total += 8 * len(column)
+    return total
+
+
+def _encode_cursor(position: Dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(token: str) -> Dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+        if not position.get("qid") or int(position.get("offset", -1)) < 0:
+            raise ValueError
+        return position
+    except Exception:
+        raise ValueError("Invalid or expired cursor token")
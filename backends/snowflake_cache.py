@@ -0,0 +1,258 @@
+"""
+Snowflake Query Result Cache
+TTL + byte-bounded LRU cache for read-only SQL, invalidated by writes through the gateway
+"""
+
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from gateway.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+READ_KEYWORDS = {"SELECT", "WITH", "SHOW", "DESC", "DESCRIBE"}
+# Reads of object metadata, which DDL changes even when it names another table
+CATALOG_KEYWORDS = {"SHOW", "DESC", "DESCRIBE"}
+# Results that change between executions even without writes
+VOLATILE_PATTERN = re.compile(
+    r"\b(CURRENT_TIMESTAMP|CURRENT_TIME|CURRENT_DATE|SYSDATE|GETDATE|LOCALTIMESTAMP|"
+    r"RANDOM|UNIFORM|UUID_STRING|SEQ[1248]|NORMAL|RESULT_SCAN|LAST_QUERY_ID)\b"
+)
+LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"]|\"\")*\"")
+COMMENT_PATTERN = re.compile(r"--[^\n]*|//[^\n]*|/\*.*?\*/", re.S)
+IDENT = r"((?:\"(?:[^\"]|\"\")*\"|[A-Z_][A-Z0-9_$]*)(?:\.(?:\"(?:[^\"]|\"\")*\"|[A-Z_][A-Z0-9_$]*)){0,2})"
+IDENT_PATTERN = re.compile(IDENT)
+WRITE_TABLE_PATTERNS = [
+    re.compile(r"^INSERT\s+(?:OVERWRITE\s+)?(?:ALL\s+)?INTO\s+" + IDENT),
+    re.compile(r"^UPDATE\s+" + IDENT),
+    re.compile(r"^DELETE\s+FROM\s+" + IDENT),
+    re.compile(r"^MERGE\s+INTO\s+" + IDENT),
+    re.compile(r"^TRUNCATE\s+(?:TABLE\s+)?(?:IF\s+EXISTS\s+)?" + IDENT),
+    re.compile(r"^COPY\s+INTO\s+" + IDENT),
+    re.compile(r"^(?:DROP|ALTER|UNDROP)\s+TABLE\s+(?:IF\s+EXISTS\s+)?" + IDENT),
+    re.compile(r"^CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:LOCAL|GLOBAL)\s+)?(?:TEMP(?:ORARY)?\s+|TRANSIENT\s+)?"
+               r"TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?" + IDENT),
+]
+# Writes that create, drop or alter a table and so change SHOW/DESC output for its schema
+DDL_PATTERN = re.compile(r"^(?:CREATE|DROP|ALTER|UNDROP)\b")
+IN_DATABASE_PATTERN = re.compile(r"\bIN\s+DATABASE\s+" + IDENT)
+IN_ACCOUNT_PATTERN = re.compile(r"\bIN\s+ACCOUNT\b")
+# Statements whose effect lasts for the session (current database/role, variables, open
+# transactions, temporary objects): pooled sessions make them unreliable across calls
+SESSION_PATTERN = re.compile(
+    r"^(?:USE\b|ALTER\s+SESSION\b|(?:SET|UNSET)\s|BEGIN\b|START\s+TRANSACTION\b|COMMIT\b|ROLLBACK\b|"
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:LOCAL|GLOBAL)\s+)?TEMP(?:ORARY)?\s)"
+)
+# Additional targets of multi-table writes (INSERT ALL ... INTO t1 ... INTO t2)
+INTO_PATTERN = re.compile(r"\bINTO\s+" + IDENT)
+
+
+def normalize_sql(sql: str) -> Tuple[str, str]:
+    """
+    Return (cache_text, code_text). cache_text keeps literals verbatim but strips comments,
+    collapses whitespace and upper-cases everything else; code_text has literals blanked
+    so keyword/table matching can't be fooled by string contents.
+    """
+    cache_parts, code_parts = [], []
+    last = 0
+    for match in LITERAL_PATTERN.finditer(sql):
+        code = _normalize_code(sql[last:match.start()])
+        cache_parts.append(code)
+        code_parts.append(code)
+        literal = match.group(0)
+        cache_parts.append(literal)
+        # Quoted identifiers matter for table matching; string literals don't
+        code_parts.append(literal if literal.startswith('"') else "''")
+        last = match.end()
+    tail = _normalize_code(sql[last:])
+    cache_parts.append(tail)
+    code_parts.append(tail)
+    cache_text = "".join(cache_parts).strip().rstrip(";").strip()
+    code_text = "".join(code_parts).strip().rstrip(";").strip()
+    return cache_text, code_text
+
+
+def _normalize_code(text: str) -> str:
+    text = COMMENT_PATTERN.sub(" ", text)
+    return re.sub(r"\s+", " ", text).upper()
+
+
+def _split_name(name: str) -> List[str]:
+    """'DB."My Schema".T' -> ["DB", "MY SCHEMA", "T"]"""
+    return [p.strip('"').replace('""', '"').upper() for p in re.findall(r'"(?:[^"]|"")*"|[^.]+', name)]
+
+
+class QueryResultCache:
+    """LRU keyed on normalized SQL + session context, bounded by total result bytes"""
+
+    def __init__(self, max_bytes: int, ttl: float, database: str, schema: str, role: str):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.database = database.upper()
+        self.schema = schema.upper()
+        self.role = role.upper()
+        # key -> (expires_at, size, tables, result)
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, Set[str], Dict]]" = OrderedDict()
+        self._bytes = 0
+        # Bumped on every invalidation so reads that raced a write don't store stale rows
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def classify(self, sql: str) -> Tuple[str, Optional[Tuple], Set[str]]:
+        """
+        Return (kind, key, tables) where kind is "read" (cacheable), "uncacheable" (read-only
+        but volatile), "write" (invalidates tables), "session" (changes session state) or
+        "other" (unknown side effects).
+
+        For reads, tables is every identifier in the statement: over-matching only costs an
+        extra invalidation, while missing a comma-join or subquery table would serve stale rows.
+        SHOW/DESC reads and table DDL also carry catalog scopes ("DB.SCHEMA.*", "DB.*", "*"),
+        so creating or dropping a table invalidates the listings of its schema.
+        """
+        cache_text, code_text = normalize_sql(sql)
+        first = code_text.split(" ", 1)[0] if code_text else ""
+
+        if ";" in code_text:
+            return "other", None, set()
+
+        if SESSION_PATTERN.match(code_text):
+            return "session", None, set()
+
+        if first in READ_KEYWORDS:
+            if INTO_PATTERN.search(code_text):
+                return "other", None, set()
+            if VOLATILE_PATTERN.search(code_text):
+                return "uncacheable", None, set()
+            tables = {self._qualify(t) for t in IDENT_PATTERN.findall(code_text)}
+            if first in CATALOG_KEYWORDS:
+                tables |= self._catalog_scopes(code_text)
+            key = (cache_text, self.database, self.schema, self.role)
+            return "read", key, tables
+
+        for pattern in WRITE_TABLE_PATTERNS:
+            match = pattern.match(code_text)
+            if match:
+                tables = {self._qualify(match.group(1))}
+                tables.update(self._qualify(t) for t in INTO_PATTERN.findall(code_text))
+                if DDL_PATTERN.match(code_text):
+                    for table in list(tables):
+                        database, schema, _ = table.split(".", 2)
+                        tables |= {f"{database}.{schema}.*", f"{database}.*", "*"}
+                return "write", None, tables
+
+        return "other", None, set()
+
+    def _catalog_scopes(self, code_text: str) -> Set[str]:
+        """
+        Schemas a SHOW/DESC might describe: every identifier read as a schema or as a table
+        in one, and the current schema unless a qualified name says otherwise. Keywords
+        (TABLES, IN) add harmless extra scopes.
+        """
+        scopes = set()
+        qualified = False
+        for name in IDENT_PATTERN.findall(code_text):
+            parts = _split_name(name)
+            if len(parts) == 1:
+                scopes.add(f"{self.database}.{parts[0]}.*")
+                continue
+            qualified = True
+            if len(parts) == 2:
+                scopes |= {f"{parts[0]}.{parts[1]}.*", f"{self.database}.{parts[0]}.*"}
+            else:
+                scopes.add(f"{parts[0]}.{parts[1]}.*")
+        if not qualified:
+            scopes.add(f"{self.database}.{self.schema}.*")
+        for name in IN_DATABASE_PATTERN.findall(code_text):
+            scopes.add(f"{_split_name(name)[0]}.*")
+        if IN_ACCOUNT_PATTERN.search(code_text):
+            scopes.add("*")
+        return scopes
+
+    def _qualify(self, name: str) -> str:
+        parts = _split_name(name)
+        if len(parts) == 1:
+            parts = [self.database, self.schema] + parts
+        elif len(parts) == 2:
+            parts = [self.database] + parts
+        return ".".join(parts)
+
+    def get(self, key: Tuple, variant: Tuple = ()) -> Optional[Dict]:
+        full_key = key + variant
+        entry = self._entries.get(full_key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, size, tables, result = entry
+        if expires_at < time.monotonic():
+            self._drop(full_key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(full_key)
+        self.hits += 1
+        return {**result, "cached": True}
+
+    def put(self, key: Tuple, variant: Tuple, tables: Set[str], result: Dict, generation: int):
+        if generation != self.generation:
+            return
+        size = len(dumps(result))
+        if size > self.max_bytes:
+            return
+        full_key = key + variant
+        if full_key in self._entries:
+            self._drop(full_key)
+        self._entries[full_key] = (time.monotonic() + self.ttl, size, tables, result)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def invalidate_tables(self, tables: Set[str]):
+        self.generation += 1
+        stale = [k for k, entry in self._entries.items() if entry[2] & tables]
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self.generation += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+
+    def _drop(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+def cache_from_env() -> QueryResultCache:
+    return QueryResultCache(
+        max_bytes=int(os.getenv("SNOWFLAKE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl=float(os.getenv("SNOWFLAKE_CACHE_TTL", "300")),
+        database=os.getenv("SNOWFLAKE_DATABASE", "SOVEREIGN_MIND"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA", "RAW"),
+        role=os.getenv("SNOWFLAKE_ROLE", "ACCOUNTADMIN")
+    )
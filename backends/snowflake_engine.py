@@ -0,0 +1,279 @@
+"""
+Snowflake Query Engine
+Runs blocking snowflake.connector work on a bounded thread pool so the event loop stays free.
+Statements are submitted asynchronously and polled, so the query id is known while they run
+and a timeout or cancelled call can abort them server-side before the caller moves on.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from gateway.metrics import SNOWFLAKE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_TIMEOUT = float(os.getenv("SNOWFLAKE_QUERY_TIMEOUT", "120"))
+DEFAULT_QUERY_THREADS = int(os.getenv("SNOWFLAKE_QUERY_THREADS", "8"))
+# Status polling backs off from the first interval to the maximum while a query runs
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = float(os.getenv("SNOWFLAKE_MAX_POLL_INTERVAL", "1"))
+# How long an abandoned call waits for its cancel and in-flight connector work to finish
+CANCEL_TIMEOUT = float(os.getenv("SNOWFLAKE_CANCEL_TIMEOUT", "10"))
+
+# Query ids are UUIDs; checked before being spliced into the cancel statement, which then
+# works whatever paramstyle the connection was opened with
+QUERY_ID_PATTERN = re.compile(r"^[0-9A-Fa-f]{8}(-[0-9A-Fa-f]{4}){3}-[0-9A-Fa-f]{12}$")
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a query exceeds its timeout and has been cancelled"""
+
+
+# Connector calls submitted or running per connection (by id), across all engines
+_busy: Dict[int, int] = {}
+_busy_lock = threading.Lock()
+
+
+def connection_busy(conn) -> bool:
+    """Whether any engine thread is still queued for or working on conn"""
+    with _busy_lock:
+        return id(conn) in _busy
+
+
+def _track(conn, future: Future):
+    """Count conn as busy until future finishes, or is cancelled before it starts"""
+    key = id(conn)
+    with _busy_lock:
+        _busy[key] = _busy.get(key, 0) + 1
+
+    def done(_):
+        with _busy_lock:
+            if _busy[key] == 1:
+                del _busy[key]
+            else:
+                _busy[key] -= 1
+
+    future.add_done_callback(done)
+
+
+class SnowflakeQueryEngine:
+    """Bounded executor for connector calls with per-query timeout and cancellation"""
+
+    def __init__(self, max_workers: int = DEFAULT_QUERY_THREADS,
+                 default_timeout: float = DEFAULT_QUERY_TIMEOUT):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snowflake")
+        # Cancels get their own threads: the pool's workers may all be busy with the statements
+        self._cancel_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snowflake-cancel")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._running_queries = 0
+        self.cancelled = 0
+        self.timed_out = 0
+
+    async def run_blocking(self, fn: Callable, *args) -> Any:
+        """Run an arbitrary blocking callable (connect, close, ...) on the pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def _in_thread(self, conn, fn: Callable, *args) -> Any:
+        """Run fn on the pool on behalf of conn, counted in the queued/active stats"""
+        with self._lock:
+            self._queued += 1
+
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        def dequeued(future: Future):
+            # Cancelled only if it never started, so run() did not dequeue it
+            if future.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        future = self._executor.submit(run)
+        future.add_done_callback(dequeued)
+        _track(conn, future)
+        return await asyncio.wrap_future(future)
+
+    async def execute(self, conn, sql: str, params=None, read: Optional[Callable] = None,
+                      timeout: Optional[float] = None) -> Any:
+        """
+        Submit sql with execute_async, poll its status until it finishes, then return
+        read(cursor) over the results (None without a reader). Only submission, status
+        checks and reading occupy a pool thread; the statement itself runs in Snowflake.
+        On timeout or task cancellation the statement is cancelled server-side.
+        """
+        timeout = timeout or self.default_timeout
+        state = {"query_id": None, "abandoned": False}
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(self._execute(conn, sql, params, read, state), timeout)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            self.timed_out += 1
+            await asyncio.shield(self._abandon(conn, state))
+            raise QueryTimeoutError(f"Query exceeded {timeout:g}s timeout and was cancelled")
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            self.cancelled += 1
+            await asyncio.shield(self._abandon(conn, state))
+            raise
+        finally:
+            SNOWFLAKE_LATENCY.labels(outcome).observe(time.monotonic() - started)
+
+    async def _execute(self, conn, sql: str, params, read: Optional[Callable], state: Dict) -> Any:
+        def submit():
+            cursor = conn.cursor()
+            try:
+                cursor.execute_async(sql, params)
+                query_id = cursor.sfqid
+            finally:
+                cursor.close()
+            with self._lock:
+                state["query_id"] = query_id
+                abandoned = state["abandoned"]
+            if abandoned:
+                # The caller gave up while the statement was being submitted
+                self._cancel_statement(conn, query_id)
+            return query_id
+
+        query_id = await self._in_thread(conn, submit)
+        self._running_queries += 1
+        try:
+            delay = POLL_INTERVAL
+            while True:
+                # Raises the statement's own error (ProgrammingError) if it failed
+                status = await self._in_thread(conn, conn.get_query_status_throw_if_error, query_id)
+                if not conn.is_still_running(status):
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_POLL_INTERVAL)
+        finally:
+            self._running_queries -= 1
+
+        def fetch():
+            cursor = conn.cursor()
+            try:
+                cursor.get_results_from_sfqid(query_id)
+                return read(cursor) if read is not None else None
+            finally:
+                cursor.close()
+
+        return await self._in_thread(conn, fetch)
+
+    async def run(self, conn, work: Callable, timeout: Optional[float] = None) -> Any:
+        """
+        Run work(cursor) on a pool thread with a fresh cursor from conn, for calls that are
+        not a single new statement (reading a finished result set, executemany). A timeout
+        abandons the thread but cannot abort anything server-side; conn stays busy until
+        the thread finishes.
+        """
+        timeout = timeout or self.default_timeout
+
+        def call():
+            cursor = conn.cursor()
+            try:
+                return work(cursor)
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(self._in_thread(conn, call), timeout)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            self.timed_out += 1
+            raise QueryTimeoutError(f"Snowflake call exceeded {timeout:g}s timeout")
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            self.cancelled += 1
+            raise
+        finally:
+            SNOWFLAKE_LATENCY.labels(outcome).observe(time.monotonic() - started)
+
+    async def _abandon(self, conn, state: Dict):
+        """
+        Cancel the statement server-side and wait, up to CANCEL_TIMEOUT, for the cancel and
+        any connector call still running on conn. Until this returns nobody may close or
+        reuse conn, or the cancel could be lost and the query keep running.
+        """
+        with self._lock:
+            state["abandoned"] = True
+            query_id = state["query_id"]
+        deadline = time.monotonic() + CANCEL_TIMEOUT
+        if query_id:
+            try:
+                await asyncio.wait_for(self._cancel(conn, query_id), CANCEL_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.error(f"Cancel of Snowflake query {query_id} still pending after {CANCEL_TIMEOUT:g}s")
+        # A submit that saw the abandon cancels on its own thread; wait for that too
+        while connection_busy(conn) and time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def _cancel(self, conn, query_id: str):
+        """Ask Snowflake to abort the statement with this query id, and wait for the answer"""
+        future = self._cancel_executor.submit(self._cancel_statement, conn, query_id)
+        _track(conn, future)
+        await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _cancel_statement(conn, query_id: str):
+        if not QUERY_ID_PATTERN.match(query_id or ""):
+            logger.error(f"Not cancelling Snowflake query with unexpected id {query_id!r}")
+            return
+        try:
+            cancel_cursor = conn.cursor()
+            cancel_cursor.execute(f"SELECT SYSTEM$CANCEL_QUERY('{query_id}')")
+            cancel_cursor.close()
+            logger.info(f"Cancelled Snowflake query {query_id}")
+        except Exception as e:
+            logger.error(f"Failed to cancel Snowflake query {query_id}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "active": self._active,
+            "queued": self._queued,
+            "running_queries": self._running_queries,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._cancel_executor.shutdown(wait=False)
+
+
+_shared_engine: Optional[SnowflakeQueryEngine] = None
+
+
+def get_shared_engine() -> SnowflakeQueryEngine:
+    """Process-wide engine so all Snowflake-backed backends share one thread budget"""
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = SnowflakeQueryEngine()
+    return _shared_engine
@@ -0,0 +1,271 @@
+"""
+Snowflake Connection Pool
+Bounded pool of connector sessions shared by the Snowflake and HiveMind backends
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import snowflake.connector
+from snowflake.connector.errors import ProgrammingError
+
+from backends.snowflake_engine import QueryTimeoutError, connection_busy
+from gateway.metrics import SNOWFLAKE_POOL_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+def connect_from_env():
+    """Open a Snowflake session using the gateway's environment configuration"""
+    return snowflake.connector.connect(
+        user=os.getenv("SNOWFLAKE_USER", "JOHN_CLAUDE"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT", "uib44717"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE", "COMPUTE_WH"),
+        database=os.getenv("SNOWFLAKE_DATABASE", "SOVEREIGN_MIND"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA", "RAW"),
+        role=os.getenv("SNOWFLAKE_ROLE", "ACCOUNTADMIN"),
+        # Server-side binding: values never get spliced into SQL text
+        paramstyle="qmark"
+    )
+
+
+class SnowflakeConnectionPool:
+    """Async checkout pool with idle eviction and liveness ping before reuse"""
+
+    def __init__(self, connect: Callable = connect_from_env,
+                 min_size: int = 1, max_size: int = 8,
+                 idle_timeout: float = 600, ping_after: float = 60,
+                 checkout_timeout: float = 30):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.checkout_timeout = checkout_timeout
+
+        # (conn, last_used); most recently used at the end so old sessions age out
+        self._idle: List[Tuple[Any, float]] = []
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._cond = asyncio.Condition()
+
+        self.created = 0
+        self.discarded = 0
+        self.checkouts = 0
+        self._checkout_total = 0.0
+        self._checkout_max = 0.0
+        self.last_error: Optional[str] = None
+
+    async def prefill(self):
+        """Open up to min_size sessions concurrently, off the event loop (used at startup)"""
+        async with self._cond:
+            missing = max(0, self.min_size - self._size)
+            # Reserve the slots first so concurrent checkouts don't overshoot max_size
+            self._size += missing
+        results = await asyncio.gather(*[asyncio.to_thread(self._connect) for _ in range(missing)],
+                                       return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        async with self._cond:
+            for result in results:
+                if isinstance(result, BaseException):
+                    self._size -= 1
+                else:
+                    self.created += 1
+                    self._idle.append((result, time.monotonic()))
+            self._cond.notify_all()
+        if errors:
+            self.last_error = str(errors[0])
+            logger.error(f"Failed to connect to Snowflake: {errors[0]}")
+            raise errors[0]
+        logger.info(f"Snowflake pool ready ({self._size} connections)")
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Check out a session, waiting up to timeout (default checkout_timeout; 0 never waits)"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        conn = None
+        evicted = []
+
+        async with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    evicted.extend(self._evict_idle_locked())
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        last_used = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No Snowflake connection available after {timeout:g}s"
+                        )
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+
+        try:
+            for stale in evicted:
+                await asyncio.to_thread(self._close, stale)
+            if conn is not None and time.monotonic() - last_used > self.ping_after:
+                if not await asyncio.to_thread(self._ping, conn):
+                    self.discarded += 1
+                    await asyncio.to_thread(self._close, conn)
+                    conn = None
+            if conn is None:
+                conn = await asyncio.to_thread(self._connect)
+                self.created += 1
+        except BaseException as e:
+            if isinstance(e, Exception):
+                self.last_error = str(e)
+            async with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        SNOWFLAKE_POOL_WAIT.labels().observe(elapsed)
+        self.checkouts += 1
+        self._checkout_total += elapsed
+        self._checkout_max = max(self._checkout_max, elapsed)
+        return conn
+
+    async def release(self, conn, broken: bool = False):
+        if not broken and self._is_closed(conn):
+            broken = True
+        async with self._cond:
+            self._in_use -= 1
+            if broken:
+                self._size -= 1
+                self.discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if broken:
+            await asyncio.to_thread(self._close, conn)
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None):
+        """
+        Check out a live connection. It goes back to the pool after a clean exit or a
+        statement error, and after a timeout or cancellation once the engine has cancelled the
+        statement and no worker thread is still using it; any other failure discards it, as
+        does a timeout that left a thread behind. Sessions are shared between callers, so
+        session state (USE, variables, transactions, temporary objects) must not be relied on
+        across checkouts. timeout overrides the checkout timeout, as for acquire().
+        """
+        conn = await self.acquire(timeout)
+        try:
+            yield conn
+        except ProgrammingError:
+            # The statement failed and has finished; the session itself is fine
+            await self.release(conn)
+            raise
+        except (QueryTimeoutError, asyncio.CancelledError):
+            # The engine waited for the cancel before raising; reuse the session if it settled
+            await self.release(conn, broken=connection_busy(conn))
+            raise
+        except BaseException:
+            await self.release(conn, broken=True)
+            raise
+        else:
+            await self.release(conn)
+
+    def _evict_idle_locked(self) -> List[Any]:
+        """Drop sessions idle past idle_timeout (down to min_size); caller closes them"""
+        now = time.monotonic()
+        keep, evicted = [], []
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout and self._size > self.min_size:
+                self._size -= 1
+                self.discarded += 1
+                evicted.append(conn)
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+        return evicted
+
+    @staticmethod
+    def _is_closed(conn) -> bool:
+        try:
+            return bool(conn.is_closed())
+        except Exception:
+            return True
+
+    def _ping(self, conn) -> bool:
+        if self._is_closed(conn):
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Snowflake session failed liveness check: {e}")
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close idle sessions; checked-out sessions are closed when released"""
+        for conn, _ in self._idle:
+            self._close(conn)
+        self._size -= len(self._idle)
+        self._idle = []
+
+    def stats(self) -> Dict:
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "created": self.created,
+            "discarded": self.discarded,
+            "checkouts": self.checkouts,
+            "checkout_avg_ms": round(1000 * self._checkout_total / self.checkouts, 2) if self.checkouts else 0.0,
+            "checkout_max_ms": round(1000 * self._checkout_max, 2),
+            "last_error": self.last_error
+        }
+
+
+_shared_pool: Optional[SnowflakeConnectionPool] = None
+
+
+def get_shared_pool() -> SnowflakeConnectionPool:
+    """Process-wide pool so every Snowflake-backed backend shares the same sessions"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = SnowflakeConnectionPool(
+            min_size=int(os.getenv("SNOWFLAKE_POOL_MIN", "1")),
+            max_size=int(os.getenv("SNOWFLAKE_POOL_MAX", "8")),
+            idle_timeout=float(os.getenv("SNOWFLAKE_POOL_IDLE_TIMEOUT", "600")),
+            ping_after=float(os.getenv("SNOWFLAKE_POOL_PING_AFTER", "60")),
+            checkout_timeout=float(os.getenv("SNOWFLAKE_POOL_CHECKOUT_TIMEOUT", "30"))
+        )
+    return _shared_pool
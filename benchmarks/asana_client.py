@@ -0,0 +1,164 @@
+"""
+Asana Client Benchmark
+Per-call latency of the Asana backend's GETs against a local fake Asana server: a fresh
+httpx.AsyncClient per call (how every call used to work) versus the backend's shared
+keep-alive client. With --tls the fake server uses a throwaway self-signed certificate
+(needs the openssl CLI), so each fresh client also pays a TLS handshake as it would
+against app.asana.com.
+
+    python benchmarks/asana_client.py [--calls 300] [--concurrency 1] [--tls]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the scheduler and cache out of the way: this measures the transport only
+os.environ.setdefault("ASANA_TOKEN", "benchmark")
+os.environ.setdefault("ASANA_RATE_PER_MINUTE", "10000000")
+os.environ.setdefault("ASANA_RATE_BURST", "100000")
+os.environ.setdefault("ASANA_CACHE_ENABLED", "false")
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from backends import asana_backend
+
+TASKS = [{"gid": str(1200000000000000 + i), "name": f"Task {i}", "completed": False,
+          "due_on": "2026-11-01", "notes": "Follow up with the deal team " * 4} for i in range(50)]
+
+
+async def get_user(request):
+    return JSONResponse({"data": {"gid": request.path_params["gid"], "name": "Benchmark User",
+                                  "email": "bench@example.com"}})
+
+
+async def list_tasks(request):
+    return JSONResponse({"data": TASKS, "next_page": None})
+
+
+fake_asana = Starlette(routes=[
+    Route("/api/1.0/users/{gid}", get_user),
+    Route("/api/1.0/tasks", list_tasks),
+])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def self_signed_cert(directory: str):
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+                    "-keyout", keyfile, "-out", certfile],
+                   check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def serve(port: int, certfile: str = None, keyfile: str = None) -> uvicorn.Server:
+    config = uvicorn.Config(fake_asana, host="127.0.0.1", port=port, log_level="warning",
+                            ssl_certfile=certfile, ssl_keyfile=keyfile)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def fresh_client_get(base: str, headers: dict, endpoint: str, params=None):
+    """The old _api_get: a new client (connection, handshake) for every call"""
+    async with httpx.AsyncClient() as client:
+        resp = await client.get(f"{base}{endpoint}", headers=headers, params=params, timeout=30)
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def measure(call, calls: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(calls)])
+    return latencies, time.perf_counter() - started
+
+
+def report(label: str, latencies, elapsed: float):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(ordered) * 1000:7.2f}ms  "
+          f"p50 {statistics.median(ordered) * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms  "
+          f"{len(ordered) / elapsed:8.1f} calls/s")
+
+
+async def run(base: str, calls: int, concurrency: int):
+    asana_backend.ASANA_BASE = base
+    backend = asana_backend.AsanaBackend()
+    await backend.start()
+    endpoints = [("/users/me", None), ("/tasks", {"project": "1", "limit": 50})]
+
+    async def before(i):
+        endpoint, params = endpoints[i % 2]
+        await fresh_client_get(base, backend.headers, endpoint, params)
+
+    async def after(i):
+        endpoint, params = endpoints[i % 2]
+        await backend._api_get(endpoint, params)
+
+    try:
+        # Warm up both paths (imports, first connection) before measuring
+        await measure(before, 10, 1)
+        await measure(after, 10, 1)
+        report("fresh client per call", *await measure(before, calls, concurrency))
+        report("shared client", *await measure(after, calls, concurrency))
+    finally:
+        await backend.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--tls", action="store_true", help="serve the fake API over HTTPS")
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        certfile = keyfile = None
+        if args.tls:
+            certfile, keyfile = self_signed_cert(directory)
+            # Trusted by both clients through httpx's default SSL context
+            os.environ["SSL_CERT_FILE"] = certfile
+        server = serve(port, certfile, keyfile)
+        scheme = "https" if args.tls else "http"
+        print(f"{args.calls} GETs against {scheme}://127.0.0.1:{port}, concurrency {args.concurrency}")
+        try:
+            asyncio.run(run(f"{scheme}://127.0.0.1:{port}/api/1.0", args.calls, args.concurrency))
+        finally:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
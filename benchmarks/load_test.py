@@ -0,0 +1,151 @@
+"""
+Load Test
+Throughput of POST /mcp tools/call across worker counts. For each WEB_CONCURRENCY value the
+gateway runs as `uvicorn server:app --workers N` against the stand-in Snowflake connector
+(tests/fakes), and several client processes keep a fixed number of query_snowflake calls
+in flight for a fixed time. Each call returns --rows generated rows, so the work per
+request is the gateway's own: dispatch, row conversion and JSON encoding.
+
+    python benchmarks/load_test.py [--workers 1,2,4] [--seconds 10] [--clients 4]
+                                   [--concurrency 16] [--rows 200]
+
+Needs as many free cores as workers plus clients to show scaling; on fewer cores the
+numbers flatten out where the machine does.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gateway(workers: int, port: int, state_dir: str) -> subprocess.Popen:
+    env = {**os.environ,
+           # The stand-in connector shadows any installed snowflake.connector
+           "PYTHONPATH": os.pathsep.join([os.path.join(ROOT, "tests", "fakes"), ROOT]),
+           "WEB_CONCURRENCY": str(workers),
+           "ENABLED_BACKENDS": "sm,hivemind",
+           "SNOWFLAKE_PASSWORD": "load-test",
+           "HIVEMIND_SPILL_PATH": os.path.join(state_dir, "hivemind-write-buffer.jsonl"),
+           "HIVEMIND_SEARCH_ENABLED": "false",
+           "HIVEMIND_TAIL_ENABLED": "false",
+           "HEALTH_PROBE_INTERVAL": "0"}
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+                                "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+                               cwd=ROOT, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Gateway with {workers} workers did not become ready")
+
+
+def stop_gateway(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def drive(url: str, seconds: float, concurrency: int, rows: int):
+    body = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {
+        "name": "sm_query_snowflake",
+        # use_cache off: identical queries would otherwise be answered from the result cache
+        "arguments": {"sql": f"SELECT * FROM TABLE(GENERATOR(ROWCOUNT => {rows}))", "page_size": rows,
+                      "use_cache": False}}}
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + seconds
+
+    async def loop(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json=body)
+                ok = response.status_code == 200 and "error" not in response.json()
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*[loop(client) for _ in range(concurrency)])
+    return latencies, errors
+
+
+def client_process(args):
+    return asyncio.run(drive(*args))
+
+
+def run(workers: int, args) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as state_dir:
+        process = start_gateway(workers, port, state_dir)
+        try:
+            url = f"http://127.0.0.1:{port}/mcp"
+            # Warm every worker's pool and imports before measuring
+            with multiprocessing.Pool(args.clients) as pool:
+                pool.map(client_process, [(url, 1.0, args.concurrency, args.rows)] * args.clients)
+                started = time.monotonic()
+                results = pool.map(client_process, [(url, args.seconds, args.concurrency, args.rows)] * args.clients)
+                elapsed = time.monotonic() - started
+        finally:
+            stop_gateway(process)
+    latencies = sorted(latency for result, _ in results for latency in result)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated WEB_CONCURRENCY values")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=4, help="client processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per client")
+    parser.add_argument("--rows", type=int, default=200, help="rows returned per call")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores; {args.clients} clients x {args.concurrency} in flight, "
+          f"{args.rows} rows per call, {args.seconds:g}s per run")
+    print(f"{'workers':>7} {'req/s':>9} {'p50':>9} {'p99':>9} {'errors':>7} {'scaling':>8}")
+    baseline = None
+    for workers in [int(part) for part in args.workers.split(",") if part.strip()]:
+        result = run(workers, args)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>7} {result['rps']:9.1f} {result['p50_ms']:7.1f}ms {result['p99_ms']:7.1f}ms "
+              f"{result['errors']:>7} {result['rps'] / baseline:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Serialization Benchmark
+Time to build a tools/call response body from representative Snowflake and Asana results:
+the old path (json.dumps(result, default=str) for the text content, then the whole
+envelope encoded again as JSONResponse did) versus gateway.serialization's single-pass
+tool_result_message, with orjson and with its stdlib fallback. For results large enough
+to be streamed, also the time until the first body chunk is ready (orjson when installed).
+Also times parsing a request body.
+
+    python benchmarks/serialization.py [--rows 1000] [--tasks 100] [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gateway import serialization
+
+
+def snowflake_page(rows: int, fmt: str) -> dict:
+    """A query page as SnowflakeBackend returns it: dates and decimals already converted to str"""
+    columns = ["ID", "CREATED_AT", "SOURCE", "CATEGORY", "WORKSTREAM", "SUMMARY", "AMOUNT", "PRIORITY"]
+    start = datetime(2026, 1, 1)
+    data = [[i, (start + timedelta(minutes=i)).isoformat(), "CLAUDE", "DECISION", "GENERAL",
+             f"Reviewed pipeline update {i} — moved the deal to diligence, next call Thursday",
+             f"{i * 1234.5:.2f}", "MEDIUM"] for i in range(rows)]
+    result = {"success": True, "format": fmt}
+    if fmt == "rows":
+        result["data"] = [dict(zip(columns, row)) for row in data]
+    else:
+        result["columns"] = columns
+        result["rows"] = data
+    result.update({"row_count": rows, "offset": 0, "has_more": True, "next_cursor": "eyJxaWQiOiAiMDFi"})
+    return result
+
+
+def asana_tasks(count: int) -> dict:
+    """A task listing with the opt_fields the Asana backend asks for"""
+    return {"data": [{
+        "gid": str(1200000000000000 + i),
+        "name": f"Follow up with the deal team on item {i}",
+        "completed": i % 5 == 0,
+        "due_on": "2026-11-01",
+        "assignee": {"gid": "1199999999999999", "name": "Benchmark User"},
+        "projects": [{"gid": "1201111111111111", "name": "Pipeline"}],
+        "memberships": [{"section": {"gid": "1202222222222222", "name": "In progress"}}],
+        "tags": [{"gid": "1203333333333333", "name": "priority"}],
+        "notes": "Confirm numbers, send the revised model and book the next call. " * 3,
+        "modified_at": "2026-10-16T14:03:11.123Z"
+    } for i in range(count)]}
+
+
+def old_response(msg_id, result) -> bytes:
+    text = json.dumps(result, default=str)
+    envelope = {"jsonrpc": "2.0", "id": msg_id, "result": {"content": [{"type": "text", "text": text}]}}
+    # Starlette JSONResponse.render
+    return json.dumps(envelope, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def new_response(msg_id, result) -> bytes:
+    return serialization.encode_message(serialization.tool_result_message(msg_id, result))
+
+
+def first_chunk(msg_id, result) -> bytes:
+    """The bytes a streamed response has ready before its first write (head and first chunk)"""
+    chunks = serialization.tool_result_message(msg_id, result).chunks()
+    return next(chunks) + next(chunks)
+
+
+def timed(fn, repeat: int):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def with_orjson(enabled: bool, fn):
+    saved = serialization.ORJSON_AVAILABLE
+    serialization.ORJSON_AVAILABLE = enabled and serialization.orjson is not None
+    try:
+        return fn()
+    finally:
+        serialization.ORJSON_AVAILABLE = saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = [
+        (f"snowflake rows x{args.rows}", snowflake_page(args.rows, "rows")),
+        (f"snowflake columnar x{args.rows}", snowflake_page(args.rows, "columnar")),
+        (f"asana tasks x{args.tasks}", asana_tasks(args.tasks)),
+    ]
+    if not serialization.ORJSON_AVAILABLE:
+        print("orjson is not installed; the orjson column repeats the stdlib fallback")
+    print(f"{'payload':<28} {'size':>9} {'old':>10} {'stdlib':>10} {'orjson':>10} {'1st chunk':>10}")
+    for label, result in payloads:
+        old = old_response(7, result)
+        # Same result either way; only whitespace and escaping in the text differ
+        text = json.loads(new_response(7, result))["result"]["content"][0]["text"]
+        assert json.loads(json.loads(old)["result"]["content"][0]["text"]) == json.loads(text)
+        old_time = timed(lambda: old_response(7, result), args.repeat)
+        stdlib_time = with_orjson(False, lambda: timed(lambda: new_response(7, result), args.repeat))
+        orjson_time = with_orjson(True, lambda: timed(lambda: new_response(7, result), args.repeat))
+        streamed = isinstance(serialization.tool_result_message(7, result), serialization.StreamedMessage)
+        first = f"{timed(lambda: first_chunk(7, result), args.repeat) * 1000:8.3f}ms" if streamed else "-"
+        print(f"{label:<28} {len(old) / 1024:7.1f}KB {old_time * 1000:8.3f}ms "
+              f"{stdlib_time * 1000:8.3f}ms {orjson_time * 1000:8.3f}ms {first:>10}")
+
+    request = json.dumps({"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": {
+        "name": "sm_query_snowflake", "arguments": {"sql": "SELECT * FROM SOVEREIGN_MIND.RAW.HIVE_MIND LIMIT 100",
+                                          "format": "columnar", "page_size": 500}}}).encode("utf-8")
+    stdlib_parse = timed(lambda: json.loads(request), args.repeat * 10)
+    orjson_parse = with_orjson(True, lambda: timed(lambda: serialization.loads(request), args.repeat * 10))
+    print(f"{'parse tools/call request':<28} {len(request):7d}B  {stdlib_parse * 1e6:8.2f}us "
+          f"{'':>10} {orjson_parse * 1e6:8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Startup Benchmark
+Cold-start timings of the gateway against the stand-in Snowflake connector (tests/fakes)
+with a simulated login latency. Each scenario runs in a fresh process:
+
+    blocking  every backend constructed serially, Snowflake logging in its min_size
+              sessions one after another on the event loop (how startup used to work)
+    eager     registration, then all start() hooks concurrently under the deadline
+    lazy      LAZY_BACKENDS=sm: Snowflake is imported and connects on its first tool call
+
+Reported per scenario: module import, lifespan (until uvicorn would accept connections,
+so /health answers), ready (until /ready turns 200) and the first query_snowflake call.
+
+    python benchmarks/startup.py [--login-ms 800] [--pool-min 2] [--runs 3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("blocking", "eager", "lazy")
+
+
+def child(scenario: str, login_ms: float) -> dict:
+    """One cold start; runs in its own process so module-level config is read fresh"""
+    sys.path.insert(0, os.path.join(ROOT, "tests", "fakes"))
+    sys.path.insert(1, ROOT)
+    import snowflake.connector
+
+    fast_connect = snowflake.connector.connect
+
+    def slow_connect(**kwargs):
+        time.sleep(login_ms / 1000)
+        return fast_connect(**kwargs)
+
+    snowflake.connector.connect = slow_connect
+
+    started = time.perf_counter()
+    import server
+    timings = {"import_ms": (time.perf_counter() - started) * 1000}
+
+    if scenario == "blocking":
+        init_backends = server.init_backends
+
+        def blocking_init():
+            init_backends()
+            # What SnowflakeBackend.__init__ used to do: log in inline, one session at a time
+            pool = server.BACKENDS["sm"].pool
+            for _ in range(pool.min_size):
+                pool._idle.append((pool._connect(), time.monotonic()))
+                pool._size += 1
+                pool.created += 1
+
+        server.init_backends = blocking_init
+
+        async def serial_start(backends=None):
+            for backend in server.BACKENDS.values():
+                if backend is not None and hasattr(backend, "start"):
+                    await backend.start()
+            server.LIFECYCLE.startup_ms = 0.0
+
+        server.LIFECYCLE.start_all = serial_start
+
+    async def main():
+        started = time.perf_counter()
+        async with server.lifespan(server.app):
+            timings["lifespan_ms"] = (time.perf_counter() - started) * 1000
+            while not server.LIFECYCLE.ready():
+                await asyncio.sleep(0.005)
+            timings["ready_ms"] = (time.perf_counter() - started) * 1000
+            call_started = time.perf_counter()
+            result = await server.handle_tool_call("sm_query_snowflake", {"sql": "SELECT 1"})
+            assert result.get("success"), result
+            timings["first_call_ms"] = (time.perf_counter() - call_started) * 1000
+
+    asyncio.run(main())
+    return timings
+
+
+def run_scenario(scenario: str, args) -> dict:
+    env = {**os.environ,
+           "ENABLED_BACKENDS": args.backends,
+           "SNOWFLAKE_PASSWORD": "benchmark",
+           "SNOWFLAKE_POOL_MIN": str(args.pool_min),
+           "HEALTH_PROBE_INTERVAL": "0",
+           "HIVEMIND_SEARCH_ENABLED": "false",
+           "HIVEMIND_TAIL_ENABLED": "false"}
+    if scenario == "lazy":
+        env["LAZY_BACKENDS"] = "sm"
+    output = subprocess.run([sys.executable, __file__, "--child", scenario, "--login-ms", str(args.login_ms)],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--login-ms", type=float, default=800, help="simulated Snowflake login latency")
+    parser.add_argument("--pool-min", type=int, default=2, help="sessions opened at startup")
+    parser.add_argument("--backends", default="*", help="ENABLED_BACKENDS for the runs")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.login_ms)))
+        return
+
+    print(f"login {args.login_ms:g}ms, {args.pool_min} sessions at startup, backends {args.backends!r}, "
+          f"median of {args.runs} runs")
+    print(f"{'scenario':<10} {'import':>10} {'lifespan':>10} {'ready':>10} {'first call':>11}")
+    for scenario in SCENARIOS:
+        runs = [run_scenario(scenario, args) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{scenario:<10} {median['import_ms']:8.1f}ms {median['lifespan_ms']:8.1f}ms "
+              f"{median['ready_ms']:8.1f}ms {median['first_call_ms']:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Gateway Core
+Shared infrastructure used by server.py (tool registry, dispatch helpers)
+"""
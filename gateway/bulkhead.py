@@ -0,0 +1,141 @@
+"""
+Bulkheads
+Per-backend concurrency limits with bounded wait queues, so one slow backend can't take
+every coroutine and connection the gateway has; plus the overall admission limit
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BULKHEAD_MAX_CONCURRENT = int(os.getenv("BULKHEAD_MAX_CONCURRENT", "32"))
+BULKHEAD_MAX_QUEUE = int(os.getenv("BULKHEAD_MAX_QUEUE", "64"))
+BULKHEAD_QUEUE_TIMEOUT = float(os.getenv("BULKHEAD_QUEUE_TIMEOUT", "30"))
+# Per-prefix overrides: "sm=8:16,asana=20:40" (max concurrent:max queued)
+BULKHEAD_LIMITS = os.getenv("BULKHEAD_LIMITS", "")
+GATEWAY_MAX_INFLIGHT = int(os.getenv("GATEWAY_MAX_INFLIGHT", "256"))
+GATEWAY_MAX_QUEUE = int(os.getenv("GATEWAY_MAX_QUEUE", "512"))
+
+RETRY_AFTER_MIN = 0.1
+RETRY_AFTER_MAX = 30.0
+
+
+class BulkheadFull(Exception):
+    """Raised instead of queueing when a bulkhead's queue is full (or the wait timed out)"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is at capacity; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """At most max_concurrent calls in flight and max_queue waiting; beyond that, reject"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int,
+                 queue_timeout: float = BULKHEAD_QUEUE_TIMEOUT):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.in_flight = 0
+        self.queued = 0
+        # EWMA of call duration, for the retry hint
+        self._avg_seconds: Optional[float] = None
+
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_timeouts = 0
+
+    def retry_after(self) -> float:
+        """Roughly how long until the queue ahead of a new caller drains"""
+        avg = self._avg_seconds or 1.0
+        estimate = avg * (self.queued + 1) / self.max_concurrent
+        return round(min(RETRY_AFTER_MAX, max(RETRY_AFTER_MIN, estimate)), 2)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked():
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise BulkheadFull(self.name, self.retry_after())
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                self.queue_timeouts += 1
+                raise BulkheadFull(self.name, self.retry_after()) from None
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.admitted += 1
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            elapsed = time.monotonic() - started
+            self._avg_seconds = elapsed if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_timeouts": self.queue_timeouts,
+            "avg_call_ms": None if self._avg_seconds is None else round(self._avg_seconds * 1000, 2)
+        }
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """"sm=8:16,asana=20" -> {"sm": (8, 16), "asana": (20, BULKHEAD_MAX_QUEUE)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            prefix, values = item.split("=", 1)
+            concurrent, _, queue = values.partition(":")
+            limits[prefix.strip()] = (int(concurrent), int(queue) if queue else BULKHEAD_MAX_QUEUE)
+        except ValueError:
+            logger.warning(f"Ignoring malformed BULKHEAD_LIMITS entry: {item!r}")
+    return limits
+
+
+class BulkheadRegistry:
+    """One bulkhead per backend prefix, created on first use from the configured limits"""
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]]):
+        self.limits = limits
+        self._bulkheads: Dict[str, Bulkhead] = {}
+
+    def get(self, prefix: str) -> Bulkhead:
+        bulkhead = self._bulkheads.get(prefix)
+        if bulkhead is None:
+            concurrent, queue = self.limits.get(prefix, (BULKHEAD_MAX_CONCURRENT, BULKHEAD_MAX_QUEUE))
+            bulkhead = self._bulkheads[prefix] = Bulkhead(prefix, concurrent, queue)
+        return bulkhead
+
+    def stats(self, prefix: str) -> Optional[Dict]:
+        bulkhead = self._bulkheads.get(prefix)
+        return bulkhead.stats() if bulkhead is not None else None
+
+
+def bulkheads_from_env() -> BulkheadRegistry:
+    return BulkheadRegistry(parse_limits(BULKHEAD_LIMITS))
+
+
+def admission_from_env() -> Bulkhead:
+    return Bulkhead("gateway", GATEWAY_MAX_INFLIGHT, GATEWAY_MAX_QUEUE)
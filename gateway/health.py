@@ -0,0 +1,253 @@
+"""
+Backend Health
+Circuit breakers per backend prefix (closed/open/half-open on error rate and latency) and a
+background prober that exercises each backend's health_check()
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+# Calls slower than this count as failures even if they eventually succeed
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "20"))
+# Per-prefix overrides, "sm=150,asana=20"; Snowflake-backed ones sit above the 120s query timeout
+BREAKER_SLOW_CALL_LIMITS = os.getenv("BREAKER_SLOW_CALL_LIMITS", "sm=150,hivemind=150")
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_CALLS = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "1"))
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+# Consecutive failed probes before the breaker opens; one blip shouldn't shed all traffic
+HEALTH_PROBE_FAILURES = int(os.getenv("HEALTH_PROBE_FAILURES", "3"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProbeSkipped(Exception):
+    """Raised by health_check() when it could not probe without getting in the way of traffic"""
+
+
+def _iso(wall: Optional[float]) -> Optional[str]:
+    return None if wall is None else datetime.utcfromtimestamp(wall).isoformat() + "Z"
+
+
+class CircuitBreaker:
+    """Sliding window over the last `window` calls; opens when the failure share crosses the threshold"""
+
+    def __init__(self, name: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+                 open_seconds: float = BREAKER_OPEN_SECONDS, half_open_calls: int = BREAKER_HALF_OPEN_CALLS,
+                 probe_failures: int = HEALTH_PROBE_FAILURES):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self.probe_failures = max(1, probe_failures)
+        self.state = CLOSED
+        self._window: deque = deque(maxlen=max(1, window))
+        self._open_until = 0.0
+        self._trials = 0
+        self._failed_probes = 0
+
+        self.opened = 0
+        self.short_circuited = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.last_probe_at: Optional[float] = None
+        self.last_probe_ok: Optional[bool] = None
+        self.last_probe_ms: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Whether a call may go through; in half-open, only a few trial calls at a time"""
+        if self.state == OPEN:
+            if time.monotonic() < self._open_until:
+                self.short_circuited += 1
+                return False
+            self.state = HALF_OPEN
+            self._trials = 0
+        if self.state == HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                self.short_circuited += 1
+                return False
+            self._trials += 1
+        return True
+
+    def retry_after(self) -> float:
+        return round(max(0.0, self._open_until - time.monotonic()), 2) or 1.0
+
+    def record(self, ok: bool, duration: float, error: Optional[str] = None):
+        failed = not ok or duration >= self.slow_call_seconds
+        if failed:
+            self.last_error = error or f"slow call ({duration:.1f}s)"
+            self.last_error_at = time.time()
+        else:
+            self.last_success_at = time.time()
+
+        if self.state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+            if failed:
+                self._open()
+            else:
+                self._close()
+            return
+        self._window.append(failed)
+        if self.state == CLOSED and len(self._window) >= self.min_calls \
+                and sum(self._window) / len(self._window) >= self.failure_rate:
+            self._open()
+
+    def release(self):
+        """A call ended without an outcome (e.g. cancelled): give back its trial slot"""
+        if self.state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+
+    def record_probe(self, ok: bool, duration: float, error: Optional[str] = None):
+        self.last_probe_at = time.time()
+        self.last_probe_ok = ok
+        self.last_probe_ms = round(duration * 1000, 2)
+        if not ok:
+            self._failed_probes += 1
+            self.last_error = f"health probe: {error}"
+            self.last_error_at = self.last_probe_at
+            if self.state != OPEN and self._failed_probes >= self.probe_failures:
+                self._open()
+            return
+        self._failed_probes = 0
+        if self.state == OPEN:
+            # Let real traffic confirm recovery instead of waiting out the full open period
+            self.state = HALF_OPEN
+            self._trials = 0
+
+    def _open(self):
+        if self.state != OPEN:
+            self.opened += 1
+            logger.warning(f"Circuit for {self.name} opened: {self.last_error}")
+        self.state = OPEN
+        self._open_until = time.monotonic() + self.open_seconds
+
+    def _close(self):
+        logger.info(f"Circuit for {self.name} closed")
+        self.state = CLOSED
+        self._window.clear()
+
+    def health(self) -> str:
+        if self.state == OPEN:
+            return "UNAVAILABLE"
+        if self.state == HALF_OPEN or self.last_probe_ok is False or any(self._window):
+            return "DEGRADED"
+        return "HEALTHY"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failure_rate": round(sum(self._window) / len(self._window), 3) if self._window else 0.0,
+            "window_calls": len(self._window),
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+            "retry_after_seconds": self.retry_after() if self.state == OPEN else None,
+            "last_error": self.last_error,
+            "last_error_at": _iso(self.last_error_at),
+            "last_success_at": _iso(self.last_success_at),
+            "last_probe_at": _iso(self.last_probe_at),
+            "last_probe_ok": self.last_probe_ok,
+            "last_probe_ms": self.last_probe_ms,
+            "failed_probes": self._failed_probes,
+            "slow_call_seconds": self.slow_call_seconds
+        }
+
+
+def parse_slow_calls(spec: str) -> Dict[str, float]:
+    """"sm=150,asana=20" -> {"sm": 150.0, "asana": 20.0}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            prefix, seconds = item.split("=", 1)
+            limits[prefix.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring malformed BREAKER_SLOW_CALL_LIMITS entry: {item!r}")
+    return limits
+
+
+class BreakerRegistry:
+    """One breaker per backend prefix, created on first use with that prefix's slow-call limit"""
+
+    def __init__(self, slow_calls: Optional[Dict[str, float]] = None):
+        self.slow_calls = slow_calls or {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, prefix: str) -> CircuitBreaker:
+        breaker = self._breakers.get(prefix)
+        if breaker is None:
+            breaker = self._breakers[prefix] = CircuitBreaker(
+                prefix, slow_call_seconds=self.slow_calls.get(prefix, BREAKER_SLOW_CALL_SECONDS))
+        return breaker
+
+    def peek(self, prefix: str) -> Optional[CircuitBreaker]:
+        return self._breakers.get(prefix)
+
+
+def breakers_from_env() -> BreakerRegistry:
+    return BreakerRegistry(parse_slow_calls(BREAKER_SLOW_CALL_LIMITS))
+
+
+class HealthProber:
+    """Periodically calls health_check() on every backend that has one"""
+
+    def __init__(self, backends: Callable[[], Dict[str, Any]], breakers: BreakerRegistry,
+                 interval: float = HEALTH_PROBE_INTERVAL, timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.backends = backends
+        self.breakers = breakers
+        self.interval = interval
+        self.timeout = timeout
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="health-prober")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        probes = [self.probe(prefix, backend) for prefix, backend in self.backends().items()
+                  if backend is not None and hasattr(backend, "health_check")]
+        await asyncio.gather(*probes)
+
+    async def probe(self, prefix: str, backend):
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(backend.health_check(), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except ProbeSkipped as e:
+            logger.debug(f"Skipped health probe for {prefix}: {e}")
+        except asyncio.TimeoutError:
+            self.breakers.get(prefix).record_probe(False, time.monotonic() - started,
+                                                   f"timed out after {self.timeout}s")
+        except Exception as e:
+            self.breakers.get(prefix).record_probe(False, time.monotonic() - started, str(e))
+        else:
+            self.breakers.get(prefix).record_probe(True, time.monotonic() - started)
@@ -0,0 +1,154 @@
+"""
+Backend Lifecycle
+Constructing a backend is cheap registration; anything that touches the network happens in
+its async start(). Eager backends start concurrently under a startup deadline; deferred ones
+are imported, constructed and started on their first tool call.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+STARTUP_DEADLINE_SECONDS = float(os.getenv("STARTUP_DEADLINE_SECONDS", "10"))
+# Prefixes whose start() waits for the first call: "vertex,gemini", or "*" for all of them
+LAZY_BACKENDS = os.getenv("LAZY_BACKENDS", "")
+
+REGISTERED = "registered"
+DEFERRED = "deferred"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+def parse_prefixes(spec: str) -> Set[str]:
+    return {part.strip() for part in spec.split(",") if part.strip()}
+
+
+class BackendLifecycle:
+    """Start state per backend prefix, and the task running each backend's start()"""
+
+    def __init__(self, deadline: float = STARTUP_DEADLINE_SECONDS, lazy: Optional[Set[str]] = None):
+        self.deadline = deadline
+        self.lazy = lazy or set()
+        self.states: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.start_ms: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.startup_ms: Optional[float] = None
+
+    def is_lazy(self, prefix: str) -> bool:
+        return "*" in self.lazy or prefix in self.lazy
+
+    def register(self, prefix: str):
+        """A new backend instance was constructed; it has not been started"""
+        self.reset(prefix)
+        self.states[prefix] = REGISTERED
+
+    def defer(self, prefix: str):
+        """A lazy backend left unimported until its first use"""
+        self.reset(prefix)
+        self.states[prefix] = DEFERRED
+
+    def reset(self, prefix: str):
+        task = self._tasks.pop(prefix, None)
+        if task is not None and not task.done():
+            task.cancel()
+        self.states.pop(prefix, None)
+        self.errors.pop(prefix, None)
+        self.start_ms.pop(prefix, None)
+
+    def is_started(self, prefix: str) -> bool:
+        """Hot-path check: True once start() has finished, whatever the outcome"""
+        state = self.states.get(prefix)
+        return state == READY or state == FAILED
+
+    def ensure_started(self, prefix: str, backend: Any) -> asyncio.Task:
+        task = self._tasks.get(prefix)
+        if task is None:
+            task = self._tasks[prefix] = asyncio.create_task(self._start(prefix, backend), name=f"start-{prefix}")
+        return task
+
+    async def wait_started(self, prefix: str, backend: Any):
+        """Start a deferred backend, or wait for one still connecting. Shielded so a caller
+        that gives up doesn't cancel a start() other callers are waiting on."""
+        await asyncio.shield(self.ensure_started(prefix, backend))
+
+    async def _start(self, prefix: str, backend: Any):
+        self.states[prefix] = STARTING
+        started = time.monotonic()
+        try:
+            if hasattr(backend, "start"):
+                await backend.start()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.states[prefix] = FAILED
+            self.errors[prefix] = str(e)
+            logger.error(f"Error starting {prefix}: {e}")
+        else:
+            self.states[prefix] = READY
+        finally:
+            self.start_ms[prefix] = round((time.monotonic() - started) * 1000, 2)
+
+    async def start_all(self, backends: Dict[str, Any]):
+        """Start every eager backend at once; whatever misses the deadline keeps connecting in the background"""
+        started = time.monotonic()
+        tasks = []
+        for prefix, backend in backends.items():
+            if backend is None:
+                continue
+            if self.is_lazy(prefix):
+                self.states[prefix] = DEFERRED
+                continue
+            tasks.append(self.ensure_started(prefix, backend))
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.deadline)
+            if pending:
+                logger.warning(f"Still starting after {self.deadline}s, continuing in the background: "
+                               f"{', '.join(self.pending())}")
+        self.startup_ms = round((time.monotonic() - started) * 1000, 2)
+        logger.info(f"Backends started in {self.startup_ms}ms")
+
+    async def cancel_all(self):
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def pending(self) -> List[str]:
+        return [prefix for prefix, state in self.states.items() if state == STARTING]
+
+    def failed(self) -> List[str]:
+        return [prefix for prefix, state in self.states.items() if state == FAILED]
+
+    def deferred(self) -> List[str]:
+        return [prefix for prefix, state in self.states.items() if state == DEFERRED]
+
+    def ready(self) -> bool:
+        """Startup has run and no eager backend is still connecting"""
+        return self.startup_ms is not None and all(self.is_lazy(prefix) for prefix in self.pending())
+
+    def stats(self, prefix: str) -> Dict:
+        return {
+            "state": self.states.get(prefix, REGISTERED),
+            "start_ms": self.start_ms.get(prefix),
+            "error": self.errors.get(prefix)
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "ready": self.ready(),
+            "startup_ms": self.startup_ms,
+            "deadline_seconds": self.deadline,
+            "starting": self.pending(),
+            "failed": self.failed(),
+            "deferred": self.deferred()
+        }
+
+
+def lifecycle_from_env() -> BackendLifecycle:
+    return BackendLifecycle(STARTUP_DEADLINE_SECONDS, parse_prefixes(LAZY_BACKENDS))
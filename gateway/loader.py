@@ -0,0 +1,102 @@
+"""
+Backend Loader
+Backends are registered by "module:Class" path and imported only when enabled (lazy ones
+only on first use), so a worker doesn't pay for SDKs it never uses. Records what each import
+cost in time and resident memory.
+"""
+
+import importlib
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated prefixes to load, or "*" for all of them
+ENABLED_BACKENDS = os.getenv("ENABLED_BACKENDS", "*")
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, where /proc is available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def parse_enabled(spec: str) -> Optional[Set[str]]:
+    """None means every registered backend is enabled"""
+    prefixes = {part.strip() for part in spec.split(",") if part.strip()}
+    return None if not prefixes or "*" in prefixes else prefixes
+
+
+class BackendLoader:
+    """Resolves registered "module:Class" paths for the enabled prefixes, on demand"""
+
+    def __init__(self, registry: List[Tuple[str, str]], enabled: Optional[Set[str]] = None):
+        self.registry = dict(registry)
+        self.order = [prefix for prefix, _ in registry]
+        self.enabled = enabled
+        self.imports: Dict[str, Dict] = {}
+        self._classes: Dict[str, type] = {}
+        if enabled is not None:
+            unknown = enabled - set(self.registry)
+            if unknown:
+                logger.warning(f"ENABLED_BACKENDS names unknown backends: {', '.join(sorted(unknown))}")
+
+    def is_enabled(self, prefix: str) -> bool:
+        return prefix in self.registry and (self.enabled is None or prefix in self.enabled)
+
+    def enabled_prefixes(self) -> List[str]:
+        return [prefix for prefix in self.order if self.is_enabled(prefix)]
+
+    def load(self, prefix: str) -> type:
+        """Import the backend's module (once) and return its class"""
+        backend_class = self._classes.get(prefix)
+        if backend_class is not None:
+            return backend_class
+        module_name, _, class_name = self.registry[prefix].partition(":")
+        # Modules shared by several backends (stubs) are only charged to the first one
+        cached = module_name in sys.modules
+        modules_before = len(sys.modules)
+        rss_before = rss_bytes()
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+            backend_class = getattr(module, class_name)
+        except Exception as e:
+            self.imports[prefix] = {"module": module_name, "error": f"{type(e).__name__}: {e}"}
+            raise
+        elapsed = time.perf_counter() - started
+        rss_after = rss_bytes()
+        self.imports[prefix] = {
+            "module": module_name,
+            "cached": cached,
+            "import_ms": round(elapsed * 1000, 2),
+            "rss_delta_bytes": None if rss_before is None or rss_after is None else rss_after - rss_before,
+            "modules_added": len(sys.modules) - modules_before
+        }
+        self._classes[prefix] = backend_class
+        return backend_class
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled_prefixes(),
+            "disabled": [prefix for prefix in self.order if not self.is_enabled(prefix)],
+            "imports": self.imports,
+            "total_import_ms": round(sum(i.get("import_ms", 0) for i in self.imports.values()), 2),
+            "rss_bytes": rss_bytes(),
+            "modules_loaded": len(sys.modules)
+        }
+
+
+def loader_from_env(registry: List[Tuple[str, str]]) -> BackendLoader:
+    return BackendLoader(registry, parse_enabled(ENABLED_BACKENDS))
@@ -0,0 +1,235 @@
+"""
+Metrics
+Counters, gauges and histograms rendered in the Prometheus text format for /metrics. Labelled
+children are created once and cached, so recording on the hot path is a dict lookup plus an
+increment. Values are per worker process.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds: tool calls and upstream requests range from cache hits to multi-minute queries
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, object] = {}
+        if not self.labelnames:
+            # Unlabelled metrics are exported from the start, not from first use
+            self.labels()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child holding one label combination's value"""
+        pass
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def clear(self):
+        """Drop every child, for gauges rebuilt from current state at each scrape"""
+        self._children.clear()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # Non-cumulative counts here; render() accumulates them
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, child.counts):
+            cumulative += count
+            le = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        inf = _format_labels(self.labelnames, values, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{inf} {child.count}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS = MetricsRegistry()
+
+# Tool calls (handle_tool_call)
+TOOL_CALLS = METRICS.counter("gateway_tool_calls_total", "Tool calls received", ("backend", "tool"))
+TOOL_ERRORS = METRICS.counter(
+    "gateway_tool_errors_total",
+    "Tool calls that failed, by kind: exception, error (error result), unavailable, rejected, circuit_open",
+    ("backend", "tool", "kind"))
+TOOL_LATENCY = METRICS.histogram("gateway_tool_call_duration_seconds",
+                                 "Tool call time in the backend, excluding bulkhead queueing", ("backend", "tool"))
+TOOL_IN_FLIGHT = METRICS.gauge("gateway_tool_calls_in_flight", "Tool calls executing in a backend", ("backend",))
+TOOL_RESPONSE_BYTES = METRICS.histogram("gateway_tool_response_bytes", "Encoded tool result size",
+                                        ("backend", "tool"), SIZE_BUCKETS)
+
+# Transport (mcp_endpoint)
+MCP_REQUESTS = METRICS.counter("gateway_mcp_requests_total", "POST /mcp requests", ("method", "status"))
+MCP_LATENCY = METRICS.histogram("gateway_mcp_request_duration_seconds",
+                                "POST /mcp time to response (start of stream for streamed replies)", ("method",))
+MCP_IN_FLIGHT = METRICS.gauge("gateway_mcp_requests_in_flight", "POST /mcp requests being handled")
+
+# Upstream clients
+UPSTREAM_LATENCY = METRICS.histogram("gateway_upstream_request_duration_seconds",
+                                     "HTTP requests to upstream APIs, per attempt", ("upstream", "method", "status"))
+SNOWFLAKE_LATENCY = METRICS.histogram("gateway_snowflake_statement_duration_seconds",
+                                      "Snowflake statements including engine queueing", ("outcome",))
+SNOWFLAKE_POOL_WAIT = METRICS.histogram("gateway_snowflake_pool_wait_seconds",
+                                        "Time to check a connection out of the Snowflake pool")
+
+# Refreshed from current state on each scrape (server.metrics_endpoint)
+BREAKER_OPEN = METRICS.gauge("gateway_backend_circuit_open", "1 while the backend's circuit breaker is open",
+                             ("backend",))
+BULKHEAD_QUEUED = METRICS.gauge("gateway_bulkhead_queued", "Calls waiting for a backend bulkhead slot", ("backend",))
+SESSIONS_ACTIVE = METRICS.gauge("gateway_sessions_active", "Streamable HTTP sessions held by this worker")
+
+
+class ToolMetrics:
+    """One tool's labelled children, resolved once so a call records without label lookups"""
+
+    __slots__ = ("backend", "tool", "calls", "latency", "in_flight", "response_bytes")
+
+    def __init__(self, backend: str, tool: str):
+        self.backend = backend
+        self.tool = tool
+        self.calls = TOOL_CALLS.labels(backend, tool)
+        self.latency = TOOL_LATENCY.labels(backend, tool)
+        self.in_flight = TOOL_IN_FLIGHT.labels(backend)
+        self.response_bytes = TOOL_RESPONSE_BYTES.labels(backend, tool)
+
+    def error(self, kind: str):
+        TOOL_ERRORS.labels(self.backend, self.tool, kind).inc()
+
+
+_tools: Dict[str, ToolMetrics] = {}
+
+
+def tool_metrics(backend: str, tool: str) -> ToolMetrics:
+    metrics = _tools.get(tool)
+    if metrics is None:
+        metrics = _tools[tool] = ToolMetrics(backend, tool)
+    return metrics
+
+
+def known_tool_metrics(tool: str) -> Optional[ToolMetrics]:
+    """Metrics for a tool that has been called, without creating series for unknown names"""
+    return _tools.get(tool)
@@ -0,0 +1,46 @@
+"""
+Progress Reporting
+Lets tool code report progress without knowing about the transport. server.py binds a
+reporter for calls whose client sent a progressToken; everywhere else reporting is a no-op.
+"""
+
+import contextvars
+from typing import Callable, Optional
+
+_reporter: contextvars.ContextVar[Optional[Callable]] = contextvars.ContextVar("progress_reporter", default=None)
+
+
+class ProgressReporter:
+    """Turns report() calls into notifications/progress messages for one request"""
+
+    def __init__(self, token, emit: Callable[[dict], None]):
+        self.token = token
+        self.emit = emit
+        self.value = None
+
+    def __call__(self, progress: float, total: Optional[float] = None, message: Optional[str] = None):
+        # The spec requires progress to increase with every notification
+        if self.value is not None and progress <= self.value:
+            return
+        self.value = progress
+        params = {"progressToken": self.token, "progress": progress}
+        if total is not None:
+            params["total"] = total
+        if message:
+            params["message"] = message
+        self.emit({"jsonrpc": "2.0", "method": "notifications/progress", "params": params})
+
+
+def bind(reporter: Optional[Callable]) -> contextvars.Token:
+    return _reporter.set(reporter)
+
+
+def unbind(token: contextvars.Token):
+    _reporter.reset(token)
+
+
+def report_progress(progress: float, total: Optional[float] = None, message: Optional[str] = None):
+    """Report progress of the current tool call, if anyone is listening"""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter(progress, total, message)
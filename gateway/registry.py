@@ -0,0 +1,69 @@
+"""
+Tool Registry
+Immutable, versioned snapshot of the prefixed tool catalog and dispatch index
+"""
+
+import hashlib
+import itertools
+import logging
+from functools import partial
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gateway.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+_versions = itertools.count(1)
+
+
+class ToolRegistry:
+    """Catalog built once from the live backends; rebuilt only on (re)initialization"""
+
+    def __init__(self, backends: Dict[str, Any], meta_tools: List[Dict]):
+        tools = [dict(tool) for tool in meta_tools]
+        handlers = {}
+        tool_counts = {}
+        errors = {}
+
+        for prefix, backend in backends.items():
+            if backend is None:
+                continue
+            try:
+                backend_tools = backend.get_tools()
+            except Exception as e:
+                logger.error(f"Error getting tools from {prefix}: {e}")
+                errors[prefix] = str(e)
+                continue
+            for tool in backend_tools:
+                full_name = f"{prefix}_{tool['name']}"
+                tools.append({**tool, "name": full_name})
+                handlers[full_name] = (prefix, partial(backend.call_tool, tool["name"]))
+            tool_counts[prefix] = len(backend_tools)
+
+        self.tools: Tuple[Dict, ...] = tuple(tools)
+        self.handlers = MappingProxyType(handlers)
+        self.tool_counts = MappingProxyType(tool_counts)
+        self.errors = MappingProxyType(errors)
+
+        # Pre-serialized once; tools/list responses splice this in verbatim
+        self.tools_json: bytes = dumps(tools)
+        self.etag = f'"{hashlib.sha256(self.tools_json).hexdigest()[:16]}"'
+        self.version = next(_versions)
+        self.tools_endpoint_body: bytes = (
+            b'{"tools":' + self.tools_json + b',"total_tools":' + str(len(tools)).encode() + b"}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.tools)
+
+    def lookup(self, name: str) -> Optional[Tuple[str, Callable]]:
+        """Return (prefix, bound handler) for a full tool name"""
+        return self.handlers.get(name)
+
+    def tools_list_response(self, msg_id: Any) -> bytes:
+        """Encode a JSON-RPC tools/list response without re-serializing the catalog"""
+        return (
+            b'{"jsonrpc":"2.0","id":' + dumps(msg_id)
+            + b',"result":{"tools":' + self.tools_json + b"}}"
+        )
@@ -0,0 +1,173 @@
+"""
+Serialization
+JSON encode/decode for the transport: orjson when installed, stdlib json otherwise, plus
+helpers that splice pre-encoded tool results into JSON-RPC envelopes. Large tool results are
+encoded piece by piece while they are sent, so the first bytes leave before the whole result
+has been serialized.
+"""
+
+import json
+import os
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+BACKEND = "orjson" if ORJSON_AVAILABLE else "json"
+
+# A result holding a list this long, or a string this long, is streamed rather than encoded whole
+STREAM_MIN_ITEMS = int(os.getenv("MCP_STREAM_MIN_ITEMS", "1000"))
+STREAM_MIN_CHARS = int(os.getenv("MCP_STREAM_MIN_CHARS", str(256 * 1024)))
+# Streamed results are encoded this many list items, or string characters, at a time...
+STREAM_PIECE_ITEMS = 200
+STREAM_PIECE_CHARS = 64 * 1024
+# ...and written out in chunks of about this many bytes
+STREAM_CHUNK_BYTES = int(os.getenv("MCP_STREAM_CHUNK_BYTES", str(64 * 1024)))
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _dumps_stdlib(obj: Any) -> bytes:
+    return json.dumps(obj, default=str, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to UTF-8 JSON bytes; unknown types fall back to str() like json.dumps(default=str)"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which stdlib json handles
+            pass
+    return _dumps_stdlib(obj)
+
+
+def loads(data: Any) -> Any:
+    """Decode bytes or str; raises ValueError on malformed input with either backend"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class EncodedMessage:
+    """A JSON-RPC message that is already bytes, so it is never walked or encoded again"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class StreamedMessage:
+    """
+    A tools/call response too large to encode up front. chunks() encodes the result as it is
+    iterated; the text content has every newline escaped, so the chunks can also be written
+    as one SSE data line. on_complete, if set, gets the total size once the last chunk is out.
+    """
+
+    __slots__ = ("msg_id", "result", "on_complete")
+
+    def __init__(self, msg_id: Any, result: Any):
+        self.msg_id = msg_id
+        self.result = result
+        self.on_complete: Optional[Callable[[int], None]] = None
+
+    def chunks(self, chunk_bytes: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        head = b'{"jsonrpc":"2.0","id":' + dumps(self.msg_id) + b',"result":{"content":[{"type":"text","text":"'
+        yield head
+        size = len(head)
+        buffer, buffered = [], 0
+        for piece in _pieces(self.result):
+            escaped = _escape(piece)
+            buffer.append(escaped)
+            buffered += len(escaped)
+            if buffered >= chunk_bytes:
+                yield b"".join(buffer)
+                size += buffered
+                buffer, buffered = [], 0
+        buffer.append(b'"}]}}')
+        yield b"".join(buffer)
+        if self.on_complete is not None:
+            self.on_complete(size + buffered + 5)
+
+
+def _text(value: Any) -> str:
+    """value as JSON text, the way tool results are rendered into text content"""
+    if ORJSON_AVAILABLE:
+        return dumps(value).decode("utf-8")
+    return json.dumps(value, default=str, separators=(",", ":"))
+
+
+def _escape(text: str) -> bytes:
+    """text as the inside of a JSON string literal"""
+    if ORJSON_AVAILABLE:
+        return dumps(text)[1:-1]
+    return json.dumps(text).encode("ascii")[1:-1]
+
+
+def _pieces(value: Any) -> Iterator[str]:
+    """_text(value) in consecutive pieces, splitting long lists and strings"""
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            yield ("," if i else "") + _text(key) + ":"
+            yield from _pieces(item)
+        yield "}"
+    elif isinstance(value, (list, tuple)) and len(value) > STREAM_PIECE_ITEMS:
+        yield "["
+        for start in range(0, len(value), STREAM_PIECE_ITEMS):
+            yield ("," if start else "") + _text(list(value[start:start + STREAM_PIECE_ITEMS]))[1:-1]
+        yield "]"
+    elif isinstance(value, str) and len(value) > STREAM_PIECE_CHARS:
+        yield '"'
+        for start in range(0, len(value), STREAM_PIECE_CHARS):
+            yield _text(value[start:start + STREAM_PIECE_CHARS])[1:-1]
+        yield '"'
+    else:
+        yield _text(value)
+
+
+def _large(value: Any, depth: int = 2) -> bool:
+    if isinstance(value, str):
+        return len(value) >= STREAM_MIN_CHARS
+    if isinstance(value, (list, tuple)):
+        return len(value) >= STREAM_MIN_ITEMS
+    if isinstance(value, dict) and depth:
+        return any(_large(item, depth - 1) for item in value.values())
+    return False
+
+
+def tool_result_message(msg_id: Any, result: Any):
+    """
+    tools/call response with the result as text content: an EncodedMessage, or for large
+    results a StreamedMessage. The result is encoded once; the envelope around it is fixed
+    bytes rather than a dict that would be serialized again.
+    """
+    if _large(result):
+        return StreamedMessage(msg_id, result)
+    if ORJSON_AVAILABLE:
+        text = dumps(dumps(result).decode("utf-8"))
+    else:
+        # Stay in str and escape to ASCII, as json.dumps(default=str) always did: no bytes round
+        # trip, and the ASCII-only output needs no UTF-8 encoding pass
+        text = json.dumps(json.dumps(result, default=str, separators=(",", ":"))).encode("ascii")
+    return EncodedMessage(
+        b'{"jsonrpc":"2.0","id":' + dumps(msg_id)
+        + b',"result":{"content":[{"type":"text","text":' + text + b"}]}}"
+    )
+
+
+def encode_message(message: Any) -> bytes:
+    """Encode a message, an EncodedMessage, a StreamedMessage or a batch list of them"""
+    if isinstance(message, EncodedMessage):
+        return message.data
+    if isinstance(message, StreamedMessage):
+        return b"".join(message.chunks())
+    if isinstance(message, list):
+        return b"[" + b",".join(encode_message(m) for m in message) + b"]"
+    return dumps(message)
@@ -0,0 +1,126 @@
+"""
+MCP Sessions
+Session bookkeeping for the Streamable HTTP transport: ids handed out at initialize, plus a
+queue per session for server-initiated messages delivered over GET /mcp. With a shared store,
+session ids are recorded there too, so a request can land on any worker.
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    __slots__ = ("id", "protocol_version", "created_at", "last_seen", "shared_at", "queue", "streams")
+
+    def __init__(self, session_id: str, protocol_version: str, queue_size: int):
+        self.id = session_id
+        self.protocol_version = protocol_version
+        self.created_at = time.monotonic()
+        self.last_seen = self.created_at
+        self.shared_at = self.created_at
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.streams = 0
+
+
+class SessionStore:
+    """In-process sessions, expired after `ttl` seconds without a request"""
+
+    def __init__(self, ttl: float, queue_size: int = 100, shared=None):
+        self.ttl = ttl
+        self.queue_size = queue_size
+        self.shared = shared
+        self._sessions: Dict[str, Session] = {}
+        self.created = 0
+        self.adopted = 0
+        self.expired = 0
+        self.dropped_messages = 0
+
+    def create(self, protocol_version: str) -> Session:
+        self._expire()
+        session = Session(secrets.token_urlsafe(24), protocol_version, self.queue_size)
+        self._sessions[session.id] = session
+        self.created += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.last_seen > self.ttl and not session.streams:
+            self._sessions.pop(session_id, None)
+            self.expired += 1
+            return None
+        session.last_seen = now
+        return session
+
+    def close(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    async def share(self, session: Session):
+        """Record a new session in the shared store"""
+        if self.shared is not None:
+            await self.shared.set(f"session:{session.id}", session.protocol_version, self.ttl)
+
+    async def resolve(self, session_id: str) -> Optional[Session]:
+        """get(), falling back to sessions another worker created"""
+        session = self.get(session_id)
+        if self.shared is None:
+            return session
+        if session is None:
+            protocol_version = await self.shared.get(f"session:{session_id}")
+            if protocol_version is None:
+                return None
+            session = Session(session_id, protocol_version, self.queue_size)
+            self._sessions[session_id] = session
+            self.adopted += 1
+        elif session.last_seen - session.shared_at > self.ttl / 4:
+            # Refresh the shared expiry now and then rather than on every request
+            await self.share(session)
+            session.shared_at = session.last_seen
+        return session
+
+    async def discard(self, session_id: str) -> bool:
+        """close(), everywhere"""
+        closed = self.close(session_id)
+        if self.shared is not None:
+            closed = await self.shared.delete(f"session:{session_id}") or closed
+        return closed
+
+    def broadcast(self, message: dict):
+        """Queue a server-initiated message for every session with an open GET stream"""
+        for session in self:
+            if not session.streams:
+                continue
+            try:
+                session.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.dropped_messages += 1
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        stale = [sid for sid, s in self._sessions.items() if s.last_seen < cutoff and not s.streams]
+        for sid in stale:
+            del self._sessions[sid]
+        self.expired += len(stale)
+
+    def __iter__(self) -> Iterator[Session]:
+        return iter(list(self._sessions.values()))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self._sessions),
+            "streams": sum(s.streams for s in self._sessions.values()),
+            "created": self.created,
+            "adopted": self.adopted,
+            "expired": self.expired,
+            "dropped_messages": self.dropped_messages
+        }
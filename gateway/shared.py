@@ -0,0 +1,223 @@
+"""
+Shared State
+Cross-worker state for multi-process deployments, kept in a Redis-compatible store (Redis,
+Valkey, KeyDB, Dragonfly): session ids, rate-limit buckets, and events every worker applies
+locally (cache invalidations, HiveMind pending writes). With SHARED_STATE_URL unset, each
+worker keeps its state to itself, which is exact for a single worker.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import secrets
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from gateway.serialization import dumps, loads
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "")
+# Namespace for every key and channel, so several gateways can share one store
+SHARED_STATE_PREFIX = os.getenv("SHARED_STATE_PREFIX", "sm-gateway:")
+SHARED_STATE_TIMEOUT = float(os.getenv("SHARED_STATE_TIMEOUT", "0.5"))
+SHARED_EVENT_QUEUE = int(os.getenv("SHARED_EVENT_QUEUE", "1000"))
+RECONNECT_DELAY = 1.0
+
+# Token bucket in a hash, refilled on read. KEYS: bucket, pause marker.
+# ARGV: rate per second, capacity, cost, now in ms. Returns ms to wait (0 when granted).
+TOKEN_BUCKET_SCRIPT = """
+local paused = redis.call('PTTL', KEYS[2])
+if paused > 0 then
+    return paused
+end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate / 1000)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class SharedStore:
+    """
+    Thin async wrapper over the store. Every operation fails open: on a store error it
+    returns None (or does nothing) and callers fall back to their per-worker state.
+    """
+
+    def __init__(self, url: str, prefix: str = SHARED_STATE_PREFIX, timeout: float = SHARED_STATE_TIMEOUT):
+        self.prefix = prefix
+        self.channel = f"{prefix}events"
+        # Tells this worker's own events apart from everyone else's
+        self.worker_id = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._redis = aioredis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._token_bucket = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._handlers: Dict[str, List[Callable]] = {}
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=SHARED_EVENT_QUEUE)
+        self._tasks: List[asyncio.Task] = []
+
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.published = 0
+        self.received = 0
+        self.dropped_events = 0
+
+    def _failed(self, operation: str, e: Exception):
+        self.errors += 1
+        self.last_error = f"{operation}: {e}"
+        logger.warning(f"Shared state {operation} failed, using local state: {e}")
+
+    async def get(self, name: str) -> Optional[Any]:
+        try:
+            data = await self._redis.get(self.prefix + name)
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        return None if data is None else loads(data)
+
+    async def set(self, name: str, value: Any, ttl: float) -> bool:
+        try:
+            await self._redis.set(self.prefix + name, dumps(value), px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            self._failed("set", e)
+            return False
+        return True
+
+    async def delete(self, name: str) -> bool:
+        try:
+            return bool(await self._redis.delete(self.prefix + name))
+        except Exception as e:
+            self._failed("delete", e)
+            return False
+
+    async def take_tokens(self, name: str, rate: float, capacity: float, cost: float) -> Optional[float]:
+        """Seconds to wait before retrying (0 when the tokens were taken), or None if the store is down"""
+        key = self.prefix + name
+        try:
+            wait_ms = await self._token_bucket(keys=[key, key + ":paused"],
+                                               args=[rate, capacity, cost, int(time.time() * 1000)])
+        except Exception as e:
+            self._failed("take_tokens", e)
+            return None
+        return int(wait_ms) / 1000
+
+    async def pause(self, name: str, seconds: float):
+        """Hold back every worker drawing on the bucket (e.g. after a 429 with Retry-After)"""
+        if seconds > 0:
+            await self.set(f"{name}:paused", 1, seconds)
+
+    def subscribe(self, event: str, handler: Callable[[Any], Any]):
+        """Run handler(data) for every `event` published by another worker; may be async"""
+        self._handlers.setdefault(event, []).append(handler)
+
+    def publish_nowait(self, event: str, data: Any):
+        """Queue an event for the other workers without waiting on the store"""
+        try:
+            self._outbox.put_nowait((event, data))
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._send_events(), name="shared-state-publish"),
+                           asyncio.create_task(self._receive_events(), name="shared-state-subscribe")]
+
+    async def aclose(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._redis.aclose()
+
+    async def _send_events(self):
+        while True:
+            event, data = await self._outbox.get()
+            message = dumps({"event": event, "origin": self.worker_id, "data": data})
+            try:
+                await self._redis.publish(self.channel, message)
+                self.published += 1
+            except Exception as e:
+                self._failed("publish", e)
+
+    async def _receive_events(self):
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    await self._dispatch(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Events missed while disconnected are covered by the caches' TTLs
+                self._failed("subscribe", e)
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                await pubsub.aclose()
+
+    async def _dispatch(self, raw):
+        try:
+            message = loads(raw)
+        except (TypeError, ValueError):
+            return
+        if message.get("origin") == self.worker_id:
+            return
+        self.received += 1
+        for handler in self._handlers.get(message.get("event"), ()):
+            try:
+                result = handler(message.get("data"))
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Shared event handler for {message.get('event')} failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "redis",
+            "worker_id": self.worker_id,
+            "published": self.published,
+            "received": self.received,
+            "pending_events": self._outbox.qsize(),
+            "dropped_events": self.dropped_events,
+            "errors": self.errors,
+            "last_error": self.last_error
+        }
+
+
+_store: Optional[SharedStore] = None
+_configured = False
+
+
+def get_shared_store() -> Optional[SharedStore]:
+    """The worker's shared store, or None when SHARED_STATE_URL is unset (or redis isn't installed)"""
+    global _store, _configured
+    if not _configured:
+        _configured = True
+        if not SHARED_STATE_URL:
+            return None
+        if not REDIS_AVAILABLE:
+            logger.warning("SHARED_STATE_URL is set but the redis package isn't installed; state stays per-worker")
+            return None
+        _store = SharedStore(SHARED_STATE_URL)
+        logger.info(f"Shared state enabled (worker {_store.worker_id})")
+    return _store
@@ -0,0 +1,83 @@
+"""
+Worker File Slots
+Per-worker paths for local files (spill files, indexes) when several workers share a
+filesystem. Each process claims the lowest free numbered slot under an exclusive flock held
+until it exits, so no two live workers use the same file and a restarted worker takes over
+what its predecessor left behind. Without fcntl (not POSIX), slots are keyed by pid.
+"""
+
+import logging
+import os
+from typing import List, Optional
+
+try:
+    import fcntl
+    FLOCK_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FLOCK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+WORKER_SLOTS_MAX = int(os.getenv("WORKER_SLOTS_MAX", "64"))
+
+
+def slot_path(base: str, index: int) -> str:
+    """"/tmp/spill.jsonl", 2 -> "/tmp/spill.2.jsonl\""""
+    root, ext = os.path.splitext(base)
+    return f"{root}.{index}{ext}"
+
+
+class FileSlot:
+    """A numbered path owned by this process for as long as its lock is held"""
+
+    def __init__(self, path: str, lock_fd: Optional[int] = None):
+        self.path = path
+        self._lock_fd = lock_fd
+
+    def release(self):
+        if self._lock_fd is not None:
+            # Closing the descriptor drops the flock
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+def _try_lock(path: str) -> Optional[int]:
+    # The lock file is never deleted: unlinking it could let two processes lock different inodes
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def claim_slot(base: str, limit: int = WORKER_SLOTS_MAX) -> FileSlot:
+    """The lowest slot no live process holds; raises OSError when none is free"""
+    if not FLOCK_AVAILABLE:
+        return FileSlot(slot_path(base, os.getpid()))
+    for index in range(limit):
+        path = slot_path(base, index)
+        fd = _try_lock(path)
+        if fd is not None:
+            return FileSlot(path, fd)
+    raise OSError(f"All {limit} worker slots for {base} are held")
+
+
+def orphaned_slots(base: str, limit: int = WORKER_SLOTS_MAX) -> List[FileSlot]:
+    """
+    Slots whose file exists but which no live process holds (e.g. after WEB_CONCURRENCY was
+    lowered). They come back locked; the caller takes over their files and releases them.
+    """
+    if not FLOCK_AVAILABLE:
+        return []
+    orphans = []
+    for index in range(limit):
+        path = slot_path(base, index)
+        if not os.path.exists(path):
+            continue
+        fd = _try_lock(path)
+        if fd is not None:
+            orphans.append(FileSlot(path, fd))
+    return orphans
@@ -8,16 +8,20 @@ This is the V2 refactored gateway with clean separation of concerns.
 """
 
 import asyncio
+import contextvars
 import json
 import logging
 import os
 import sys
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
+import httpx
 from starlette.applications import Starlette
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse, StreamingResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from starlette.routing import Route
 
 # Configure logging
@@ -31,61 +35,56 @@ logger = logging.getLogger("sm-mcp-gateway-v2")
 VERSION = "2.0.0"
 BUILD_DATE = "2026-01-01"
 ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "1.0"))
+# JSON-RPC batches: entries dispatched at once per request, and the largest batch accepted
+MCP_BATCH_CONCURRENCY = int(os.getenv("MCP_BATCH_CONCURRENCY", "8"))
+MCP_BATCH_MAX = int(os.getenv("MCP_BATCH_MAX", "50"))
+# Streamable HTTP transport
+MCP_SESSION_TTL = float(os.getenv("MCP_SESSION_TTL", "3600"))
+MCP_KEEPALIVE_SECONDS = float(os.getenv("MCP_KEEPALIVE_SECONDS", "15"))
+# Newest first; an unsupported client version is answered with the newest
+PROTOCOL_VERSIONS = ("2025-03-26", "2024-11-05")
+# JSON-RPC methods that get their own label in /metrics; anything else counts as "other"
+METRIC_METHODS = {"initialize", "tools/list", "tools/call", "ping", "notifications/initialized"}
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
 
-# Import all backend modules
-from backends.snowflake_backend import SnowflakeBackend
-from backends.asana_backend import AsanaBackend
-from backends.drive_backend import GoogleDriveBackend
-from backends.m365_backend import M365Backend
-from backends.hivemind_backend import HiveMindBackend
-from backends.stubs import (
-    DropboxBackend, DealCloudBackend, GitHubBackend, AzureBackend,
-    MakeBackend, VertexBackend, GeminiBackend, ElevenLabsBackend,
-    SimliBackend, FigmaBackend, VectorBackend, TailscaleBackend, NotebookBackend
-)
+from gateway import progress
+from gateway.bulkhead import BulkheadFull, admission_from_env, bulkheads_from_env
+from gateway.health import OPEN as CIRCUIT_OPEN, HealthProber, breakers_from_env
+from gateway.lifecycle import lifecycle_from_env
+from gateway.metrics import (BREAKER_OPEN, BULKHEAD_QUEUED, CONTENT_TYPE as METRICS_CONTENT_TYPE, METRICS,
+                             MCP_IN_FLIGHT, MCP_LATENCY, MCP_REQUESTS, SESSIONS_ACTIVE, TOOL_ERRORS,
+                             known_tool_metrics, tool_metrics)
+from gateway.loader import loader_from_env, rss_bytes
+from gateway.registry import ToolRegistry
+from gateway.serialization import (BACKEND as SERIALIZER, StreamedMessage, encode_message, loads,
+                                   tool_result_message)
+from gateway.sessions import SessionStore
+from gateway.shared import SharedStore, get_shared_store
 
 # Initialize all backends
 BACKENDS = {}
+REGISTRY: Optional[ToolRegistry] = None
+# Created in the lifespan, after the fork, like everything else a worker owns. SHARED is set
+# when several workers share state (SHARED_STATE_URL); None keeps everything in-process
+SHARED: Optional[SharedStore] = None
+SESSIONS: Optional[SessionStore] = None
+ADMISSION = admission_from_env()
+BULKHEADS = bulkheads_from_env()
+BREAKERS = breakers_from_env()
+LIFECYCLE = lifecycle_from_env()
+# Deferred or still-connecting backends aren't probed; that would defeat deferral
+PROBER = HealthProber(lambda: {p: b for p, b in BACKENDS.items() if LIFECYCLE.is_started(p)}, BREAKERS)
+# Where server-to-client messages for the current request go (set on streamed POSTs)
+OUTBOUND: contextvars.ContextVar[Optional[Callable[[dict], None]]] = contextvars.ContextVar("mcp_outbound", default=None)
+MCP_IN_FLIGHT_ALL = MCP_IN_FLIGHT.labels()
 
-def init_backends():
-    """Initialize all backend modules"""
-    global BACKENDS
-    
-    backend_classes = [
-        ("sm", SnowflakeBackend),
-        ("asana", AsanaBackend),
-        ("drive", GoogleDriveBackend),
-        ("m365", M365Backend),
-        ("dropbox", DropboxBackend),
-        ("dc", DealCloudBackend),
-        ("github", GitHubBackend),
-        ("azure", AzureBackend),
-        ("make", MakeBackend),
-        ("vertex", VertexBackend),
-        ("gemini", GeminiBackend),
-        ("voice", ElevenLabsBackend),
-        ("avatar", SimliBackend),
-        ("figma", FigmaBackend),
-        ("vector", VectorBackend),
-        ("ts", TailscaleBackend),
-        ("notebook", NotebookBackend),
-        ("hivemind", HiveMindBackend),
-    ]
-    
-    for prefix, backend_class in backend_classes:
-        try:
-            BACKENDS[prefix] = backend_class()
-            logger.info(f"Initialized backend: {prefix}")
-        except Exception as e:
-            logger.error(f"Failed to initialize {prefix}: {e}")
-            BACKENDS[prefix] = None
-
-def get_all_tools():
-    """Aggregate tools from all backends"""
-    all_tools = []
-    
-    # Add gateway meta-tools
-    all_tools.append({
+GATEWAY_TOOLS = [
+    {
         "name": "gateway_status",
         "description": "[GATEWAY] Get the status of all MCP backends and health information",
         "inputSchema": {
@@ -93,51 +92,241 @@ def get_all_tools():
             "properties": {},
             "required": []
         }
-    })
-    
-    # Collect tools from each backend
-    for prefix, backend in BACKENDS.items():
+    }
+]
+
+# Backend modules are imported only for enabled prefixes (ENABLED_BACKENDS); order is start order
+BACKEND_MODULES = [
+    ("sm", "backends.snowflake_backend:SnowflakeBackend"),
+    ("asana", "backends.asana_backend:AsanaBackend"),
+    ("drive", "backends.drive_backend:GoogleDriveBackend"),
+    ("m365", "backends.m365_backend:M365Backend"),
+    ("dropbox", "backends.stubs:DropboxBackend"),
+    ("dc", "backends.stubs:DealCloudBackend"),
+    ("github", "backends.stubs:GitHubBackend"),
+    ("azure", "backends.stubs:AzureBackend"),
+    ("make", "backends.stubs:MakeBackend"),
+    ("vertex", "backends.stubs:VertexBackend"),
+    ("gemini", "backends.stubs:GeminiBackend"),
+    ("voice", "backends.stubs:ElevenLabsBackend"),
+    ("avatar", "backends.stubs:SimliBackend"),
+    ("figma", "backends.stubs:FigmaBackend"),
+    ("vector", "backends.stubs:VectorBackend"),
+    ("ts", "backends.stubs:TailscaleBackend"),
+    ("notebook", "backends.stubs:NotebookBackend"),
+    ("hivemind", "backends.hivemind_backend:HiveMindBackend"),
+]
+LOADER = loader_from_env(BACKEND_MODULES)
+# Lazy backends being imported and constructed on first use, by prefix
+_LOADING: Dict[str, asyncio.Task] = {}
+
+def rebuild_registry():
+    """Rebuild the tool catalog snapshot from the current backends"""
+    global REGISTRY
+    REGISTRY = ToolRegistry(BACKENDS, GATEWAY_TOOLS)
+    logger.info(f"Tool catalog v{REGISTRY.version}: {len(REGISTRY)} tools, etag {REGISTRY.etag}")
+    if SESSIONS is not None:
+        SESSIONS.broadcast({"jsonrpc": "2.0", "method": "notifications/tools/list_changed"})
+
+def _construct_backend(prefix: str):
+    try:
+        BACKENDS[prefix] = LOADER.load(prefix)()
+        LIFECYCLE.register(prefix)
+        logger.info(f"Initialized backend: {prefix}")
+    except Exception as e:
+        logger.error(f"Failed to initialize {prefix}: {e}")
+        BACKENDS[prefix] = None
+        LIFECYCLE.reset(prefix)
+
+def wire_backends():
+    """Connect backends that depend on each other"""
+    if BACKENDS.get("hivemind") is not None:
+        BACKENDS["hivemind"].set_snowflake(BACKENDS.get("sm"))
+
+def init_backends():
+    """Initialize the eager backends; lazy ones (LAZY_BACKENDS) aren't even imported yet"""
+    for prefix in LOADER.enabled_prefixes():
+        if LIFECYCLE.is_lazy(prefix):
+            LIFECYCLE.defer(prefix)
+            continue
+        _construct_backend(prefix)
+    wire_backends()
+    rebuild_registry()
+
+def unloaded_backends() -> List[str]:
+    """Enabled lazy backends whose module hasn't been imported yet"""
+    return [prefix for prefix in LOADER.enabled_prefixes() if prefix not in BACKENDS]
+
+async def load_backends(prefixes: List[str]):
+    """
+    Import and construct lazy backends on first use: a call to one of their tools, or a
+    tools/list, which needs their catalogs. The import runs on a worker thread; concurrent
+    first uses share one load.
+    """
+    tasks = []
+    for prefix in prefixes:
+        if prefix in BACKENDS:
+            continue
+        task = _LOADING.get(prefix)
+        if task is None:
+            task = _LOADING[prefix] = asyncio.ensure_future(_load_backend(prefix))
+        tasks.append(task)
+    if tasks:
+        await asyncio.shield(asyncio.gather(*tasks))
+
+async def _load_backend(prefix: str):
+    try:
+        try:
+            await asyncio.to_thread(LOADER.load, prefix)
+        except Exception as e:
+            logger.error(f"Failed to import {prefix}: {e}")
+            BACKENDS[prefix] = None
+            LIFECYCLE.reset(prefix)
+        else:
+            _construct_backend(prefix)
+        wire_backends()
+        rebuild_registry()
+    finally:
+        _LOADING.pop(prefix, None)
+
+async def start_backends():
+    """Run async startup hooks (connections, shared clients, background work) concurrently"""
+    await LIFECYCLE.start_all(BACKENDS)
+
+async def shutdown_backends():
+    """Release backend resources (connections, worker threads)"""
+    await LIFECYCLE.cancel_all()
+    for task in list(_LOADING.values()):
+        task.cancel()
+    # Reverse order so dependents (hivemind flushing through sm) close before what they use
+    for prefix, backend in reversed(list(BACKENDS.items())):
         if backend is None:
             continue
         try:
-            backend_tools = backend.get_tools()
-            for tool in backend_tools:
-                # Prefix tool names with backend identifier
-                tool["name"] = f"{prefix}_{tool['name']}"
-                all_tools.append(tool)
+            if hasattr(backend, "aclose"):
+                await backend.aclose()
+            if hasattr(backend, "close"):
+                backend.close()
         except Exception as e:
-            logger.error(f"Error getting tools from {prefix}: {e}")
-    
-    return all_tools
+            logger.error(f"Error shutting down {prefix}: {e}")
+
+@asynccontextmanager
+async def lifespan(app):
+    # Runs inside each worker process, so with several workers (WEB_CONCURRENCY) every
+    # connection pool, thread, background task and session table is created after the fork
+    global SHARED, SESSIONS
+    SHARED = get_shared_store()
+    SESSIONS = SessionStore(MCP_SESSION_TTL, shared=SHARED)
+    init_backends()
+    if SHARED is not None:
+        SHARED.start()
+    await start_backends()
+    PROBER.start()
+    yield
+    await PROBER.stop()
+    await shutdown_backends()
+    if SHARED is not None:
+        await SHARED.aclose()
+
+def get_all_tools():
+    """Return the prefixed tool catalog"""
+    return list(REGISTRY.tools)
+
+def backend_failure(result: Any) -> Optional[str]:
+    """
+    Error text if a returned result says the backend itself failed (not the caller's input).
+    A timeout the caller chose (timeout_seconds) says nothing about the backend's health.
+    """
+    if not isinstance(result, dict):
+        return None
+    if result.get("unavailable") or (result.get("timed_out") and not result.get("caller_timeout")):
+        return str(result.get("error") or "backend unavailable")
+    return None
+
+def is_backend_exception(e: Exception) -> bool:
+    """
+    Only transport failures, timeouts and HTTP 5xx say the backend is unhealthy. HTTP 4xx
+    (bad input, missing object, throttling) and bugs in the gateway (KeyError, ...) don't.
+    """
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, (httpx.TransportError, TimeoutError, ConnectionError))
 
 async def handle_tool_call(name: str, arguments: dict) -> Any:
     """Route tool call to appropriate backend"""
     
     # Handle gateway meta-tools
     if name == "gateway_status":
+        tool_metrics("gateway", name).calls.inc()
         return await get_gateway_status()
     
-    # Parse backend prefix from tool name
-    parts = name.split("_", 1)
-    if len(parts) < 2:
-        return {"error": f"Invalid tool name format: {name}"}
-    
-    prefix = parts[0]
-    tool_name = parts[1]
-    
-    if prefix not in BACKENDS:
-        return {"error": f"Unknown backend: {prefix}"}
-    
-    backend = BACKENDS[prefix]
-    if backend is None:
-        return {"error": f"Backend {prefix} is not initialized"}
+    entry = REGISTRY.lookup(name)
+    if entry is None and name.split("_", 1)[0] in unloaded_backends():
+        await load_backends([name.split("_", 1)[0]])
+        entry = REGISTRY.lookup(name)
+    if entry is None:
+        # Unknown names are never used as labels, so clients can't mint new series
+        TOOL_ERRORS.labels("unknown", "unknown", "unknown_tool").inc()
+        # Slow path only for misses, to keep the original error messages
+        parts = name.split("_", 1)
+        if len(parts) < 2:
+            return {"error": f"Invalid tool name format: {name}"}
+        if parts[0] not in BACKENDS:
+            return {"error": f"Unknown backend: {parts[0]}"}
+        if BACKENDS[parts[0]] is None:
+            return {"error": f"Backend {parts[0]} is not initialized"}
+        return {"error": f"Unknown tool: {name}"}
     
+    prefix, handler = entry
+    metrics = tool_metrics(prefix, name)
+    metrics.calls.inc()
+    if not LIFECYCLE.is_started(prefix):
+        # Deferred backends connect on first use; eager ones may still be inside the startup deadline
+        await LIFECYCLE.wait_started(prefix, BACKENDS[prefix])
+    breaker = BREAKERS.get(prefix)
+    if not breaker.allow():
+        metrics.error("circuit_open")
+        return {
+            "error": f"Backend {prefix} is unavailable (circuit open): {breaker.last_error}",
+            "retryable": True,
+            "retry_after_seconds": breaker.retry_after()
+        }
+    recorded = False
     try:
-        result = await backend.call_tool(tool_name, arguments)
+        # Bulkhead first: calls queued behind their own backend hold no gateway-wide slot, so
+        # one slow backend can't use up admission for the others
+        async with BULKHEADS.get(prefix).slot(), ADMISSION.slot():
+            # Timed inside both so queueing doesn't count as backend latency
+            started = time.monotonic()
+            metrics.in_flight.inc()
+            try:
+                result = await handler(arguments)
+            except Exception as e:
+                breaker.record(not is_backend_exception(e), time.monotonic() - started, str(e))
+                recorded = True
+                raise
+            finally:
+                metrics.in_flight.dec()
+                metrics.latency.observe(time.monotonic() - started)
+            failure = backend_failure(result)
+            breaker.record(failure is None, time.monotonic() - started, failure)
+            recorded = True
+        if failure is not None:
+            metrics.error("unavailable")
+        elif isinstance(result, dict) and ("error" in result or result.get("success") is False):
+            metrics.error("error")
         return result
+    except BulkheadFull as e:
+        metrics.error("rejected")
+        logger.warning(f"Rejected {name}: {e}")
+        return {"error": str(e), "retryable": True, "retry_after_seconds": e.retry_after}
     except Exception as e:
+        metrics.error("exception")
         logger.error(f"Error calling {name}: {e}")
         return {"error": str(e)}
+    finally:
+        if not recorded:
+            breaker.release()
 
 async def get_gateway_status():
     """Get comprehensive gateway status"""
@@ -146,8 +335,17 @@ async def get_gateway_status():
             "version": VERSION,
             "build_date": BUILD_DATE,
             "environment": ENVIRONMENT,
+            "serializer": SERIALIZER,
             "timestamp": datetime.utcnow().isoformat()
         },
+        "catalog": {
+            "version": REGISTRY.version,
+            "etag": REGISTRY.etag
+        },
+        "sessions": SESSIONS.stats(),
+        "worker": {"pid": os.getpid(), "shared_state": SHARED.stats() if SHARED is not None else None},
+        "admission": ADMISSION.stats(),
+        "startup": LIFECYCLE.summary(),
         "backends": {},
         "total_tools": 0
     }
@@ -155,21 +353,34 @@ async def get_gateway_status():
     for prefix, backend in BACKENDS.items():
         if backend is None:
             status["backends"][prefix] = {"status": "FAILED", "tools": 0}
+        elif prefix in REGISTRY.errors:
+            status["backends"][prefix] = {
+                "status": "ERROR",
+                "error": REGISTRY.errors[prefix],
+                "tools": 0
+            }
         else:
+            tool_count = REGISTRY.tool_counts.get(prefix, 0)
+            breaker = BREAKERS.peek(prefix)
+            status["backends"][prefix] = {
+                # UNKNOWN until a call or health probe has actually exercised the backend
+                "status": breaker.health() if breaker is not None else "UNKNOWN",
+                "tools": tool_count
+            }
+            if breaker is not None:
+                status["backends"][prefix]["health"] = breaker.stats()
+            status["backends"][prefix]["lifecycle"] = LIFECYCLE.stats(prefix)
+            status["total_tools"] += tool_count
+        
+        bulkhead = BULKHEADS.stats(prefix)
+        if bulkhead is not None:
+            status["backends"][prefix]["bulkhead"] = bulkhead
+        
+        if backend is not None and hasattr(backend, "get_metrics"):
             try:
-                tools = backend.get_tools()
-                tool_count = len(tools)
-                status["backends"][prefix] = {
-                    "status": "HEALTHY",
-                    "tools": tool_count
-                }
-                status["total_tools"] += tool_count
+                status["backends"][prefix]["metrics"] = backend.get_metrics()
             except Exception as e:
-                status["backends"][prefix] = {
-                    "status": "ERROR",
-                    "error": str(e),
-                    "tools": 0
-                }
+                logger.error(f"Error collecting metrics from {prefix}: {e}")
     
     return status
 
@@ -181,22 +392,24 @@ async def handle_sse_message(request_data: dict) -> dict:
     msg_id = request_data.get("id")
     
     if method == "initialize":
+        requested = params.get("protocolVersion")
         return {
             "jsonrpc": "2.0",
             "id": msg_id,
             "result": {
-                "protocolVersion": "2024-11-05",
+                "protocolVersion": requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0],
                 "serverInfo": {
                     "name": "SM MCP Gateway V2",
                     "version": VERSION
                 },
                 "capabilities": {
-                    "tools": {}
+                    "tools": {"listChanged": True}
                 }
             }
         }
     
     elif method == "tools/list":
+        await load_backends(unloaded_backends())
         tools = get_all_tools()
         return {
             "jsonrpc": "2.0",
@@ -210,20 +423,27 @@ async def handle_sse_message(request_data: dict) -> dict:
         tool_name = params.get("name")
         arguments = params.get("arguments", {})
         
-        result = await handle_tool_call(tool_name, arguments)
+        # Progress only has somewhere to go when the response is being streamed
+        progress_token = (params.get("_meta") or {}).get("progressToken")
+        emit = OUTBOUND.get()
+        bound = None
+        if progress_token is not None and emit is not None:
+            bound = progress.bind(progress.ProgressReporter(progress_token, emit))
+        try:
+            result = await handle_tool_call(tool_name, arguments)
+        finally:
+            if bound is not None:
+                progress.unbind(bound)
         
-        return {
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": json.dumps(result, default=str)
-                    }
-                ]
-            }
-        }
+        message = tool_result_message(msg_id, result)
+        metrics = known_tool_metrics(tool_name)
+        if metrics is not None:
+            if isinstance(message, StreamedMessage):
+                # Its size is only known once it has been sent
+                message.on_complete = metrics.response_bytes.observe
+            else:
+                metrics.response_bytes.observe(len(message.data))
+        return message
     
     else:
         return {
@@ -235,15 +455,77 @@ async def handle_sse_message(request_data: dict) -> dict:
             }
         }
 
+def json_response(message: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Encode once with the gateway serializer instead of JSONResponse's stdlib pass. A large
+    tool result goes out chunked, encoded on a worker thread as the client reads it.
+    """
+    if isinstance(message, StreamedMessage):
+        return StreamingResponse(message.chunks(), status_code=status_code, media_type="application/json",
+                                 headers=headers)
+    return Response(encode_message(message), status_code=status_code, media_type="application/json",
+                    headers=headers)
+
+def jsonrpc_error(msg_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}
+
+def is_notification(message: Any) -> bool:
+    """JSON-RPC notifications carry no id and must not be answered"""
+    return isinstance(message, dict) and "id" not in message
+
+async def handle_jsonrpc_batch(messages: list, emit: Optional[Callable[[dict], None]] = None) -> list:
+    """
+    Dispatch a batch concurrently (bounded), returning responses in request order. With
+    emit, each response is also handed over as soon as it is ready.
+    """
+    semaphore = asyncio.Semaphore(MCP_BATCH_CONCURRENCY)
+    
+    async def dispatch(message):
+        if not isinstance(message, dict) or "method" not in message:
+            return jsonrpc_error(None, -32600, "Invalid Request")
+        async with semaphore:
+            try:
+                response = await handle_sse_message(message)
+            except Exception as e:
+                logger.error(f"Batch entry {message.get('method')} failed: {e}")
+                response = jsonrpc_error(message.get("id"), -32603, str(e))
+        if is_notification(message):
+            return None
+        if emit is not None:
+            emit(response)
+        return response
+    
+    responses = await asyncio.gather(*[dispatch(message) for message in messages])
+    return [response for response in responses if response is not None]
+
 # HTTP Endpoints
 async def health_check(request):
-    """Health check endpoint"""
+    """Liveness: the process is up and serving. Readiness is reported alongside, not folded in,
+    so a slow backend login doesn't get the container restarted."""
+    startup = LIFECYCLE.summary()
     return JSONResponse({
         "status": "healthy",
+        "ready": startup["ready"],
         "version": VERSION,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "backends": {key: startup[key] for key in ("starting", "failed", "deferred")}
+    })
+
+async def diagnostics_endpoint(request):
+    """What each enabled backend cost to import, and the process footprint"""
+    return JSONResponse({
+        "python": sys.version.split()[0],
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "backends": LOADER.stats(),
+        "startup": LIFECYCLE.summary()
     })
 
+async def readiness_check(request):
+    """Readiness: 503 until every eager backend has finished starting (ready or failed)"""
+    startup = LIFECYCLE.summary()
+    return JSONResponse(startup, status_code=200 if startup["ready"] else 503)
+
 async def sse_endpoint(request):
     """SSE endpoint for MCP protocol"""
     
@@ -266,22 +548,163 @@ async def sse_endpoint(request):
     return StreamingResponse(
         event_generator(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+        headers=SSE_HEADERS
     )
 
+def sse_message(message: Any) -> bytes:
+    """One SSE message event carrying an encoded JSON-RPC message"""
+    return b"event: message\ndata: " + encode_message(message) + b"\n\n"
+
+def sse_chunks(message: Any) -> Iterator[bytes]:
+    """sse_message in pieces: a large tool result is encoded while its event is being written"""
+    if not isinstance(message, StreamedMessage):
+        yield sse_message(message)
+        return
+    yield b"event: message\ndata: "
+    yield from message.chunks()
+    yield b"\n\n"
+
+def wants_stream(request, body) -> bool:
+    """Stream over SSE when the client accepts it and there is a tool call to wait for"""
+    if "text/event-stream" not in request.headers.get("accept", ""):
+        return False
+    messages = body if isinstance(body, list) else [body]
+    return any(isinstance(m, dict) and m.get("method") == "tools/call" and "id" in m for m in messages)
+
+def stream_jsonrpc(body, headers: dict) -> StreamingResponse:
+    """
+    Answer a POST as an SSE stream: progress notifications while tools run, each response
+    as soon as it is ready, keepalive comments in between. The stream ends after the last
+    response. Starlette cancels the generator (and with it the dispatch) on disconnect.
+    """
+    outbox: asyncio.Queue = asyncio.Queue()
+    
+    async def dispatch():
+        OUTBOUND.set(outbox.put_nowait)
+        if isinstance(body, list):
+            await handle_jsonrpc_batch(body, emit=outbox.put_nowait)
+        else:
+            response = await handle_sse_message(body)
+            if not is_notification(body):
+                outbox.put_nowait(response)
+    
+    async def events():
+        task = asyncio.create_task(dispatch())
+        try:
+            while True:
+                getter = asyncio.ensure_future(outbox.get())
+                done, _ = await asyncio.wait({task, getter}, timeout=MCP_KEEPALIVE_SECONDS,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    for chunk in sse_chunks(getter.result()):
+                        yield chunk
+                    continue
+                getter.cancel()
+                if task in done:
+                    break
+                yield ": keepalive\n\n"
+            while not outbox.empty():
+                for chunk in sse_chunks(outbox.get_nowait()):
+                    yield chunk
+            if task.exception() is not None:
+                raise task.exception()
+        finally:
+            if not task.done():
+                task.cancel()
+                logger.info("Client disconnected; cancelled in-flight request")
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={**SSE_HEADERS, **headers})
+
+async def run_until_disconnect(request, coro):
+    """Await coro, cancelling it if the HTTP client goes away first"""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            logger.info("Client disconnected; cancelled in-flight request")
+            return None
+
+def metric_method(body: Any) -> str:
+    """Method label for transport metrics, bounded so clients can't mint new series"""
+    if isinstance(body, list):
+        return "batch"
+    method = body.get("method") if isinstance(body, dict) else None
+    return method if method in METRIC_METHODS else "other"
+
 async def mcp_endpoint(request):
     """Main MCP JSON-RPC endpoint"""
+    started = time.monotonic()
+    MCP_IN_FLIGHT_ALL.inc()
+    status = 500
     try:
-        body = await request.json()
-        response = await handle_sse_message(body)
-        return JSONResponse(response)
+        response = await handle_mcp_post(request)
+        status = response.status_code
+        return response
+    finally:
+        MCP_IN_FLIGHT_ALL.dec()
+        method = getattr(request.state, "mcp_method", "invalid")
+        MCP_REQUESTS.labels(method, str(status)).inc()
+        MCP_LATENCY.labels(method).observe(time.monotonic() - started)
+
+async def handle_mcp_post(request):
+    try:
+        try:
+            body = loads(await request.body())
+        except ValueError as e:
+            return json_response(jsonrpc_error(None, -32700, f"Parse error: {e}"), status_code=400)
+        request.state.mcp_method = metric_method(body)
+        headers = {}
+        session_id = request.headers.get("mcp-session-id")
+        if session_id:
+            if await SESSIONS.resolve(session_id) is None:
+                return json_response(jsonrpc_error(None, -32001, "Session not found"), status_code=404)
+            headers["Mcp-Session-Id"] = session_id
+        
+        if isinstance(body, list):
+            if not body:
+                return json_response(jsonrpc_error(None, -32600, "Invalid Request: empty batch"), headers=headers)
+            if len(body) > MCP_BATCH_MAX:
+                return json_response(jsonrpc_error(None, -32600, f"Batch exceeds {MCP_BATCH_MAX} entries"),
+                                     headers=headers)
+        elif not isinstance(body, dict):
+            return json_response(jsonrpc_error(None, -32600, "Invalid Request: expected an object or a batch"),
+                                 headers=headers)
+        elif body.get("method") == "initialize":
+            response = await handle_sse_message(body)
+            session = SESSIONS.create(response["result"]["protocolVersion"])
+            await SESSIONS.share(session)
+            return json_response(response, headers={"Mcp-Session-Id": session.id})
+        elif body.get("method") == "tools/list":
+            await load_backends(unloaded_backends())
+            return Response(
+                REGISTRY.tools_list_response(body.get("id")),
+                media_type="application/json",
+                headers={"ETag": REGISTRY.etag, **headers}
+            )
+        
+        if wants_stream(request, body):
+            return stream_jsonrpc(body, headers)
+        
+        if isinstance(body, list):
+            responses = await run_until_disconnect(request, handle_jsonrpc_batch(body))
+            if responses is None:
+                return Response(status_code=499)
+            if not responses:
+                # Only notifications: nothing to answer
+                return Response(status_code=202, headers=headers)
+            return json_response(responses, headers=headers)
+        response = await run_until_disconnect(request, handle_sse_message(body))
+        if response is None:
+            return Response(status_code=499)
+        if is_notification(body):
+            return Response(status_code=202, headers=headers)
+        return json_response(response, headers=headers)
     except Exception as e:
         logger.error(f"MCP endpoint error: {e}")
-        return JSONResponse({
+        return json_response({
             "jsonrpc": "2.0",
             "id": None,
             "error": {
@@ -290,18 +713,71 @@ async def mcp_endpoint(request):
             }
         }, status_code=500)
 
+async def mcp_stream(request):
+    """GET /mcp: long-lived SSE stream of server-initiated messages for a session"""
+    if "text/event-stream" not in request.headers.get("accept", ""):
+        return Response(status_code=406)
+    session_id = request.headers.get("mcp-session-id")
+    if not session_id:
+        return json_response(jsonrpc_error(None, -32600, "Mcp-Session-Id header required"), status_code=400)
+    session = await SESSIONS.resolve(session_id)
+    if session is None:
+        return json_response(jsonrpc_error(None, -32001, "Session not found"), status_code=404)
+    
+    async def events():
+        session.streams += 1
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(session.queue.get(), MCP_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                for chunk in sse_chunks(message):
+                    yield chunk
+        finally:
+            session.streams -= 1
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={**SSE_HEADERS, "Mcp-Session-Id": session_id})
+
+async def mcp_close(request):
+    """DELETE /mcp: client ends its session"""
+    session_id = request.headers.get("mcp-session-id")
+    if not session_id:
+        return Response(status_code=400)
+    return Response(status_code=200 if await SESSIONS.discard(session_id) else 404)
+
 async def tools_list(request):
     """Direct tools list endpoint"""
-    tools = get_all_tools()
-    return JSONResponse({
-        "tools": tools,
-        "total_tools": len(tools)
-    })
+    await load_backends(unloaded_backends())
+    headers = {"ETag": REGISTRY.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == REGISTRY.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        REGISTRY.tools_endpoint_body,
+        media_type="application/json",
+        headers=headers
+    )
+
+async def metrics_endpoint(request):
+    """Prometheus metrics for this worker"""
+    BREAKER_OPEN.clear()
+    BULKHEAD_QUEUED.clear()
+    for prefix, backend in BACKENDS.items():
+        if backend is None:
+            continue
+        breaker = BREAKERS.peek(prefix)
+        BREAKER_OPEN.labels(prefix).set(1 if breaker is not None and breaker.state == CIRCUIT_OPEN else 0)
+        bulkhead = BULKHEADS.stats(prefix)
+        BULKHEAD_QUEUED.labels(prefix).set(bulkhead["queued"] if bulkhead is not None else 0)
+    SESSIONS_ACTIVE.labels().set(len(SESSIONS) if SESSIONS is not None else 0)
+    return Response(METRICS.render(), media_type=METRICS_CONTENT_TYPE)
 
 async def status_endpoint(request):
     """Gateway status endpoint"""
     status = await get_gateway_status()
-    return JSONResponse(status)
+    return json_response(status)
 
 # Create Starlette app
 app = Starlette(
@@ -309,12 +785,17 @@ app = Starlette(
     routes=[
         Route("/", health_check),
         Route("/health", health_check),
+        Route("/ready", readiness_check),
+        Route("/diagnostics", diagnostics_endpoint),
+        Route("/metrics", metrics_endpoint),
         Route("/sse", sse_endpoint),
         Route("/mcp", mcp_endpoint, methods=["POST"]),
+        Route("/mcp", mcp_stream, methods=["GET"]),
+        Route("/mcp", mcp_close, methods=["DELETE"]),
         Route("/tools", tools_list),
         Route("/status", status_endpoint),
     ],
-    on_startup=[init_backends]
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -0,0 +1,39 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The stand-in connector shadows any installed snowflake.connector
+sys.path.insert(0, os.path.join(ROOT, "tests", "fakes"))
+sys.path.insert(1, ROOT)
+
+# Read at import time by the gateway modules
+os.environ.setdefault("ENABLED_BACKENDS", "sm")
+os.environ.setdefault("SNOWFLAKE_PASSWORD", "test")
+os.environ.setdefault("HIVEMIND_SEARCH_ENABLED", "false")
+os.environ.setdefault("HIVEMIND_TAIL_ENABLED", "false")
+
+import pytest
+
+from snowflake.connector import SERVER
+
+
+@pytest.fixture(autouse=True)
+def fake_server():
+    SERVER.reset()
+    yield SERVER
+
+
+@pytest.fixture
+def snowflake_backend():
+    """SnowflakeBackend on its own pool and engine, so each test starts from empty state"""
+    from backends.snowflake_backend import SnowflakeBackend
+    from backends.snowflake_engine import SnowflakeQueryEngine
+    from backends.snowflake_pool import SnowflakeConnectionPool
+    from snowflake.connector import connect
+
+    backend = SnowflakeBackend()
+    backend.pool = SnowflakeConnectionPool(connect=lambda: connect(paramstyle="qmark"), max_size=2)
+    backend.engine = SnowflakeQueryEngine(max_workers=2)
+    yield backend
+    backend.close()
@@ -0,0 +1,212 @@
+"""
+Stand-in for snowflake.connector: an in-process "server" that runs a few statement shapes,
+enough to exercise the gateway's pool, engine and paging without an account.
+
+    SELECT 1
+    SELECT SEQ4() AS N, ... FROM TABLE(GENERATOR(ROWCOUNT => n))   rows 0..n-1
+    CALL SYSTEM$WAIT(seconds)                                        takes that long
+    SELECT SYSTEM$CANCEL_QUERY('<query id>')                         cancels a running query
+
+Other SELECTs return one row; anything else is treated as DML that affects one row. Each
+statement runs on its own timeline (plus SERVER.delay): a synchronous execute() blocks the
+calling thread for the duration, execute_async() returns at once and the query reports
+RUNNING until it is due.
+"""
+
+import re
+import threading
+import time
+import uuid
+
+from snowflake.connector.errors import ProgrammingError
+
+BATCH_ROWS = 10
+RUNNING = "RUNNING"
+SUCCESS = "SUCCESS"
+
+
+class Query:
+    def __init__(self, sql, params, duration):
+        self.id = str(uuid.uuid4())
+        self.sql = sql
+        self.params = params
+        self.due = time.monotonic() + duration
+        self.cancelled = False
+        self.description, self.rows = _result(sql)
+
+
+class Server:
+    """Everything the fake has seen, for assertions"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = {}
+        self.statements = []
+        self.cancelled = []
+        self.connections = 0
+        self.rows_read = 0
+        # Extra seconds every statement takes, to make ordinary statements slow
+        self.delay = 0
+
+    def reset(self):
+        with self.lock:
+            self.queries.clear()
+            self.statements.clear()
+            self.cancelled.clear()
+            self.connections = 0
+            self.rows_read = 0
+            self.delay = 0
+
+    def read(self, rows):
+        with self.lock:
+            self.rows_read += len(rows)
+        return rows
+
+    def submit(self, sql, params, paramstyle):
+        _check_binds(sql, params, paramstyle)
+        cancel = re.search(r"SYSTEM\$CANCEL_QUERY\('([^']*)'\)", sql)
+        if cancel:
+            with self.lock:
+                query = self.queries.get(cancel.group(1))
+                if query is not None:
+                    query.cancelled = True
+                self.cancelled.append(cancel.group(1))
+        wait = re.search(r"SYSTEM\$WAIT\(\s*([0-9.]+)", sql)
+        query = Query(sql, params, (float(wait.group(1)) if wait else 0) + self.delay)
+        with self.lock:
+            self.queries[query.id] = query
+            self.statements.append((sql, params))
+        return query
+
+    def status(self, query_id):
+        query = self.queries.get(query_id)
+        if query is None:
+            raise ProgrammingError(f"Unknown query id {query_id}")
+        if query.cancelled:
+            raise ProgrammingError(f"SQL execution canceled: {query_id}")
+        return RUNNING if time.monotonic() < query.due else SUCCESS
+
+
+SERVER = Server()
+
+
+def _result(sql):
+    generator = re.search(r"GENERATOR\(\s*ROWCOUNT\s*=>\s*(\d+)", sql, re.IGNORECASE)
+    if generator:
+        count = int(generator.group(1))
+        return [("N",), ("LABEL",)], [(i, f"row-{i}") for i in range(count)]
+    if re.match(r"\s*(SELECT|CALL|SHOW)\b", sql, re.IGNORECASE):
+        return [("RESULT",)], [(1,)]
+    return None, []
+
+
+def _check_binds(sql, params, paramstyle):
+    markers = sql.count("?") if paramstyle == "qmark" else sql.count("%s")
+    if params is None:
+        if markers:
+            raise ProgrammingError(f"Statement has {markers} bind markers but no parameters")
+        return
+    if paramstyle != "qmark":
+        raise ProgrammingError("Server-side binding requires paramstyle='qmark'")
+    if markers != len(params):
+        raise ProgrammingError(f"Statement has {markers} bind markers but {len(params)} parameters")
+
+
+class ResultBatch:
+    def __init__(self, rows):
+        self.rows = rows
+        self.rowcount = len(rows)
+
+    def __iter__(self):
+        return iter(SERVER.read(self.rows))
+
+
+class SnowflakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.sfqid = None
+        self.description = None
+        self.rowcount = None
+        self.closed = False
+        self._rows = []
+        self._position = 0
+
+    def _load(self, query):
+        self.sfqid = query.id
+        self.description = query.description
+        self._rows = query.rows
+        self._position = 0
+        self.rowcount = len(query.rows) if query.description else 1
+
+    def execute(self, sql, params=None, timeout=None):
+        query = SERVER.submit(sql, params, self.connection.paramstyle)
+        # A synchronous execute blocks until the statement finishes, and has no query id until then
+        remaining = query.due - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        SERVER.status(query.id)
+        self._load(query)
+        return self
+
+    def execute_async(self, sql, params=None):
+        query = SERVER.submit(sql, params, self.connection.paramstyle)
+        self.sfqid = query.id
+        return {"queryId": query.id}
+
+    def executemany(self, sql, seqparams):
+        for params in seqparams:
+            self.execute(sql, params)
+        self.rowcount = len(seqparams)
+        return self
+
+    def get_results_from_sfqid(self, query_id):
+        if SERVER.status(query_id) == RUNNING:
+            raise ProgrammingError(f"Query {query_id} is still running")
+        self._load(SERVER.queries[query_id])
+
+    def get_result_batches(self):
+        rows = self._rows
+        return [ResultBatch(rows[i:i + BATCH_ROWS]) for i in range(0, len(rows), BATCH_ROWS)]
+
+    def fetchmany(self, size):
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return SERVER.read(rows)
+
+    def fetchall(self):
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return SERVER.read(rows)
+
+    def close(self):
+        self.closed = True
+
+
+class SnowflakeConnection:
+    def __init__(self, paramstyle="pyformat", **kwargs):
+        self.paramstyle = paramstyle
+        self.kwargs = kwargs
+        self.closed = False
+        with SERVER.lock:
+            SERVER.connections += 1
+
+    def cursor(self):
+        if self.closed:
+            raise ProgrammingError("Connection is closed")
+        return SnowflakeCursor(self)
+
+    def get_query_status_throw_if_error(self, query_id):
+        return SERVER.status(query_id)
+
+    def is_still_running(self, status):
+        return status == RUNNING
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def connect(**kwargs):
+    return SnowflakeConnection(**kwargs)
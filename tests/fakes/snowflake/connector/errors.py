@@ -0,0 +1,10 @@
+class Error(Exception):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
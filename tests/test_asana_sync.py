@@ -0,0 +1,146 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from backends.asana_backend import AsanaBackend
+from backends.asana_sync import ASANA_SYNC_PROJECT_REFRESH, AsanaSyncWorker
+
+ME = "100"
+PROJECT = "200"
+
+
+class FakeAsana:
+    """Just enough of the Asana API for the sync worker: listings, events and sync tokens"""
+
+    def __init__(self):
+        self.tasks = {}
+        self.events = []
+        self.tokens = 0
+        self.valid_token = None
+        self.requests = []
+        self.app = Starlette(routes=[
+            Route("/api/1.0/users/me", self.get_me),
+            Route("/api/1.0/workspaces/{workspace}/users", self.list_users),
+            Route("/api/1.0/projects", self.list_projects),
+            Route("/api/1.0/projects/{gid}/sections", self.list_sections),
+            Route("/api/1.0/events", self.get_events),
+            Route("/api/1.0/tasks", self.list_tasks),
+            Route("/api/1.0/tasks/{gid}", self.get_task),
+        ])
+
+    def put_task(self, gid, name, assignee=ME, project=None, completed=False, event=None):
+        self.tasks[gid] = {"gid": gid, "name": name, "completed": completed,
+                           "assignee": {"gid": assignee} if assignee else None,
+                           "projects": [{"gid": project}] if project else [],
+                           "modified_at": datetime.now(timezone.utc).isoformat()}
+        if project and event:
+            self.events.append({"action": event, "resource": {"gid": gid, "resource_type": "task"}})
+
+    def expire_token(self):
+        self.valid_token = None
+        self.events.clear()
+
+    def _new_token(self):
+        self.tokens += 1
+        self.valid_token = f"sync-{self.tokens}"
+        return self.valid_token
+
+    async def get_me(self, request):
+        return JSONResponse({"data": {"gid": ME, "name": "Me"}})
+
+    async def list_users(self, request):
+        return JSONResponse({"data": [{"gid": ME, "name": "Me"}], "next_page": None})
+
+    async def list_projects(self, request):
+        return JSONResponse({"data": [{"gid": PROJECT, "name": "Pipeline"}], "next_page": None})
+
+    async def list_sections(self, request):
+        return JSONResponse({"data": []})
+
+    async def get_events(self, request):
+        self.requests.append(("events", dict(request.query_params)))
+        token = request.query_params.get("sync")
+        if token is None or token != self.valid_token:
+            return JSONResponse({"errors": [{"message": "Sync token invalid or too old"}],
+                                 "sync": self._new_token()}, status_code=412)
+        events, self.events = self.events, []
+        return JSONResponse({"data": events, "sync": self._new_token(), "has_more": False})
+
+    async def list_tasks(self, request):
+        query = request.query_params
+        self.requests.append(("tasks", dict(query)))
+        if "project" in query:
+            tasks = [t for t in self.tasks.values() if {"gid": query["project"]} in t["projects"]]
+        else:
+            tasks = [t for t in self.tasks.values() if (t["assignee"] or {}).get("gid") == ME]
+            if "completed_since" in query:
+                tasks = [t for t in tasks if not t["completed"]]
+            if "modified_since" in query:
+                tasks = [t for t in tasks if t["modified_at"] >= query["modified_since"]]
+        return JSONResponse({"data": tasks, "next_page": None})
+
+    async def get_task(self, request):
+        task = self.tasks.get(request.path_params["gid"])
+        if task is None:
+            return JSONResponse({"errors": [{"message": "Not found"}]}, status_code=404)
+        return JSONResponse({"data": task})
+
+
+def test_sync_converges_through_events_resync_and_my_tasks():
+    fake = FakeAsana()
+    fake.put_task("1", "Project task", project=PROJECT)
+    fake.put_task("2", "Someone else's", assignee="999", project=PROJECT)
+    fake.put_task("3", "Loose task")
+    fake.put_task("4", "Another loose task")
+
+    async def main():
+        backend = AsanaBackend()
+        backend.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app),
+                                           base_url="http://asana.test/api/1.0")
+        worker = AsanaSyncWorker(backend)
+        index = worker.index
+
+        def mine():
+            return {t["gid"] for t in index.query_tasks(assignees={ME}, completed=False)}
+
+        # Seed: the sync token is taken before the project listing
+        await worker.sync_once()
+        kinds = [kind for kind, params in fake.requests if kind == "events" or "project" in params]
+        assert kinds[:2] == ["events", "tasks"]
+        assert set(index.tasks) == {"1", "2", "3", "4"}
+        assert index.my_tasks == mine() == {"1", "3", "4"}
+
+        # Incremental: project events, plus my tasks modified since the last pass
+        fake.requests.clear()
+        fake.put_task("5", "New project task", project=PROJECT, event="added")
+        del fake.tasks["2"]
+        fake.events.append({"action": "deleted", "resource": {"gid": "2", "resource_type": "task"}})
+        fake.put_task("3", "Loose task", completed=True)
+        await worker.sync_once()
+        [my_listing] = [params for kind, params in fake.requests if kind == "tasks" and "assignee" in params]
+        assert "modified_since" in my_listing and "completed_since" not in my_listing
+        assert set(index.tasks) == {"1", "4", "5"}
+        assert index.my_tasks == mine() == {"1", "4", "5"}
+
+        # An expired token answers 412: the project is reseeded from a fresh token
+        fake.expire_token()
+        fake.put_task("1", "Renamed project task", project=PROJECT)
+        await worker.sync_once()
+        assert worker.reseeds == 1
+        assert index.tasks["1"]["name"] == "Renamed project task"
+
+        # A loose task reassigned away drops out with the next full listing
+        fake.put_task("4", "Another loose task", assignee="999")
+        worker.projects_refreshed_at = time.monotonic() - ASANA_SYNC_PROJECT_REFRESH - 1
+        await worker.sync_once()
+        assert set(index.tasks) == {"1", "5"}
+        assert index.my_tasks == mine() == {"1", "5"}
+        assert worker.fresh()
+        await backend.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,29 @@
+import asyncio
+
+from backends import snowflake_engine, snowflake_pool
+from gateway.bulkhead import Bulkhead, BulkheadRegistry
+import server
+
+
+def test_calls_queued_on_a_backend_hold_no_admission_slot(monkeypatch):
+    monkeypatch.setattr(server, "BULKHEADS", BulkheadRegistry({"sm": (1, 10)}))
+    monkeypatch.setattr(server, "ADMISSION", Bulkhead("gateway", 8, 8))
+    call = {"sql": "CALL SYSTEM$WAIT(0.3)", "use_cache": False}
+
+    async def main():
+        async with server.lifespan(server.app):
+            calls = [asyncio.create_task(server.handle_tool_call("sm_query_snowflake", call)) for _ in range(3)]
+            await asyncio.sleep(0.1)
+            assert server.BULKHEADS.get("sm").queued == 2
+            assert server.ADMISSION.in_flight == 1
+            results = await asyncio.gather(*calls)
+        assert all(result.get("success") for result in results)
+
+    # Each lifespan closes the process-wide pool and engine
+    snowflake_engine._shared_engine = None
+    snowflake_pool._shared_pool = None
+    try:
+        asyncio.run(main())
+    finally:
+        snowflake_engine._shared_engine = None
+        snowflake_pool._shared_pool = None
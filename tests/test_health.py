@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from gateway.health import CLOSED, OPEN, BreakerRegistry, CircuitBreaker, HealthProber, ProbeSkipped, parse_slow_calls
+import server
+
+
+def status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://app.asana.com/api/1.0/tasks")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+@pytest.mark.parametrize("error, counts", [
+    (KeyError("gid"), False),
+    (ValueError("bad input"), False),
+    (status_error(404), False),
+    (status_error(429), False),
+    (status_error(503), True),
+    (httpx.ConnectError("refused"), True),
+    (httpx.ReadTimeout("slow"), True),
+    (asyncio.TimeoutError(), True),
+])
+def test_only_transport_timeouts_and_5xx_count_against_the_breaker(error, counts):
+    assert server.is_backend_exception(error) is counts
+
+
+def test_a_caller_chosen_timeout_is_not_a_backend_failure():
+    assert server.backend_failure({"success": False, "error": "late", "timed_out": True}) == "late"
+    assert server.backend_failure({"success": False, "error": "late", "timed_out": True,
+                                   "caller_timeout": True}) is None
+
+
+def test_breaker_opens_only_after_consecutive_failed_probes():
+    breaker = CircuitBreaker("sm", probe_failures=3)
+    breaker.record_probe(False, 0.1, "down")
+    breaker.record_probe(False, 0.1, "down")
+    breaker.record_probe(True, 0.1)
+    breaker.record_probe(False, 0.1, "down")
+    breaker.record_probe(False, 0.1, "down")
+    assert breaker.state == CLOSED
+    breaker.record_probe(False, 0.1, "down")
+    assert breaker.state == OPEN
+
+
+def test_slow_call_threshold_is_per_backend():
+    breakers = BreakerRegistry(parse_slow_calls("sm=150, bad, asana=20"))
+    assert breakers.get("sm").slow_call_seconds == 150
+    assert breakers.get("asana").slow_call_seconds == 20
+    breakers.get("sm").record(True, 60)
+    assert breakers.get("sm").stats()["failure_rate"] == 0.0
+
+
+def test_snowflake_probe_skips_instead_of_waiting_for_a_busy_pool(snowflake_backend):
+    breakers = BreakerRegistry()
+    prober = HealthProber(lambda: {"sm": snowflake_backend}, breakers, timeout=5)
+
+    async def main():
+        async with snowflake_backend.pool.connection(), snowflake_backend.pool.connection():
+            with pytest.raises(ProbeSkipped):
+                await snowflake_backend.health_check()
+            started = time.monotonic()
+            await prober.probe_all()
+            assert time.monotonic() - started < 0.5
+        await prober.probe_all()
+
+    asyncio.run(main())
+    assert breakers.get("sm").last_probe_ok is True
+    assert breakers.get("sm").stats()["failed_probes"] == 0
+
+
+def test_query_timeout_from_timeout_seconds_is_marked_as_the_callers(snowflake_backend):
+    result = asyncio.run(snowflake_backend.call_tool(
+        "query_snowflake", {"sql": "SELECT SYSTEM$WAIT(2)", "timeout_seconds": 0.3}))
+    assert result["timed_out"] is True
+    assert result["caller_timeout"] is True
+    assert server.backend_failure(result) is None
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from backends.hivemind_backend import HIVE_MIND_TABLE, HiveMindBackend
+from backends.hivemind_buffer import HiveMindWriteBuffer
+from backends.hivemind_search import HiveMindSearchIndex, fts5_available
+from backends.hivemind_tail import HiveMindTail
+from backends import snowflake_engine
+from backends.snowflake_engine import QueryTimeoutError
+
+
+@pytest.fixture
+def hivemind(snowflake_backend):
+    backend = HiveMindBackend()
+    backend.buffer = None
+    backend.set_snowflake(snowflake_backend)
+    return backend
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def statements_on(fake_server, table=HIVE_MIND_TABLE):
+    return [(sql, params) for sql, params in fake_server.statements if table in sql]
+
+
+def test_write_binds_every_value(hivemind, fake_server):
+    hostile = "it's done'); DROP TABLE HIVE_MIND; --"
+    result = asyncio.run(hivemind.call_tool("write", {
+        "source": "TEST", "category": "DECISION", "summary": hostile,
+        "details": {"note": "o'clock"}, "tags": ["a", "b"]
+    }))
+    assert result["success"] is True
+    [(sql, params)] = statements_on(fake_server)
+    assert sql.startswith(f"INSERT INTO {HIVE_MIND_TABLE}")
+    assert hostile not in sql and "o'clock" not in sql
+    assert params[3] == hostile
+    assert params[4] == '{"note": "o\'clock"}'
+    assert params[6] == '["a", "b"]'
+    assert sql.count("?") == len(params)
+
+
+def test_read_binds_filters_and_returns_rows(hivemind, fake_server):
+    result = asyncio.run(hivemind.call_tool("read", {"workstream": "x' OR '1'='1", "category": "DECISION",
+                                                      "limit": 500}))
+    assert result["success"] is True
+    assert result["entries"] == [{"RESULT": 1}]
+    [(sql, params)] = statements_on(fake_server)
+    assert params == ["x' OR '1'='1", "DECISION"]
+    assert "WORKSTREAM = ?" in sql and "CATEGORY = ?" in sql
+    # limit is clamped and inlined as an integer
+    assert "LIMIT 50" in sql
+
+
+def test_tail_orders_pending_writes_and_table_rows_by_time():
+    tail = HiveMindTail(execute=None, table=HIVE_MIND_TABLE)
+    # 16:00Z and 18:00Z, with an offset and fewer fractional digits than utcnow() gives
+    tail.add({"ID": 1, "CREATED_AT": "2026-10-17T09:00:00.5-07:00", "SUMMARY": "older"})
+    tail.add({"ID": 2, "CREATED_AT": "2026-10-17T11:00:00-07:00", "SUMMARY": "newest"})
+    tail.add_pending({"ID": None, "CREATED_AT": "2026-10-17T17:00:00.000001", "SUMMARY": "pending"})
+    assert [row["SUMMARY"] for row in tail.query(3, {})] == ["newest", "pending", "older"]
+    assert [row["SUMMARY"] for row in tail.query(2, {})] == ["newest", "pending"]
+
+
+def test_buffered_writes_flush_as_one_bound_insert(hivemind, fake_server, tmp_path):
+    hivemind.buffer = HiveMindWriteBuffer(hivemind._execute, HIVE_MIND_TABLE, max_rows=3,
+                                          spill_path=str(tmp_path / "spill.jsonl"))
+
+    async def main():
+        hivemind.buffer.start()
+        results = await asyncio.gather(*[
+            hivemind.call_tool("write", {"source": "TEST", "category": "CONTEXT", "summary": f"entry {i}"})
+            for i in range(3)
+        ])
+        await hivemind.buffer.stop()
+        return results
+
+    results = asyncio.run(main())
+    assert all(result["success"] for result in results)
+    [(sql, params)] = statements_on(fake_server)
+    assert sql.count("UNION ALL") == 2
+    assert len(params) == 21 and sql.count("?") == 21
+    assert [params[i] for i in (3, 10, 17)] == ["entry 0", "entry 1", "entry 2"]
+
+
+def test_read_timeout_cancels_and_reports_failure(hivemind, snowflake_backend, fake_server, monkeypatch):
+    fake_server.delay = 5
+    snowflake_backend.engine.default_timeout = 0.2
+    monkeypatch.setattr(snowflake_engine, "CANCEL_TIMEOUT", 0.3)
+    result = asyncio.run(hivemind.call_tool("read", {}))
+    assert result["success"] is False
+    assert "timeout" in result["error"]
+    [(sql, _)] = statements_on(fake_server)
+    query_id = next(q.id for q in fake_server.queries.values() if q.sql == sql)
+    assert query_id in fake_server.cancelled
+    # The cancel statement is slow too, so it outlives CANCEL_TIMEOUT and the session is dropped
+    assert snowflake_backend.pool.stats()["discarded"] == 1
+
+
+def test_execute_timeout_raises_and_cancels(snowflake_backend, fake_server):
+    with pytest.raises(QueryTimeoutError):
+        asyncio.run(snowflake_backend.execute("CALL SYSTEM$WAIT(5)", timeout=0.2))
+    [query] = [q for q in fake_server.queries.values() if "WAIT" in q.sql]
+    assert wait_until(lambda: query.cancelled)
+
+
+def test_isolated_flushed_write_does_not_wait_for_a_batch_window(hivemind, fake_server, tmp_path):
+    hivemind.buffer = HiveMindWriteBuffer(hivemind._execute, HIVE_MIND_TABLE,
+                                          spill_path=str(tmp_path / "spill.jsonl"))
+
+    async def main():
+        hivemind.buffer.start()
+        started = time.monotonic()
+        result = await hivemind.call_tool("write", {"source": "TEST", "category": "CONTEXT", "summary": "one"})
+        elapsed = time.monotonic() - started
+        await hivemind.buffer.stop()
+        return result, elapsed
+
+    result, elapsed = asyncio.run(main())
+    assert result == {"success": True, "queued": False}
+    assert elapsed < 0.2
+    assert len(statements_on(fake_server)) == 1
+
+
+def test_buffered_entries_survive_failed_flushes_through_the_spill_file(tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    inserted = []
+
+    async def failing(sql, params):
+        raise RuntimeError("Snowflake down")
+
+    async def working(sql, params):
+        inserted.extend(params[3::7])
+        return {"success": True, "rows_affected": len(params) // 7}
+
+    async def write_while_down():
+        buffer = HiveMindWriteBuffer(failing, HIVE_MIND_TABLE, spill_path=spill_path)
+        buffer.start()
+        for i in range(3):
+            result = await buffer.submit(["TEST", "CONTEXT", "GENERAL", f"entry {i}", "{}", "LOW", None], "buffered")
+            assert result["queued"] is True
+        await buffer.stop()
+
+    async def recover():
+        buffer = HiveMindWriteBuffer(working, HIVE_MIND_TABLE, spill_path=spill_path)
+        buffer.start()
+        await buffer.stop()
+        return buffer
+
+    asyncio.run(write_while_down())
+    buffer = asyncio.run(recover())
+    assert buffer.recovered == 3
+    assert inserted == ["entry 0", "entry 1", "entry 2"]
+    # Flushed entries are dropped from the spill file
+    with open(buffer.spill_path) as f:
+        assert f.read() == ""
+
+
+def entry(summary):
+    return ["TEST", "CONTEXT", "GENERAL", summary, "{}", "LOW", None]
+
+
+def test_workers_spill_to_their_own_files_and_adopt_orphans(tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    inserted = []
+
+    async def failing(sql, params):
+        raise RuntimeError("Snowflake down")
+
+    async def working(sql, params):
+        inserted.extend(params[3::7])
+        return {"success": True, "rows_affected": len(params) // 7}
+
+    async def two_workers_while_down():
+        first = HiveMindWriteBuffer(failing, HIVE_MIND_TABLE, spill_path=spill_path)
+        second = HiveMindWriteBuffer(failing, HIVE_MIND_TABLE, spill_path=spill_path)
+        first.start()
+        second.start()
+        assert first.spill_path != second.spill_path
+        await first.submit(entry("first"), "buffered")
+        await second.submit(entry("second"), "buffered")
+        await first.stop()
+        await second.stop()
+        return second.spill_path
+
+    async def one_worker_after():
+        buffer = HiveMindWriteBuffer(working, HIVE_MIND_TABLE, spill_path=spill_path)
+        buffer.start()
+        await buffer.stop()
+        return buffer
+
+    orphan_path = asyncio.run(two_workers_while_down())
+    buffer = asyncio.run(one_worker_after())
+    # Its own slot's entry plus the orphaned slot's, each replayed once
+    assert buffer.recovered == 2
+    assert sorted(inserted) == ["first", "second"]
+    assert not os.path.exists(orphan_path)
+
+
+@pytest.mark.skipif(not fts5_available(), reason="SQLite without FTS5")
+def test_search_indexes_never_clear_another_live_workers_rows(tmp_path):
+    path = str(tmp_path / "search.db")
+    first = HiveMindSearchIndex(None, HIVE_MIND_TABLE, path=path)
+    second = HiveMindSearchIndex(None, HIVE_MIND_TABLE, path=path)
+    first._open()
+    first._insert_pending({"SUMMARY": "pending on the first worker"})
+    second._open()
+    assert first.db_path != second.db_path
+    assert first._conn.execute("SELECT COUNT(*) FROM hive WHERE pending = 1").fetchone() == (1,)
+    assert second._conn.execute("SELECT COUNT(*) FROM hive").fetchone() == (0,)
+    for index in (first, second):
+        asyncio.run(index.stop())
@@ -0,0 +1,51 @@
+import asyncio
+
+from backends import snowflake_engine, snowflake_pool
+from gateway.lifecycle import DEFERRED, READY, BackendLifecycle
+from gateway.loader import BackendLoader
+import server
+
+
+def test_lazy_backend_is_imported_on_its_first_call(monkeypatch):
+    loader = BackendLoader(server.BACKEND_MODULES, {"sm"})
+    monkeypatch.setattr(server, "LOADER", loader)
+    monkeypatch.setattr(server, "LIFECYCLE", BackendLifecycle(lazy={"sm"}))
+    monkeypatch.setattr(server, "BACKENDS", {})
+
+    async def main():
+        async with server.lifespan(server.app):
+            assert "sm" not in loader.imports
+            assert server.LIFECYCLE.states["sm"] == DEFERRED
+            assert server.LIFECYCLE.ready()
+            calls = [server.handle_tool_call("sm_query_snowflake", {"sql": "SELECT 1"}) for _ in range(2)]
+            results = await asyncio.gather(*calls)
+            assert all(result.get("success") for result in results)
+            assert "sm" in loader.imports
+            assert server.LIFECYCLE.states["sm"] == READY
+            assert server.REGISTRY.lookup("sm_query_snowflake") is not None
+
+    # Each lifespan closes the process-wide pool and engine
+    snowflake_engine._shared_engine = None
+    snowflake_pool._shared_pool = None
+    try:
+        asyncio.run(main())
+    finally:
+        snowflake_engine._shared_engine = None
+        snowflake_pool._shared_pool = None
+
+
+def test_sessions_are_created_by_the_lifespan(monkeypatch):
+    monkeypatch.setattr(server, "SESSIONS", None)
+
+    async def main():
+        async with server.lifespan(server.app):
+            return server.SESSIONS
+
+    snowflake_engine._shared_engine = None
+    snowflake_pool._shared_pool = None
+    try:
+        sessions = asyncio.run(main())
+    finally:
+        snowflake_engine._shared_engine = None
+        snowflake_pool._shared_pool = None
+    assert sessions is not None and len(sessions) == 0
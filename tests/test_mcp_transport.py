@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from backends import snowflake_engine, snowflake_pool
+import server
+
+
+@pytest.fixture
+def client():
+    """The gateway app with its lifespan running. Each lifespan closes the process-wide
+    Snowflake pool and engine, so they are reset around every app run."""
+    snowflake_engine._shared_engine = None
+    snowflake_pool._shared_pool = None
+    with TestClient(server.app) as client:
+        yield client
+    snowflake_engine._shared_engine = None
+    snowflake_pool._shared_pool = None
+
+
+@pytest.mark.parametrize("body", ['"str"', "5", "null", "true"])
+def test_non_object_body_is_an_invalid_request(client, body):
+    response = client.post("/mcp", content=body, headers={"content-type": "application/json"})
+    assert response.status_code == 200
+    assert response.json()["error"]["code"] == -32600
+
+
+def test_unparseable_body_is_a_parse_error(client):
+    response = client.post("/mcp", content="{", headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32700
+
+
+def test_invalid_batch_entries_are_rejected_individually(client):
+    response = client.post("/mcp", json=[5, {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}])
+    first, second = response.json()
+    assert first["error"]["code"] == -32600
+    assert "tools" in second["result"]
+
+
+def large_query(fmt="rows"):
+    return {"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": {
+        "name": "sm_query_snowflake",
+        "arguments": {"sql": "SELECT SEQ4() AS N FROM TABLE(GENERATOR(ROWCOUNT => 1500))",
+                      "page_size": 1500, "format": fmt, "use_cache": False}}}
+
+
+def tool_result(message):
+    return json.loads(message["result"]["content"][0]["text"])
+
+
+def test_large_result_is_sent_chunked(client):
+    with client.stream("POST", "/mcp", json=large_query()) as response:
+        # No Content-Length: the body is written as it is encoded
+        assert "content-length" not in response.headers
+        body = response.read()
+    result = tool_result(json.loads(body))
+    assert result["row_count"] == 1500
+    assert result["data"][-1] == {"N": 1499, "LABEL": "row-1499"}
+
+
+def test_large_result_streams_as_one_sse_event(client):
+    response = client.post("/mcp", json=large_query("columnar"),
+                           headers={"accept": "application/json, text/event-stream"})
+    events = [line for line in response.text.split("\n") if line.startswith("data: ")]
+    assert len(events) == 1
+    result = tool_result(json.loads(events[0][len("data: "):]))
+    assert len(result["rows"]) == 1500
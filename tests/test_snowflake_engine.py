@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from backends.snowflake_engine import QueryTimeoutError, SnowflakeQueryEngine, connection_busy
+from snowflake.connector import connect
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_execute_reads_results_after_completion(fake_server):
+    engine = SnowflakeQueryEngine(max_workers=2)
+    conn = connect(paramstyle="qmark")
+    rows = asyncio.run(engine.execute(
+        conn, "SELECT SEQ4() AS N FROM TABLE(GENERATOR(ROWCOUNT => 3))", read=lambda cursor: cursor.fetchall()))
+    assert rows == [(0, "row-0"), (1, "row-1"), (2, "row-2")]
+    engine.shutdown()
+
+
+def test_timeout_cancels_the_running_query_by_id(fake_server):
+    engine = SnowflakeQueryEngine(max_workers=2)
+    conn = connect(paramstyle="qmark")
+    with pytest.raises(QueryTimeoutError):
+        asyncio.run(engine.execute(conn, "CALL SYSTEM$WAIT(5)", timeout=0.2))
+    query_id = next(q.id for q in fake_server.queries.values() if "WAIT" in q.sql)
+    assert wait_until(lambda: query_id in fake_server.cancelled)
+    assert fake_server.queries[query_id].cancelled
+    assert engine.stats()["timed_out"] == 1
+    engine.shutdown()
+
+
+def test_timeout_waits_for_the_cancel_before_raising(fake_server):
+    engine = SnowflakeQueryEngine(max_workers=2)
+    conn = connect(paramstyle="qmark")
+
+    async def main():
+        task = asyncio.create_task(engine.execute(conn, "CALL SYSTEM$WAIT(5)", timeout=0.2))
+        await asyncio.sleep(0.1)
+        # Only the cancel statement is submitted from here on, and it takes 0.3s
+        fake_server.delay = 0.3
+        started = time.monotonic()
+        with pytest.raises(QueryTimeoutError):
+            await task
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.3
+    assert len(fake_server.cancelled) == 1
+    assert not connection_busy(conn)
+    engine.shutdown()
+
+
+def test_task_cancellation_cancels_the_query(fake_server):
+    engine = SnowflakeQueryEngine(max_workers=2)
+    conn = connect(paramstyle="qmark")
+
+    async def main():
+        task = asyncio.create_task(engine.execute(conn, "CALL SYSTEM$WAIT(5)"))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert wait_until(lambda: len(fake_server.cancelled) == 1)
+    assert engine.stats()["cancelled"] == 1
+    engine.shutdown()
+
+
+def test_cancel_works_without_qmark_paramstyle(fake_server):
+    engine = SnowflakeQueryEngine(max_workers=2)
+    conn = connect()
+    with pytest.raises(QueryTimeoutError):
+        asyncio.run(engine.execute(conn, "CALL SYSTEM$WAIT(5)", timeout=0.2))
+    assert wait_until(lambda: len(fake_server.cancelled) == 1)
+    engine.shutdown()
+
+
+def test_event_loop_stays_free_while_queries_run(fake_server):
+    engine = SnowflakeQueryEngine(max_workers=1)
+    conn = connect(paramstyle="qmark")
+
+    async def main():
+        queries = [asyncio.create_task(engine.execute(conn, "CALL SYSTEM$WAIT(1)")) for _ in range(4)]
+        gaps = []
+        while not all(q.done() for q in queries):
+            before = time.monotonic()
+            await asyncio.sleep(0.01)
+            gaps.append(time.monotonic() - before)
+        await asyncio.gather(*queries)
+        return gaps
+
+    started = time.monotonic()
+    gaps = asyncio.run(main())
+    # Four one-second statements share a single thread without queueing behind each other
+    assert time.monotonic() - started < 2.5
+    assert max(gaps) < 0.2
+    engine.shutdown()
+
+
+def test_health_stays_responsive_while_a_query_runs(fake_server):
+    from starlette.testclient import TestClient
+
+    import server
+
+    with TestClient(server.app) as client:
+        call = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                "params": {"name": "sm_query_snowflake",
+                           "arguments": {"sql": "CALL SYSTEM$WAIT(1.5)", "use_cache": False}}}
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(response=client.post("/mcp", json=call)))
+        worker.start()
+        assert wait_until(lambda: any("WAIT" in sql for sql, _ in fake_server.statements))
+
+        checks = 0
+        while worker.is_alive():
+            before = time.monotonic()
+            assert client.get("/health").status_code == 200
+            assert time.monotonic() - before < 0.5
+            checks += 1
+            time.sleep(0.05)
+        worker.join()
+
+    assert checks >= 5
+    assert result["response"].status_code == 200
+    text = result["response"].json()["result"]["content"][0]["text"]
+    assert json.loads(text)["success"] is True
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from backends.snowflake_backend import _decode_cursor
+
+ROWS_25 = "SELECT SEQ4() AS N FROM TABLE(GENERATOR(ROWCOUNT => 25))"
+
+
+@pytest.fixture
+def backend(snowflake_backend):
+    return snowflake_backend
+
+
+def query(backend, **arguments):
+    return asyncio.run(backend.call_tool("query_snowflake", arguments))
+
+
+@pytest.mark.parametrize("fmt", ["rows", "columnar", "column_major"])
+def test_pages_cover_the_result_in_order(backend, fmt):
+    seen = []
+    page = query(backend, sql=ROWS_25, page_size=7, format=fmt, use_cache=False)
+    while True:
+        assert page["success"], page
+        if fmt == "rows":
+            seen.extend(row["N"] for row in page["data"])
+        elif fmt == "columnar":
+            seen.extend(row[0] for row in page["rows"])
+        else:
+            seen.extend(page["data"][0])
+        if not page["has_more"]:
+            break
+        page = query(backend, cursor=page["next_cursor"], page_size=7, format=fmt)
+    assert seen == list(range(25))
+
+
+def test_next_page_skips_earlier_batches_without_reading_them(backend, fake_server):
+    page = query(backend, sql=ROWS_25, page_size=20, use_cache=False)
+    assert _decode_cursor(page["next_cursor"])["offset"] == 20
+
+    fake_server.rows_read = 0
+    page = query(backend, cursor=page["next_cursor"], page_size=20)
+    assert [row["N"] for row in page["data"]] == [20, 21, 22, 23, 24]
+    assert page["has_more"] is False
+    # Only the batch holding rows 20-24 was read, not the 20 rows before it
+    assert fake_server.rows_read == 5
+
+
+def test_max_rows_stops_paging(backend):
+    page = query(backend, sql=ROWS_25, page_size=10, max_rows=15, use_cache=False)
+    page = query(backend, cursor=page["next_cursor"], page_size=10)
+    assert page["row_count"] == 5
+    assert page["truncated_reason"] == "max_rows"
+    assert "next_cursor" not in page
+
+
+def test_memory_cap_truncates_page(backend, monkeypatch):
+    monkeypatch.setattr("backends.snowflake_backend.MAX_RESULT_BYTES", 64)
+    page = query(backend, sql=ROWS_25, page_size=25, use_cache=False)
+    assert 1 <= page["row_count"] < 25
+    assert page["truncated_reason"] == "memory_cap"
+    assert page["has_more"] is True
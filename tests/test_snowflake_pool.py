@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from backends.snowflake_cache import QueryResultCache
+from backends.snowflake_engine import QueryTimeoutError, SnowflakeQueryEngine
+from backends.snowflake_pool import SnowflakeConnectionPool
+from snowflake.connector import connect
+from snowflake.connector.errors import ProgrammingError
+
+
+def make_pool(**kwargs):
+    return SnowflakeConnectionPool(connect=lambda: connect(paramstyle="qmark"), **kwargs)
+
+
+def test_connection_is_reused_after_success_and_statement_errors():
+    pool = make_pool(max_size=1)
+    engine = SnowflakeQueryEngine(max_workers=2)
+
+    async def main():
+        async with pool.connection() as conn:
+            await engine.execute(conn, "SELECT 1")
+        first = conn
+        with pytest.raises(ProgrammingError):
+            async with pool.connection() as conn:
+                await engine.execute(conn, "SELECT ?", ())
+        assert conn is first
+        async with pool.connection() as conn:
+            assert conn is first
+
+    asyncio.run(main())
+    assert pool.stats()["discarded"] == 0
+    engine.shutdown()
+
+
+def test_connection_is_reused_after_a_timeout(fake_server):
+    pool = make_pool(max_size=1)
+    engine = SnowflakeQueryEngine(max_workers=2)
+
+    async def main():
+        with pytest.raises(QueryTimeoutError):
+            async with pool.connection() as conn:
+                await engine.execute(conn, "CALL SYSTEM$WAIT(5)", timeout=0.1)
+        timed_out = conn
+        # The cancel was sent before the connection went back
+        assert len(fake_server.cancelled) == 1
+        async with pool.connection() as conn:
+            assert conn is timed_out
+            assert await engine.execute(conn, "SELECT 1", read=lambda cursor: cursor.fetchall()) == [(1,)]
+
+    asyncio.run(main())
+    stats = pool.stats()
+    assert stats["discarded"] == 0
+    assert stats["size"] == 1
+    engine.shutdown()
+
+
+def test_connection_is_reused_when_cancelled(fake_server):
+    pool = make_pool(max_size=1)
+    engine = SnowflakeQueryEngine(max_workers=2)
+
+    async def use():
+        async with pool.connection() as conn:
+            await engine.execute(conn, "CALL SYSTEM$WAIT(5)")
+
+    async def main():
+        task = asyncio.create_task(use())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert len(fake_server.cancelled) == 1
+
+    asyncio.run(main())
+    assert pool.stats()["discarded"] == 0
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["idle"] == 1
+    engine.shutdown()
+
+
+def test_connection_still_in_use_by_a_thread_is_discarded():
+    pool = make_pool(max_size=1)
+    engine = SnowflakeQueryEngine(max_workers=2)
+
+    async def main():
+        with pytest.raises(QueryTimeoutError):
+            async with pool.connection() as conn:
+                # run() cannot abort server-side; its thread keeps the connection for 0.5s
+                await engine.run(conn, lambda cursor: cursor.execute("CALL SYSTEM$WAIT(0.5)"), timeout=0.1)
+
+    asyncio.run(main())
+    assert pool.stats()["discarded"] == 1
+    engine.shutdown()
+
+
+@pytest.mark.parametrize("sql", [
+    "USE SCHEMA ANALYTICS",
+    "use role sysadmin",
+    "ALTER SESSION SET TIMEZONE = 'UTC'",
+    "SET cutoff = '2024-01-01'",
+    "BEGIN",
+    "START TRANSACTION",
+    "COMMIT",
+    "ROLLBACK",
+    "CREATE TEMPORARY TABLE scratch AS SELECT 1 AS x",
+    "create or replace temp table scratch (x int)",
+])
+def test_session_statements_are_classified(sql):
+    cache = QueryResultCache(1024, 60, "DB", "RAW", "ROLE")
+    assert cache.classify(sql)[0] == "session"
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM USERS",
+    "CREATE TABLE settings (x int)",
+    "UPDATE sessions SET x = 1",
+])
+def test_other_statements_are_not_session_scoped(sql):
+    cache = QueryResultCache(1024, 60, "DB", "RAW", "ROLE")
+    assert cache.classify(sql)[0] != "session"
+
+
+@pytest.mark.parametrize("ddl", [
+    "CREATE TABLE new_table (x int)",
+    "DROP TABLE IF EXISTS RAW.old_table",
+    "ALTER TABLE DB.RAW.events ADD COLUMN y int",
+])
+def test_table_ddl_invalidates_its_schemas_listings(ddl):
+    cache = QueryResultCache(1024 * 1024, 60, "DB", "RAW", "ROLE")
+    for sql in ["SHOW TABLES", "SHOW TABLES IN SCHEMA DB.OTHER", "DESC TABLE RAW.users", "SELECT * FROM users"]:
+        kind, key, tables = cache.classify(sql)
+        cache.put(key, (), tables, {"success": True, "sql": sql}, cache.generation)
+    kind, _, tables = cache.classify(ddl)
+    assert kind == "write"
+    cache.invalidate_tables(tables)
+    # The current schema's SHOW and DESC results go; the other schema's listing and plain reads stay
+    assert cache.get(cache.classify("SHOW TABLES")[1]) is None
+    assert cache.get(cache.classify("DESC TABLE RAW.users")[1]) is None
+    assert cache.get(cache.classify("SHOW TABLES IN SCHEMA DB.OTHER")[1]) is not None
+    assert cache.get(cache.classify("SELECT * FROM users")[1]) is not None